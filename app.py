@@ -3,73 +3,225 @@ import streamlit as st
 import pandas as pd
 import json
 import os
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timedelta
 from pathlib import Path
+from logviewer.chunks import CHUNK_INDEX_FILE, ChunkIndex
+from logviewer.dataview import (load_parsed_logs, format_timestamp, apply_filters, find_entity_rows,
+                               find_keyword_rows, template_groups)
+from logviewer.entities import ENTITY_INDEX_FILE, ENTITY_KINDS, EntityIndex
+from logviewer.manifest import load_manifest, ARTIFACT_STAGES
+from logviewer.merged import MergedTimeline
+from logviewer.parser import parse_lazy_context
+from logviewer.partitions import PARTITIONS_FILE, load_partitions
+from logviewer.provenance import raw_context
+from logviewer.search import DEFAULT_LIMIT, SearchQuery, context_dirs, search_bundles
+from logviewer.service import find_bundle, viewer_bundles
+from logviewer.timeline import TimeWindow, find_timeline, to_epoch_us
 
 st.set_page_config(layout="wide", page_title="LogViewer")
 st.title("📋 Log Viewer Dashboard")
 st.sidebar.markdown("## 🧾 Available Bundles")
 
-CONFIG_FILE = "config.json"
-if not os.path.exists(CONFIG_FILE):
-    st.error("Missing config.json! Cannot continue.")
-    st.stop()
-
-with open(CONFIG_FILE) as f:
-    config = json.load(f)
-
-MODE = config.get("mode")
+PARSE_REFRESH_SECONDS = 2
+LOG_CACHE_ENTRIES = 4  # loaded context timelines kept warm, shared by every session and bundle
+PAGES = {"bundle": "📋 Bundle", "merged": "🔗 Merged Timeline", "search": "🔎 Fleet Search"}
+RAW_CONTEXT_LINES = 5
+SEARCH_REDRAW_ROWS = 200  # fleet search results are redrawn every this many streamed rows
+SEARCH_COLUMNS = ["timestamp", "bundle", "context", "severity", "process", "event_id", "message"]
+MERGED_COLUMNS = ["timestamp", "context", "member", "linecard", "boot", "severity", "process", "message"]
+MERGED_PAGE_ROWS = [100, 500, 1000, 5000]
+SEVERITIES = ["LOG_EMERG", "LOG_ALERT", "LOG_CRIT", "LOG_ERR", "LOG_WARN", "LOG_WARNING", "LOG_NOTICE", "LOG_INFO", "LOG_DEBUG"]
+
+@st.cache_resource
+def lazy_parse_tasks():
+    # Background parses of deferred contexts, shared by every session of this server.
+    return {}
+
+def get_deferred(bundle_output_dir, parent):
+    """Names of contexts under ``parent`` that a lazy parse recorded but has not parsed yet."""
+    return [context.split("/", 1)[1] for context, entry in load_manifest(bundle_output_dir)["contexts"].items()
+            if context.startswith(parent + "/") and entry.get("status") != "parsed"]
 
-@st.cache_data
 def get_boot_contexts(base_path):
     boot_dir = os.path.join(base_path, "previous")
-    if not os.path.exists(boot_dir):
-        return ["Current Boot"]
-    boots = [
-        b for b in os.listdir(boot_dir)
-        if os.path.isdir(os.path.join(boot_dir, b)) and b.startswith("boot")
-    ]
+    boots = set(get_deferred(base_path, "previous"))
+    if os.path.exists(boot_dir):
+        boots.update(b for b in os.listdir(boot_dir)
+                     if os.path.isdir(os.path.join(boot_dir, b)) and b.startswith("boot"))
     return ["Current Boot"] + sorted(boots)
-    
-def load_parsed_logs(path):
-    log_path = os.path.join(path, "parsed_logs.json")
-    if not os.path.exists(log_path):
-        return pd.DataFrame()
-    with open(log_path) as f:
-        data = json.load(f)
-    return pd.DataFrame(data)
-
-def format_timestamp(ts):
-    try:
-        return datetime.fromisoformat(ts).strftime("%Y-%m-%d %H:%M:%S")
-    except:
-        return ts
-
-def apply_filters(df, proc_filter, keyword, include_fastlogs, start_date, end_date):
-    filtered_df = df.copy()
-    if proc_filter != "All":
-        filtered_df = filtered_df[filtered_df['process'] == proc_filter]
-    if keyword:
-        filtered_df = filtered_df[filtered_df['message'].str.contains(keyword, case=False, na=False)]
-    if not include_fastlogs:
-        filtered_df = filtered_df[~filtered_df['source'].eq("fastlog")]
-    if start_date and end_date:
-        filtered_df = filtered_df[
-            (filtered_df["timestamp_dt"] >= start_date) & (filtered_df["timestamp_dt"] <= end_date)
-        ]
-    return filtered_df
-
-def render_bundle_view(df, bundle_key):
-    col1, col2, col3 = st.columns([2, 2, 1])
+
+def parse_snapshot(manifest):
+    return json.dumps([manifest.get("status"), manifest["stages"],
+                       {context: entry.get("status") for context, entry in manifest["contexts"].items()}])
+
+@st.fragment(run_every=PARSE_REFRESH_SECONDS)
+def watch_parse_progress(bundle_path, snapshot):
+    """Rerun the page whenever the parser publishes another stage of a bundle that is still being parsed."""
+    manifest = load_manifest(bundle_path)
+    if parse_snapshot(manifest) != snapshot:
+        st.rerun(scope="app")
+    if manifest.get("status") == "parsing":
+        ready = [stage for stage in ARTIFACT_STAGES if manifest["stages"].get(stage) == "done"]
+        waiting = [stage for stage in ARTIFACT_STAGES if stage not in ready]
+        st.info(f"⏳ Still parsing. Ready: {', '.join(ready) or 'nothing yet'} · waiting for: {', '.join(waiting)}")
+    elif manifest.get("status") in ("cancelled", "failed"):
+        st.warning(f"⏸️ This parse was {manifest['status']} before it finished; "
+                   "analyze the bundle again to resume where it stopped.")
+
+def artifact_pending(path, stage):
+    """True while the parse of the bundle at ``path`` is running and has not published ``stage`` yet."""
+    manifest = load_manifest(path)
+    return manifest.get("status") == "parsing" and manifest["stages"].get(stage) != "done"
+
+def ensure_context_parsed(bundle_path, path):
+    """Parse a deferred member, linecard or boot in the background the first time it is viewed.
+
+    Until it is ready the page shows its progress and reruns itself.
+    """
+    context = Path(os.path.relpath(path, bundle_path)).as_posix()
+    manifest = load_manifest(bundle_path)
+    entry = manifest["contexts"].get(context)
+    if entry is None or entry.get("status") == "parsed":
+        return
+    if "source" not in entry:
+        # Parsed eagerly by the still-running bundle parse; watch_parse_progress reruns when it lands.
+        if entry.get("status") == "error":
+            st.error(f"❌ Failed to parse {context}: {entry.get('error')}")
+        elif manifest.get("status") != "parsing":
+            st.warning(f"⏸️ `{context}` was not finished when the parse stopped; analyze the bundle again to resume.")
+        else:
+            st.info(f"⏳ `{context}` is still being parsed; it will show up here when ready.")
+        st.stop()
+
+    tasks = lazy_parse_tasks()
+    key = (os.path.abspath(bundle_path), context)
+    task = tasks.get(key)
+    if task is None:
+        task = tasks[key] = {"progress": {}, "error": None, "done": False, "started": time.time()}
+
+        def run():
+            try:
+                parse_lazy_context(bundle_path, context, progress_callback=task["progress"].update)
+            except Exception as e:
+                task["error"] = str(e)
+            finally:
+                task["done"] = True
+
+        threading.Thread(target=run, daemon=True).start()
+
+    if task["error"]:
+        st.error(f"❌ Failed to parse {context}: {task['error']}")
+        if st.button("Retry", key=f"retry_{context}"):
+            tasks.pop(key, None)
+            st.rerun()
+        st.stop()
+    if not task["done"]:
+        progress = task["progress"]
+        stage = progress.get("stage", "starting")
+        st.info(f"⏳ Parsing `{context}` on first view ({stage}, {time.time() - task['started']:.0f}s)…")
+        if progress.get("bytes_total"):
+            st.progress(min(1.0, progress.get("bytes_done", 0) / progress["bytes_total"]))
+        time.sleep(1)
+        st.rerun()
+    tasks.pop(key, None)
+
+
+@st.cache_resource(max_entries=8)
+def cached_entity_index(path, mtime):
+    return EntityIndex.load(path)
+
+
+def load_entity_index(path):
+    index_path = os.path.join(path, ENTITY_INDEX_FILE) if path else None
+    if not index_path or not os.path.exists(index_path):
+        return None
+    # Keyed on mtime so a re-parsed or incrementally updated context reloads its index.
+    return cached_entity_index(path, os.path.getmtime(index_path))
+
+
+@st.cache_resource(max_entries=8)
+def cached_chunk_index(path, mtime):
+    timeline = find_timeline(path)
+    return ChunkIndex.load(path, timeline) if timeline else None
+
+
+def load_chunk_index(path):
+    index_path = os.path.join(path, CHUNK_INDEX_FILE) if path else None
+    if not index_path or not os.path.exists(index_path):
+        return None
+    return cached_chunk_index(path, os.path.getmtime(index_path))
+
+
+def render_raw_context(path, file_id, offset, lines=RAW_CONTEXT_LINES):
+    """The raw source lines around one entry, read at its recorded offset."""
+    context = raw_context(path, int(file_id), int(offset), lines)
+    if context is None:
+        st.info("The raw source of this entry was not kept.")
+        return
+    st.caption(f"📜 {context['name']} @ {int(offset)}")
+    st.code("\n".join(("▶ " if index == context["row"] else "  ") + line
+                      for index, (_, line) in enumerate(context["lines"])), language=None)
+
+def select_time_range(path):
+    """The Time Range of a partitioned timeline, picked before it is loaded so only the partitions
+    overlapping it are read; the latest partition by default. None for a single-file timeline."""
+    index = load_partitions(path)
+    if index is None:
+        return None
+    first, last = index.span()
+    if first is None or first == last:
+        return None
+    first, last = datetime.fromisoformat(first), datetime.fromisoformat(last)
+    latest = datetime.fromisoformat([partition for partition in index.partitions if partition["first"]][-1]["first"])
+    return st.slider("Time Range", min_value=first, max_value=last, value=(latest, last),
+                     step=timedelta(hours=1), format="YYYY-MM-DD HH:mm", key=f"time_range_{path}")
+
+
+@st.cache_resource(max_entries=LOG_CACHE_ENTRIES)
+def cached_context_logs(path, bounds, stamp):
+    # Shared read-only by every session of the viewer service; stamp changes when the context is rewritten.
+    df = load_parsed_logs(path, TimeWindow(*bounds) if bounds else None)
+    if "timestamp" in df.columns:
+        df["timestamp_dt"] = pd.to_datetime(df["timestamp"], errors='coerce')
+    return df
+
+def load_context_logs(path):
+    """Load a context's timeline for render_bundle_view: ``(df, time_range)``."""
+    time_range = select_time_range(path)
+    if time_range is None:
+        return cached_context_logs(path, None, timeline_stamp(path)), None
+    df = cached_context_logs(path, (to_epoch_us(time_range[0]), to_epoch_us(time_range[1])), timeline_stamp(path))
+    index = load_partitions(path)
+    st.caption(f"🗂️ Loaded {len(df.attrs.get('parts', []))} of {len(index.partitions)} "
+               f"{'daily' if index.granularity == 'day' else 'hourly'} partitions")
+    return df, time_range
+
+
+def render_bundle_view(df, bundle_key, path=None, time_range=None):
+    col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
     with col1:
         proc_filter = st.selectbox("Filter by Process", ["All"] + sorted(df['process'].dropna().unique().tolist()), key=f"proc_filter_{bundle_key}")
     with col2:
         keyword = st.text_input("Keyword Search", key=f"keyword_{bundle_key}")
+        whole_words = st.checkbox("Whole words", key=f"whole_words_{bundle_key}",
+                                  help="Match whole words only; lets rare-word searches skip most of the timeline")
     with col3:
+        entity = st.text_input("Entity", key=f"entity_{bundle_key}",
+                               help="Port (1/1/12), MAC, IP, VLAN (vlan 10) or LAG (lag1); "
+                                    "several entities must all appear in a row")
+    with col4:
         include_fastlogs = st.checkbox("Include Fastlogs", value=True, key=f"include_fastlogs_{bundle_key}")
+        group_templates = st.checkbox("Group by template", key=f"group_templates_{bundle_key}",
+                                      disabled="template_id" not in df.columns)
 
-    if "timestamp" in df.columns:
+    if "timestamp" in df.columns and "timestamp_dt" not in df.columns:
         df["timestamp_dt"] = pd.to_datetime(df["timestamp"], errors='coerce')
+    if "timestamp" in df.columns and time_range is not None:
+        # Picked by select_time_range before loading.
+        start_date, end_date = time_range
+    elif "timestamp" in df.columns:
         min_date = df["timestamp_dt"].min().to_pydatetime()
         max_date = df["timestamp_dt"].max().to_pydatetime()
         start_date, end_date = st.slider("Time Range", min_value=min_date, max_value=max_date,
@@ -78,7 +230,38 @@ def render_bundle_view(df, bundle_key):
     else:
         start_date, end_date = None, None
 
-    filtered_df = apply_filters(df, proc_filter, keyword, include_fastlogs, start_date, end_date)
+    parts = df.attrs.get("parts", [])
+    entity_rows = None
+    if entity.strip():
+        indexes = [(part["offset"], load_entity_index(part["path"])) for part in parts]
+        entity_rows = find_entity_rows(df, indexes, entity)
+        loaded = [index for _, index in indexes if index is not None]
+        if loaded:
+            kinds = sorted({kind for index in loaded for kind in index.entities})
+            st.caption("🔎 " + ", ".join(f"{len(set().union(*(index.entities.get(kind, ()) for index in loaded)))} "
+                                          f"{ENTITY_KINDS.get(kind, kind)}" for kind in kinds) + " indexed")
+
+    keyword_rows = None
+    if keyword:
+        found = find_keyword_rows(df, [(part["offset"], load_chunk_index(part["path"])) for part in parts],
+                                  keyword, whole_words)
+        if found is not None:
+            keyword_rows, read, total = found
+            st.caption(f"🔎 Scanning {read} of {total} timeline chunks")
+
+    filtered_df = apply_filters(df, proc_filter, keyword, include_fastlogs, start_date, end_date, entity_rows,
+                                keyword_rows, whole_words)
+
+    if group_templates and "template_id" in filtered_df.columns:
+        st.subheader("🧩 Message Templates")
+        groups = template_groups(filtered_df, "timestamp_dt" if "timestamp_dt" in filtered_df.columns else "timestamp")
+        st.dataframe(groups, hide_index=True)
+        labels = {int(row.template_id): f"#{row.template_id} ({row.count}) {row.template}"
+                  for row in groups.itertuples()}
+        chosen = st.selectbox("Show rows of template", ["All"] + list(labels), format_func=lambda tid: labels.get(tid, tid),
+                              key=f"template_pick_{bundle_key}")
+        if chosen != "All":
+            filtered_df = filtered_df[filtered_df["template_id"] == chosen]
 
     st.subheader("📈 Errors per Hour")
     if "severity" in filtered_df.columns:
@@ -106,7 +289,7 @@ def render_bundle_view(df, bundle_key):
         page_df["timestamp"] = page_df["timestamp"].apply(format_timestamp)
 
         # Display each row as a colored row with inline expandable message
-        for _, row in page_df.iterrows():
+        for index, row in page_df.iterrows():
             sev = row.get("severity", "")
             if sev == 'LOG_ERR':
                 bg = "#f8d7da"
@@ -123,6 +306,9 @@ def render_bundle_view(df, bundle_key):
                 cols[1].markdown(f"<div style='background-color:{bg};padding:5px'>{row['process']}</div>", unsafe_allow_html=True)
                 with cols[2].expander(label=row["message"][:100], expanded=False):
                     st.json(row.to_dict())
+                    if path and pd.notna(row.get("file_id")) and pd.notna(row.get("offset")):
+                        if st.button(f"Show ±{RAW_CONTEXT_LINES} raw lines", key=f"raw_{bundle_key}_{index}"):
+                            render_raw_context(path, row["file_id"], row["offset"])
     else:
         st.warning("No logs to display.")
 
@@ -146,6 +332,9 @@ def render_bundle_view(df, bundle_key):
     )
 
 def render_fastlogs(path, key_prefix="default"):
+    if artifact_pending(path, "timeline"):
+        st.info("⏳ Fastlogs are still being decoded.")
+        return
     fastlog_dir = os.path.join(path, "fastlogs")
     if not os.path.exists(fastlog_dir):
         st.info("No fastlog directory found.")
@@ -160,6 +349,9 @@ def render_fastlogs(path, key_prefix="default"):
     st.text_area("Fastlog Output", content, height=500, key=f"fastlog_output_{key_prefix}")
 
 def render_diag(path, key_prefix="default"):
+    if artifact_pending(path, "diag"):
+        st.info("⏳ Diag dumps are not ready yet.")
+        return
     diag_dir = os.path.join(path, "feature")
     if not os.path.exists(diag_dir):
         st.info("No diag directory found.")
@@ -174,6 +366,9 @@ def render_diag(path, key_prefix="default"):
     st.text_area("Diag Dump Output", content, height=500, key=f"diag_output_{key_prefix}")
 
 def render_showtech(path, key_prefix="default"):
+    if artifact_pending(path, "showtech"):
+        st.info("⏳ ShowTech is not split yet.")
+        return
     showtech_dir = os.path.join(path, "showtech")
     if not os.path.exists(showtech_dir):
         st.info("No showtech directory found.")
@@ -189,17 +384,19 @@ def render_showtech(path, key_prefix="default"):
 
 def get_vsf_members(bundle_output_dir):
     members_dir = os.path.join(bundle_output_dir, "members")
-    if not os.path.exists(members_dir):
-        return []
-    return [name for name in os.listdir(members_dir)
-            if os.path.isdir(os.path.join(members_dir, name)) and name.startswith("mem_")]
+    members = set(get_deferred(bundle_output_dir, "members"))
+    if os.path.exists(members_dir):
+        members.update(name for name in os.listdir(members_dir)
+                       if os.path.isdir(os.path.join(members_dir, name)) and name.startswith("mem_"))
+    return sorted(members)
 
 def get_linecards(bundle_output_dir):
     linecards_dir = os.path.join(bundle_output_dir, "linecards")
-    if not os.path.exists(linecards_dir):
-        return []
-    return [name for name in os.listdir(linecards_dir)
-            if os.path.isdir(os.path.join(linecards_dir, name)) and name.startswith("lc")]
+    linecards = set(get_deferred(bundle_output_dir, "linecards"))
+    if os.path.exists(linecards_dir):
+        linecards.update(name for name in os.listdir(linecards_dir)
+                         if os.path.isdir(os.path.join(linecards_dir, name)) and name.startswith("lc"))
+    return sorted(linecards)
 
 def render_isp_modal(path, key_prefix="default"):
     isp_file = os.path.join(path, "isp.txt")
@@ -210,158 +407,222 @@ def render_isp_modal(path, key_prefix="default"):
 
     with st.expander("🌐 ISP Summary (from isp.txt)", expanded=False):
         st.text_area("Parsed ISP Data", isp_data, height=300, key=f"isp_data_{key_prefix}")
-        
-# --- Main Rendering Logic ---
-if MODE == "single":
-    bundle_list = config.get("bundle_list")
-    if not bundle_list:
-        # Legacy single bundle path
-        single_path = config.get("bundle_path")
-        if not single_path or not os.path.exists(single_path):
-            st.error("Missing both bundle_list and valid bundle_path in config.json")
-            st.stop()
-        selected_bundle = {"name": os.path.basename(single_path), "path": single_path}
-    else:
-        bundle_names = [b["name"] for b in bundle_list]
-        selected_bundle_name = st.sidebar.selectbox("📦 Select Support Bundle", bundle_names)
-        selected_bundle = next((b for b in bundle_list if b["name"] == selected_bundle_name), None)
-        if not selected_bundle:
-            st.error("Selected bundle not found.")
-            st.stop()
-
-    bundle_path = selected_bundle["path"]
-    members = get_vsf_members(bundle_path)
-
-    st.sidebar.markdown("### 🧩 VSF Members")
-    if members:
-        vsf_member = st.sidebar.selectbox("Member:", ["Main Bundle"] + members)
-        if vsf_member == "Main Bundle":
-            target_path = bundle_path
-        else:
-            target_path = os.path.join(bundle_path, "members", vsf_member)
-    else:
-        st.sidebar.write("No VSF members detected.")
-        vsf_member = "Main Bundle"
-        target_path = bundle_path
-    
-    linecards = get_linecards(bundle_path)
-    if linecards:
-        st.sidebar.markdown("### 📟 Linecards")
-        linecard = st.sidebar.selectbox("Linecard:", ["None"] + linecards, key=f"lc_select_{selected_bundle['name']}")
-        if linecard != "None":
-            target_path = os.path.join(bundle_path, "linecards", linecard)
-            show_showtech = False 
-            
-    boot_options = get_boot_contexts(target_path)
-    st.sidebar.markdown(f"### 🔄 Select Boot Context ({vsf_member})")
-    boot_context = st.sidebar.selectbox("Boot:", boot_options, key=f"bootctx_{selected_bundle['name']}_{vsf_member}")
-
-    if boot_context == "Current Boot":
-        path = target_path
-    else:
-        path = os.path.join(target_path, "previous", boot_context)
 
-    if "linecard" not in locals() or linecard == "None":
-        show_showtech = vsf_member == "Main Bundle"
-    
-    st.markdown(f"### 📦 Bundle: `{selected_bundle['name']}` - 🔄 Boot: `{boot_context}` - 🧩 Member: `{vsf_member}`")
+def split_list(text):
+    return [item.strip() for item in text.split(",") if item.strip()]
 
-    df = load_parsed_logs(path)
-    if df.empty:
-        st.warning("No logs found in parsed bundle.")
-    else:
-        if show_showtech:
-            tab1, tab2, tab3, tab4 = st.tabs(["Logs", "Fastlogs", "Diag Dumps", "ShowTech"])
-            with tab1:
-                render_bundle_view(df, bundle_key="single")
-                render_isp_modal(path, key_prefix="single")
-            with tab2:
-                render_fastlogs(path, key_prefix="single")
-            with tab3:
-                render_diag(path, key_prefix="single")
-            with tab4:
-                render_showtech(path, key_prefix="single")
-        else:
-            tab1, tab2, tab3 = st.tabs(["Logs", "Fastlogs", "Diag Dumps"])
-            with tab1:
-                render_bundle_view(df, bundle_key=vsf_member)
-            with tab2:
-                render_fastlogs(path, key_prefix=vsf_member)
-            with tab3:
-                render_diag(path, key_prefix=vsf_member)
-
-elif MODE == "carousel":
-    bundles = config.get("bundle_list", [])
+def render_fleet_search():
+    """One query over every parsed bundle in the state DB; rows stream in, earliest first, as contexts finish."""
+    st.subheader("🔎 Fleet Search")
+    bundles = {bundle["name"]: bundle["path"] for bundle in viewer_bundles()}
     if not bundles:
-        st.error("No bundle_list found in config.json")
-        st.stop()
-
-    bundle_names = [b["name"] for b in bundles]
-    selected_bundle_name = st.sidebar.selectbox("📦 Select Support Bundle", bundle_names)
+        st.info("No parsed bundles found; analyze some first.")
+        return
 
-    selected_bundle = next((b for b in bundles if b["name"] == selected_bundle_name), None)
-    if not selected_bundle:
-        st.error("Selected bundle not found.")
-        st.stop()
+    with st.form("fleet_search"):
+        chosen = st.multiselect("Bundles", sorted(bundles), help="Leave empty to search all of them")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            keyword = st.text_input("Keyword", help="Whole words, case-insensitive")
+            regex = st.text_input("Regex")
+            entity = st.text_input("Entity", help="Port (1/1/12), MAC, IP, VLAN (vlan 10) or LAG (lag1)")
+        with col2:
+            severities = st.multiselect("Severity", SEVERITIES)
+            processes = st.text_input("Processes", help="Comma-separated")
+            event_ids = st.text_input("Event IDs", help="Comma-separated")
+        with col3:
+            since = st.text_input("Since", placeholder="2024-05-16T12:00")
+            until = st.text_input("Until", placeholder="2024-05-16T13:00")
+            limit = st.number_input("Max rows", min_value=1, value=DEFAULT_LIMIT)
+        submitted = st.form_submit_button("Search")
+    if not submitted:
+        return
 
-    bundle_path = selected_bundle["path"]
-    members = get_vsf_members(bundle_path)
+    try:
+        query = SearchQuery(since=since, until=until, severities=severities, processes=split_list(processes),
+                            event_ids=split_list(event_ids), keyword=keyword, regex=regex, entity=entity)
+    except ValueError as e:
+        st.error(f"❌ Invalid query: {e}")
+        return
 
-    st.sidebar.markdown("### 🧩 VSF Members")
-    if members:
-        vsf_member = st.sidebar.selectbox("Member:", ["Main Bundle"] + members)
-        if vsf_member == "Main Bundle":
-            target_path = bundle_path
-        else:
-            target_path = os.path.join(bundle_path, "members", vsf_member)
-    else:
-        st.sidebar.write("No VSF members detected.")
-        vsf_member = "Main Bundle"
-        target_path = bundle_path
+    status = st.empty()
+    table = st.empty()
+    rows = []
+
+    def progress(stats):
+        status.caption(f"🔎 {stats['searched']} context(s) searched, {stats['skipped']} of {stats['contexts']} "
+                       f"skipped by their rollups" + (f", {stats['failed']} failed" if stats["failed"] else "")
+                       + (f" · {stats['chunks_read']} of {stats['chunks']} chunks read" if stats["chunks"] else "")
+                       + f" · {len(rows)} row(s)")
+
+    def redraw():
+        table.dataframe(pd.DataFrame(rows).reindex(columns=SEARCH_COLUMNS), hide_index=True)
+
+    selected = [(name, bundles[name]) for name in (chosen or sorted(bundles))]
+    for row in search_bundles(selected, query, limit=int(limit), progress=progress):
+        rows.append(row)
+        if len(rows) % SEARCH_REDRAW_ROWS == 0:
+            redraw()
+    redraw()
+    if not rows:
+        st.info("No matching rows.")
+    elif len(rows) >= limit:
+        st.caption(f"Stopped at the {int(limit)} earliest rows; narrow the query or raise Max rows for later ones.")
+
+def timeline_stamp(path):
+    partitions = os.path.join(path, PARTITIONS_FILE)
+    timeline = partitions if os.path.exists(partitions) else find_timeline(path)
+    return os.path.getmtime(timeline) if timeline else None
+
+@st.cache_resource(max_entries=4)
+def cached_merged_timeline(output_dir, contexts, stamps):
+    # Kept across reruns so paging forward continues the same merge; stamps change when a context is rewritten.
+    return MergedTimeline.for_bundle(output_dir, set(contexts))
+
+def select_bundle(bundles):
+    """The bundle picked in the sidebar; the URL's ?bundle= picks it on arrival and follows the choice."""
+    names = [b["name"] for b in bundles]
+    wanted = find_bundle(bundles, st.query_params.get("bundle"))
+    name = st.sidebar.selectbox("📦 Select Support Bundle", names,
+                                index=names.index(wanted["name"]) if wanted else 0, key="bundle")
+    st.query_params["bundle"] = name
+    return next(b for b in bundles if b["name"] == name)
+
+def render_merged_timeline(bundle):
+    """Every parsed context of a bundle as one timestamp-ordered stream, a page at a time."""
+    st.subheader("🔗 Merged Timeline")
+    output_dir = bundle["path"]
+    available = context_dirs(output_dir)
+    pending = sum(len(get_deferred(output_dir, parent)) for parent in ("members", "linecards", "previous"))
+    if pending:
+        st.caption(f"⏳ {pending} context(s) not parsed yet are left out; open them on the Bundle page to parse them.")
+    chosen = st.multiselect("Contexts", [context for context, _ in available],
+                            default=[context for context, _ in available], format_func=lambda c: c or "main",
+                            key=f"merged_contexts_{output_dir}")
+    if not chosen:
+        st.info("Pick at least one context.")
+        return
+    paths = dict(available)
+    timeline = cached_merged_timeline(output_dir, tuple(chosen), tuple(timeline_stamp(paths[c]) for c in chosen))
+    first, last = timeline.span()
+    if first is None:
+        st.warning("No logs found in parsed bundle.")
+        return
 
-    linecards = get_linecards(bundle_path)
-    if linecards:
-        st.sidebar.markdown("### 📟 Linecards")
-        linecard = st.sidebar.selectbox("Linecard:", ["None"] + linecards, key=f"lc_select_{selected_bundle['name']}")
-        if linecard != "None":
-            target_path = os.path.join(bundle_path, "linecards", linecard)
-            show_showtech = False 
+    col1, col2 = st.columns([4, 1])
+    with col2:
+        size = st.selectbox("Rows per page", MERGED_PAGE_ROWS, index=1, key="merged_page_rows")
+    with col1:
+        first, last = datetime.fromisoformat(first), datetime.fromisoformat(last)
+        jump = st.slider("Jump to", min_value=first, max_value=last, value=first, step=timedelta(minutes=1),
+                         format="YYYY-MM-DD HH:mm", key=f"merged_jump_{output_dir}") if first < last else first
+    key = f"merged_pages_{output_dir}_{'|'.join(chosen)}"
+    state = st.session_state.setdefault(key, {"jump": None, "cursors": []})
+    if state["jump"] != jump or not state["cursors"]:
+        state["jump"] = jump
+        state["cursors"] = [timeline.seek(to_epoch_us(jump))]
+
+    started = time.perf_counter()
+    rows, following = timeline.page(state["cursors"][-1], size)
+    elapsed = time.perf_counter() - started
+    state["following"] = following
+
+    def previous_page():
+        if len(state["cursors"]) > 1:
+            state["cursors"].pop()
+
+    def next_page():
+        state["cursors"].append(state["following"])
+
+    position = sum(state["cursors"][-1])
+    col1, col2, col3 = st.columns([1, 1, 6])
+    col1.button("⬅️ Previous", on_click=previous_page, disabled=len(state["cursors"]) < 2, key="merged_previous")
+    col2.button("Next ➡️", on_click=next_page, disabled=not rows or sum(following) >= timeline.rows,
+                key="merged_next")
+    col3.caption(f"Rows {position + 1 if rows else position}–{position + len(rows)} of {timeline.rows} "
+                 f"from {len(chosen)} context(s) · page read in {elapsed * 1000:.0f} ms")
+    st.dataframe(pd.DataFrame(rows).reindex(columns=MERGED_COLUMNS), hide_index=True)
 
-    boot_options = get_boot_contexts(target_path)
-    st.sidebar.markdown(f"### 🔄 Select Boot Context ({vsf_member})")
-    boot_context = st.sidebar.selectbox("Boot:", boot_options, key=f"bootctx_{selected_bundle['name']}_{vsf_member}")
+# --- Main Rendering Logic ---
+# One viewer service serves every bundle in the state DB; it is read on every run, so bundles parsed
+# since the service started show up on the next page load.
+page_labels = list(PAGES.values())
+page = st.sidebar.radio("Page", page_labels, horizontal=True,
+                        index=page_labels.index(PAGES.get(st.query_params.get("page"), PAGES["bundle"])))
+st.query_params["page"] = next(key for key, label in PAGES.items() if label == page)
+if page == PAGES["search"]:
+    render_fleet_search()
+    st.stop()
 
-    if boot_context == "Current Boot":
-        path = target_path
-    else:
-        path = os.path.join(target_path, "previous", boot_context)
+bundles = viewer_bundles()
+if not bundles:
+    st.info("No parsed bundles yet; analyze one (LogViewer analyze --path <bundle>) and reload this page.")
+    st.stop()
+selected_bundle = select_bundle(bundles)
+if page == PAGES["merged"]:
+    render_merged_timeline(selected_bundle)
+    st.stop()
 
-    if "linecard" not in locals() or linecard == "None":
-        show_showtech = vsf_member == "Main Bundle"
-    st.markdown(f"### 📦 Bundle: `{selected_bundle['name']}` - 🔄 Boot: `{boot_context}` - 🧩 Member: `{vsf_member}`")
+bundle_path = selected_bundle["path"]
+members = get_vsf_members(bundle_path)
 
-    df = load_parsed_logs(path)
-    if df.empty:
-        st.warning("No logs found in parsed bundle.")
+st.sidebar.markdown("### 🧩 VSF Members")
+if members:
+    vsf_member = st.sidebar.selectbox("Member:", ["Main Bundle"] + members)
+    if vsf_member == "Main Bundle":
+        target_path = bundle_path
     else:
-        if show_showtech:
-            tab1, tab2, tab3, tab4 = st.tabs(["Logs", "Fastlogs", "Diag Dumps", "ShowTech"])
-            with tab1:
-                render_bundle_view(df, bundle_key=selected_bundle["name"])
-                render_isp_modal(path, key_prefix=selected_bundle["name"])
-            with tab2:
-                render_fastlogs(path, key_prefix=selected_bundle["name"])
-            with tab3:
-                render_diag(path, key_prefix=selected_bundle["name"])
-            with tab4:
-                render_showtech(path, key_prefix=selected_bundle["name"])
-        else:
-            tab1, tab2, tab3 = st.tabs(["Logs", "Fastlogs", "Diag Dumps"])
-            with tab1:
-                render_bundle_view(df, bundle_key=vsf_member)
-            with tab2:
-                render_fastlogs(path, key_prefix=vsf_member)
-            with tab3:
-                render_diag(path, key_prefix=vsf_member)
+        target_path = os.path.join(bundle_path, "members", vsf_member)
+else:
+    st.sidebar.write("No VSF members detected.")
+    vsf_member = "Main Bundle"
+    target_path = bundle_path
+
+linecards = get_linecards(bundle_path)
+if linecards:
+    st.sidebar.markdown("### 📟 Linecards")
+    linecard = st.sidebar.selectbox("Linecard:", ["None"] + linecards, key=f"lc_select_{selected_bundle['name']}")
+    if linecard != "None":
+        target_path = os.path.join(bundle_path, "linecards", linecard)
+        show_showtech = False 
+
+boot_options = get_boot_contexts(target_path)
+st.sidebar.markdown(f"### 🔄 Select Boot Context ({vsf_member})")
+boot_context = st.sidebar.selectbox("Boot:", boot_options, key=f"bootctx_{selected_bundle['name']}_{vsf_member}")
+
+if boot_context == "Current Boot":
+    path = target_path
 else:
-    st.error("Invalid mode in config.json")
+    path = os.path.join(target_path, "previous", boot_context)
+
+if "linecard" not in locals() or linecard == "None":
+    show_showtech = vsf_member == "Main Bundle"
+st.markdown(f"### 📦 Bundle: `{selected_bundle['name']}` - 🔄 Boot: `{boot_context}` - 🧩 Member: `{vsf_member}`")
+
+watch_parse_progress(bundle_path, parse_snapshot(load_manifest(bundle_path)))
+ensure_context_parsed(bundle_path, path)
+df, time_range = load_context_logs(path)
+if df.empty and artifact_pending(path, "event_logs"):
+    st.info("⏳ Event logs are still being parsed; this page refreshes when they are ready.")
+elif df.empty:
+    st.warning("No logs found in parsed bundle.")
+else:
+    if show_showtech:
+        tab1, tab2, tab3, tab4 = st.tabs(["Logs", "Fastlogs", "Diag Dumps", "ShowTech"])
+        with tab1:
+            render_bundle_view(df, bundle_key=selected_bundle["name"], path=path, time_range=time_range)
+            render_isp_modal(path, key_prefix=selected_bundle["name"])
+        with tab2:
+            render_fastlogs(path, key_prefix=selected_bundle["name"])
+        with tab3:
+            render_diag(path, key_prefix=selected_bundle["name"])
+        with tab4:
+            render_showtech(path, key_prefix=selected_bundle["name"])
+    else:
+        tab1, tab2, tab3 = st.tabs(["Logs", "Fastlogs", "Diag Dumps"])
+        with tab1:
+            render_bundle_view(df, bundle_key=vsf_member, path=path, time_range=time_range)
+        with tab2:
+            render_fastlogs(path, key_prefix=vsf_member)
+        with tab3:
+            render_diag(path, key_prefix=vsf_member)
@@ -0,0 +1 @@
+# Synthetic bundle generator and end-to-end benchmarks (not part of the installed package).
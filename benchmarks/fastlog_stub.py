@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+# fastlog_stub.py
+#
+# Stand-in for the fastlogParser binary used by the benchmarks. Synthetic
+# .supportlog files already contain rendered fastlog text, so "decoding" is
+# just echoing the file. Point the parser at it with:
+#
+#   LOGVIEWER_FASTLOG_PARSER=benchmarks/fastlog_stub.py
+
+import shutil
+import sys
+
+
+def main():
+    args = [a for a in sys.argv[1:] if a != "-v"]
+    if not args:
+        print("usage: fastlog_stub.py -v FILE", file=sys.stderr)
+        return 2
+    with open(args[0], "rb") as f:
+        shutil.copyfileobj(f, sys.stdout.buffer)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,384 @@
+# generate.py
+#
+# Synthetic Aruba CX support-bundle generator for benchmarks.
+#
+#   python -m benchmarks.generate --out synthetic.tar.gz --events 200000 --members 2 --linecards 4
+#
+# The layout mirrors what logviewer.parser looks for: event logs (current and
+# rotated .gz), journal directories, *.supportlog fastlogs, showtech.txt,
+# isp.txt, feature/*/diagdump.txt, prev_boot_logs/bootN, nested
+# mem_N_support_files.tar.gz (with flat bootN folders) and lcN.tar.gz
+# (wrapping LC_N_support_files.tar.gz).
+#
+# .supportlog files are not real binary fastlogs: they hold pre-rendered
+# fastlogParser text that benchmarks/fastlog_stub.py echoes back, so the
+# benchmark can run without the real decoder.
+
+import argparse
+import gzip
+import hashlib
+import io
+import os
+import random
+import shutil
+import struct
+import tarfile
+import tempfile
+import uuid
+from datetime import datetime, timedelta, timezone
+
+PROCESSES = [
+    "hpe-sysmond", "lldpd", "portd", "intfd", "vland", "mstpd", "lacpd", "ospfv2d",
+    "bgpd", "hpe-routing", "fand", "powerd", "tempd", "hpe-config", "arpmgrd", "ndmd",
+]
+SEVERITIES = ["LOG_INFO"] * 12 + ["LOG_WARN"] * 3 + ["LOG_ERR"]
+MODULES = ["AMM", "LLDP", "PORT", "INTF", "VLAN", "LAG", "ROUTING", "SYS"]
+
+
+def random_mac(rng):
+    return ":".join(f"{rng.randrange(256):02x}" for _ in range(6))
+
+
+def random_ip(rng):
+    return f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}"
+
+
+def random_port(rng, members=1):
+    return f"{rng.randrange(1, members + 1)}/{rng.randrange(1, 4)}/{rng.randrange(1, 49)}"
+
+
+MESSAGE_TEMPLATES = [
+    lambda r: f"Link status for interface {random_port(r)} is {'up' if r.random() < 0.5 else 'down'}",
+    lambda r: f"LLDP neighbor {random_mac(r)} added on port {random_port(r)}",
+    lambda r: f"LLDP neighbor {random_mac(r)} aged out on port {random_port(r)}",
+    lambda r: f"MAC address {random_mac(r)} learned on VLAN {r.randrange(1, 4094)} port {random_port(r)}",
+    lambda r: f"MAC address {random_mac(r)} moved from port {random_port(r)} to port {random_port(r)}",
+    lambda r: f"Interface {random_port(r)} added to lag{r.randrange(1, 64)}",
+    lambda r: f"ARP entry {random_ip(r)} resolved to {random_mac(r)} on vlan{r.randrange(1, 4094)}",
+    lambda r: f"OSPF neighbor {random_ip(r)} state changed from Loading to Full",
+    lambda r: f"BGP peer {random_ip(r)} session established",
+    lambda r: f"Fan {r.randrange(1, 7)} speed changed to {r.randrange(2000, 9000)} RPM",
+    lambda r: f"Temperature sensor {r.randrange(1, 9)} reading {r.randrange(30, 80)}C",
+    lambda r: f"Configuration changed by admin from {random_ip(r)}",
+    lambda r: f"STP port {random_port(r)} transitioned to forwarding on VLAN {r.randrange(1, 4094)}",
+    lambda r: f"Power supply {r.randrange(1, 3)} status OK",
+]
+
+
+def render_message(rng):
+    return rng.choice(MESSAGE_TEMPLATES)(rng)
+
+
+def event_line(rng, ts, hostname):
+    process = rng.choice(PROCESSES)
+    pid = rng.randrange(100, 5000)
+    roll = rng.random()
+    if roll < 0.85:
+        return (f"{ts.isoformat()} {hostname} {process}[{pid}]: Event|{rng.randrange(100, 9999)}|"
+                f"{rng.choice(SEVERITIES)}|{rng.choice(MODULES)}|1/1|{render_message(rng)}\n")
+    if roll < 0.97:
+        return (f"{ts.isoformat()} {hostname} {process}[{pid}]: LOG_LOCAL0|{rng.choice(SEVERITIES)}|"
+                f"{rng.choice(MODULES)}|1/1|{rng.choice(MODULES).lower()}|{process}|{render_message(rng)}\n")
+    # A few lines no pattern understands, as found in real bundles.
+    return f"{ts.isoformat()} kernel continuation of previous line {rng.randrange(1 << 30)}\n"
+
+
+def event_timestamps(rng, count, start, end):
+    span = (end - start).total_seconds()
+    offsets = sorted(rng.random() * span for _ in range(count))
+    return [start + timedelta(seconds=o) for o in offsets]
+
+
+def write_event_logs(log_dir, rng, count, start, end, hostname, rotated):
+    """Write ``count`` lines split across event.log and ``rotated`` older event.log.N.gz files."""
+    os.makedirs(log_dir, exist_ok=True)
+    stamps = event_timestamps(rng, count, start, end)
+    files = rotated + 1
+    per_file = max(1, count // files)
+    # Oldest lines go into the highest-numbered rotation.
+    for index in range(files):
+        chunk = stamps[index * per_file:(index + 1) * per_file if index < files - 1 else None]
+        lines = [event_line(rng, ts, hostname) for ts in chunk]
+        rotation = files - 1 - index
+        if rotation == 0:
+            with open(os.path.join(log_dir, "event.log"), "w") as f:
+                f.writelines(lines)
+        else:
+            with gzip.open(os.path.join(log_dir, f"event.log.{rotation}.gz"), "wt") as f:
+                f.writelines(lines)
+
+
+def fastlog_text(rng, process, count, start, end):
+    lines = []
+    for ts in event_timestamps(rng, count, start, end):
+        stamp = ts.strftime("%d %b %y %H:%M:%S.%f") + f"{rng.randrange(1000):03d}"
+        lines.append(f"({stamp}) [{process}] {render_message(rng)}\n")
+        if rng.random() < 0.2:
+            lines.append(f"    detail: heartbeat seq={rng.randrange(1 << 20)} state=ok\n")
+    return "".join(lines)
+
+
+def write_supportlogs(fastlog_dir, rng, count, records, start, end, compress_every=3):
+    os.makedirs(fastlog_dir, exist_ok=True)
+    for index in range(count):
+        process = PROCESSES[index % len(PROCESSES)]
+        text = fastlog_text(rng, process, records, start, end)
+        if compress_every and index % compress_every == compress_every - 1:
+            with gzip.open(os.path.join(fastlog_dir, f"{process}.{index}.supportlog.gz"), "wt") as f:
+                f.write(text)
+        else:
+            with open(os.path.join(fastlog_dir, f"{process}.{index}.supportlog"), "w") as f:
+                f.write(text)
+
+
+def write_showtech(path, rng, sections, lines_per_section=40):
+    commands = ["version", "system", "interface brief", "vlan", "lldp neighbor-info", "lacp aggregates",
+                "ip route", "running-config", "environment fan", "environment temperature", "vsf", "module"]
+    with open(path, "w") as f:
+        for index in range(sections):
+            f.write(f"{'=' * 60}\nCommand : show {commands[index % len(commands)]} {index}\n{'=' * 60}\n")
+            for _ in range(lines_per_section):
+                f.write(f"{random_port(rng):<12}{rng.choice(['up', 'down']):<8}{render_message(rng)}\n")
+
+
+def write_diagdumps(root, rng, count):
+    for index in range(count):
+        feature_dir = os.path.join(root, "feature", f"feature_{index}")
+        os.makedirs(feature_dir, exist_ok=True)
+        with open(os.path.join(feature_dir, "diagdump.txt"), "w") as f:
+            for _ in range(200):
+                f.write(render_message(rng) + "\n")
+
+
+# --- systemd journal files -------------------------------------------------
+#
+# Minimal writer for the journal binary format (uncompressed, non-compact,
+# one DATA object per field per entry, a single entry array). Good enough for
+# journalctl and logviewer.systemd_journal to read; hash tables are present but empty.
+
+OBJECT_DATA = 1
+OBJECT_ENTRY = 3
+OBJECT_DATA_HASH_TABLE = 4
+OBJECT_FIELD_HASH_TABLE = 5
+OBJECT_ENTRY_ARRAY = 6
+JOURNAL_HEADER_SIZE = 240
+HASH_TABLE_BUCKETS = 64
+
+
+def align8(n):
+    return (n + 7) & ~7
+
+
+def field_hash(payload):
+    return struct.unpack("<Q", hashlib.blake2b(payload, digest_size=8).digest())[0]
+
+
+def write_journal_file(path, entries):
+    """Write ``entries`` ([(realtime_usec, {FIELD: value})]) as a journal file."""
+    buf = io.BytesIO()
+    buf.write(b"\0" * JOURNAL_HEADER_SIZE)
+    n_objects = 0
+
+    def put_object(obj_type, body):
+        nonlocal n_objects
+        offset = align8(buf.tell())
+        buf.seek(offset)
+        buf.write(struct.pack("<BB6xQ", obj_type, 0, 16 + len(body)))
+        buf.write(body)
+        n_objects += 1
+        return offset
+
+    data_table = put_object(OBJECT_DATA_HASH_TABLE, b"\0" * 16 * HASH_TABLE_BUCKETS)
+    field_table = put_object(OBJECT_FIELD_HASH_TABLE, b"\0" * 16 * HASH_TABLE_BUCKETS)
+
+    boot_id = uuid.uuid4().bytes
+    entry_offsets = []
+    n_data = 0
+    first_realtime = last_realtime = last_monotonic = 0
+    for seqnum, (realtime, fields) in enumerate(entries, 1):
+        items = []
+        data_offsets = []
+        for key, value in fields.items():
+            payload = f"{key}={value}".encode()
+            h = field_hash(payload)
+            # hash, next_hash, next_field, entry_offset (patched below), entry_array, n_entries
+            offset = put_object(OBJECT_DATA, struct.pack("<QQQQQQ", h, 0, 0, 0, 0, 1) + payload)
+            n_data += 1
+            items.append((offset, h))
+            data_offsets.append(offset)
+        monotonic = seqnum * 1000
+        xor_hash = 0
+        for _, h in items:
+            xor_hash ^= h
+        body = struct.pack("<QQQ16sQ", seqnum, realtime, monotonic, boot_id, xor_hash)
+        body += b"".join(struct.pack("<QQ", offset, h) for offset, h in items)
+        entry_offset = put_object(OBJECT_ENTRY, body)
+        end = buf.tell()
+        for offset in data_offsets:
+            buf.seek(offset + 16 + 24)
+            buf.write(struct.pack("<Q", entry_offset))
+        buf.seek(end)
+        entry_offsets.append(entry_offset)
+        first_realtime = first_realtime or realtime
+        last_realtime, last_monotonic = realtime, monotonic
+
+    array_offset = put_object(OBJECT_ENTRY_ARRAY,
+                              struct.pack("<Q", 0) + b"".join(struct.pack("<Q", o) for o in entry_offsets))
+    file_size = align8(buf.tell())
+    buf.seek(file_size - 1)
+    buf.write(b"\0")
+
+    header = struct.pack(
+        "<8sII B7x 16s16s16s16s 19Q",
+        b"LPKSHHRH", 0, 0, 0,
+        uuid.uuid4().bytes, uuid.uuid4().bytes, boot_id, uuid.uuid4().bytes,
+        JOURNAL_HEADER_SIZE, file_size - JOURNAL_HEADER_SIZE,
+        data_table + 16, 16 * HASH_TABLE_BUCKETS,
+        field_table + 16, 16 * HASH_TABLE_BUCKETS,
+        array_offset, n_objects, len(entry_offsets),
+        len(entry_offsets), 1 if entry_offsets else 0,
+        array_offset,
+        first_realtime, last_realtime, last_monotonic,
+        n_data, 0, 0, 1,
+    )
+    buf.seek(0)
+    buf.write(header)
+    with open(path, "wb") as f:
+        f.write(buf.getvalue())
+
+
+def write_journal_dir(root, rng, count, start, end, hostname):
+    journal_dir = os.path.join(root, "journal", uuid.UUID(int=rng.getrandbits(128)).hex)
+    os.makedirs(journal_dir, exist_ok=True)
+    entries = []
+    for ts in event_timestamps(rng, count, start, end):
+        process = rng.choice(PROCESSES)
+        entries.append((int(ts.timestamp() * 1_000_000), {
+            "_HOSTNAME": hostname,
+            "SYSLOG_IDENTIFIER": process,
+            "_PID": str(rng.randrange(100, 5000)),
+            "PRIORITY": str(rng.choice([3, 4, 6, 6, 6, 7])),
+            "MESSAGE": render_message(rng),
+        }))
+    write_journal_file(os.path.join(journal_dir, "system.journal"), entries)
+
+
+# --- bundle assembly --------------------------------------------------------
+
+def populate_context(root, rng, cfg, start, end, hostname, supportlogs=True):
+    write_event_logs(os.path.join(root, "logs"), rng, cfg["events"], start, end, hostname, cfg["rotated"])
+    if cfg["journal_entries"]:
+        write_journal_dir(root, rng, cfg["journal_entries"], start, end, hostname)
+    if supportlogs and cfg["supportlogs"]:
+        write_supportlogs(os.path.join(root, "fastlog"), rng, cfg["supportlogs"], cfg["fastlog_records"], start, end)
+
+
+def add_boots(root, rng, cfg, start, hostname, flat=False):
+    boot_start = start
+    for boot in range(cfg["boots"], 0, -1):
+        boot_end = boot_start + timedelta(hours=2)
+        boot_dir = os.path.join(root, f"boot{boot}") if flat else os.path.join(root, "prev_boot_logs", f"boot{boot}")
+        small = dict(cfg, events=max(1, cfg["events"] // 10), rotated=0, journal_entries=0,
+                     supportlogs=min(2, cfg["supportlogs"]), fastlog_records=max(1, cfg["fastlog_records"] // 10))
+        populate_context(boot_dir, rng, small, boot_start, boot_end, hostname)
+        boot_start = boot_end
+
+
+def tar_directory(source_dir, tar_path):
+    with tarfile.open(tar_path, "w:gz") as tar:
+        for entry in sorted(os.listdir(source_dir)):
+            tar.add(os.path.join(source_dir, entry), arcname=entry)
+
+
+def build_member(work, rng, cfg, index, start, end, out_dir):
+    root = os.path.join(work, f"mem_{index}")
+    hostname = f"sw-mem{index}"
+    member_cfg = dict(cfg, events=max(1, cfg["events"] // 2))
+    populate_context(root, rng, member_cfg, start, end, hostname)
+    add_boots(root, rng, cfg, start - timedelta(days=1), hostname, flat=True)
+    with open(os.path.join(root, f"diagdump_mem{index}.txt"), "w") as f:
+        f.write("\n".join(render_message(rng) for _ in range(100)))
+    tar_directory(root, os.path.join(out_dir, f"mem_{index}_support_files.tar.gz"))
+    shutil.rmtree(root)
+
+
+def build_linecard(work, rng, cfg, index, start, end, out_dir):
+    root = os.path.join(work, f"lc{index}_inner")
+    hostname = f"sw-lc{index}"
+    lc_cfg = dict(cfg, events=max(1, cfg["events"] // 4), journal_entries=0)
+    populate_context(root, rng, lc_cfg, start, end, hostname)
+    if cfg["boots"]:
+        add_boots(root, rng, dict(cfg, boots=1), start - timedelta(days=1), hostname)
+    with open(os.path.join(root, f"diag_dump_lc{index}.txt"), "w") as f:
+        f.write("\n".join(render_message(rng) for _ in range(100)))
+    outer = os.path.join(work, f"lc{index}_outer")
+    os.makedirs(outer)
+    tar_directory(root, os.path.join(outer, f"LC_{index}_support_files.tar.gz"))
+    tar_directory(outer, os.path.join(out_dir, f"lc{index}.tar.gz"))
+    shutil.rmtree(root)
+    shutil.rmtree(outer)
+
+
+DEFAULTS = {
+    "events": 20000,
+    "rotated": 3,
+    "journal_entries": 2000,
+    "supportlogs": 6,
+    "fastlog_records": 2000,
+    "showtech_sections": 60,
+    "diagdumps": 4,
+    "members": 0,
+    "linecards": 0,
+    "boots": 1,
+    "span_hours": 24 * 7,
+    "seed": 1,
+}
+
+
+def generate_bundle(out_path, **overrides):
+    """Build a synthetic support bundle at ``out_path`` (.tar.gz) and return the config used."""
+    cfg = dict(DEFAULTS, **overrides)
+    rng = random.Random(cfg["seed"])
+    end = datetime(2024, 5, 20, 12, 0, tzinfo=timezone.utc)
+    start = end - timedelta(hours=cfg["span_hours"])
+
+    work = tempfile.mkdtemp(prefix="lv_synth_")
+    try:
+        root = os.path.join(work, "bundle")
+        os.makedirs(root)
+        populate_context(root, rng, cfg, start, end, "sw-core1")
+        write_showtech(os.path.join(root, "showtech.txt"), rng, cfg["showtech_sections"])
+        with open(os.path.join(root, "isp.txt"), "w") as f:
+            f.write("ISP summary\n" + "\n".join(render_message(rng) for _ in range(50)))
+        write_diagdumps(root, rng, cfg["diagdumps"])
+        add_boots(root, rng, cfg, start - timedelta(days=1), "sw-core1")
+
+        nested_dir = os.path.join(root, "nested")
+        os.makedirs(nested_dir)
+        for index in range(1, cfg["members"] + 1):
+            build_member(work, rng, cfg, index, start, end, nested_dir)
+        for index in range(1, cfg["linecards"] + 1):
+            build_linecard(work, rng, cfg, index, start, end, nested_dir)
+
+        out_dir = os.path.dirname(os.path.abspath(out_path))
+        os.makedirs(out_dir, exist_ok=True)
+        tar_directory(root, out_path)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    return cfg
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Aruba CX support bundle")
+    parser.add_argument("--out", required=True, help="Output .tar.gz path")
+    for key, value in DEFAULTS.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=int, default=value)
+    args = parser.parse_args()
+    overrides = {key: getattr(args, key) for key in DEFAULTS}
+    cfg = generate_bundle(args.out, **overrides)
+    size = os.path.getsize(args.out)
+    print(f"✅ Wrote {args.out} ({size / 1024 / 1024:.1f} MB) with {cfg}")
+
+
+if __name__ == "__main__":
+    main()
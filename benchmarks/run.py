@@ -0,0 +1,370 @@
+# run.py
+#
+# End-to-end benchmarks for the parse pipeline and the dashboard data paths.
+#
+#   python -m benchmarks.run                         # small + medium, all cases
+#   python -m benchmarks.run --scales large --cases parse_bundle
+#   python -m benchmarks.run --compare benchmarks/results/A.json benchmarks/results/B.json
+#
+# Each case runs in a fresh interpreter so peak RSS is per case. Synthetic
+# bundles are cached under --workdir keyed by their generator config, and
+# fastlogs are decoded by benchmarks/fastlog_stub.py unless --real-fastlog.
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+STUB = os.path.join(BENCH_DIR, "fastlog_stub.py")
+
+SCALES = {
+    "small": {"events": 20000, "rotated": 2, "journal_entries": 1000, "supportlogs": 4,
+              "fastlog_records": 1000, "members": 1, "linecards": 1, "boots": 1},
+    "medium": {"events": 200000, "rotated": 4, "journal_entries": 10000, "supportlogs": 8,
+               "fastlog_records": 10000, "members": 2, "linecards": 2, "boots": 2},
+    "large": {"events": 1000000, "rotated": 8, "journal_entries": 50000, "supportlogs": 16,
+              "fastlog_records": 40000, "members": 4, "linecards": 4, "boots": 2},
+}
+
+CASES = ["parse_bundle", "parse_bundle_spill", "parse_bundle_window", "parse_bundle_lazy",
+         "parse_multiple_bundles", "load_parsed_logs", "filters", "ingest_text", "ingest_bytes"]
+MULTI_BUNDLES = 3
+SPILL_BUDGET_MB = 32
+# One hour in the middle of the synthetic week (generate.py ends it at 2024-05-20 12:00 UTC).
+WINDOW = {"since": "2024-05-16T12:00:00+00:00", "until": "2024-05-16T13:00:00+00:00"}
+
+
+# --- cases (run inside the child interpreter) -------------------------------
+
+def peak_rss_bytes():
+    from logviewer.metrics import peak_rss_bytes as rss
+    return rss()
+
+
+def quiet_parser():
+    from logviewer import parser
+    parser._log_debug_callback = lambda message: None
+    return parser
+
+
+def case_parse_bundle(bundle, work, options=None, output_name="parse_bundle_out"):
+    parser = quiet_parser()
+    from logviewer.job import ParseJob
+    from logviewer.metrics import load_metrics, aggregate_metrics
+    output_dir = os.path.join(work, output_name)
+    shutil.rmtree(output_dir, ignore_errors=True)
+    start = time.perf_counter()
+    parser.parse_bundle(bundle, output_dir, options=options, job=ParseJob(bundle))
+    wall = time.perf_counter() - start
+    summary = aggregate_metrics(load_metrics(output_dir))
+    entries = sum(m.get("entries", {}).get(stage, 0)
+                  for m in load_metrics(output_dir) for stage in ("event_logs", "fastlogs"))
+    return {
+        "wall_s": wall,
+        "entries": entries,
+        "lines_per_s": entries / wall if wall else None,
+        "bytes_read": summary["bytes_read"],
+        "bytes_written": summary["bytes_written"],
+        "stages": {name: round(stage["wall_s"], 4) for name, stage in summary["stages"].items()},
+    }
+
+
+def case_parse_bundle_spill(bundle, work):
+    return case_parse_bundle(bundle, work, {"memory_budget_mb": SPILL_BUDGET_MB}, "parse_bundle_spill_out")
+
+
+def case_parse_bundle_window(bundle, work):
+    return case_parse_bundle(bundle, work, WINDOW, "parse_bundle_window_out")
+
+
+def case_parse_bundle_lazy(bundle, work):
+    return case_parse_bundle(bundle, work, {"lazy_contexts": True}, "parse_bundle_lazy_out")
+
+
+def case_parse_multiple_bundles(bundle, work):
+    parser = quiet_parser()
+    copies = []
+    for index in range(MULTI_BUNDLES):
+        copy = os.path.join(work, f"multi_{index}.tar.gz")
+        if not os.path.exists(copy):
+            try:
+                os.link(bundle, copy)
+            except OSError:
+                shutil.copy(bundle, copy)
+        shutil.rmtree(os.path.join(work, f"multi_{index}.tar_log_analysis_results"), ignore_errors=True)
+        copies.append(copy)
+    start = time.perf_counter()
+    results = parser.parse_multiple_bundles(copies, workers=MULTI_BUNDLES)
+    wall = time.perf_counter() - start
+    return {
+        "wall_s": wall,
+        "bundles": len(copies),
+        "failed": [r for r in results if r["status"] != "Success"],
+    }
+
+
+def parsed_output(bundle, work):
+    output_dir = os.path.join(work, "parse_bundle_out")
+    if not os.path.exists(output_dir):
+        case_parse_bundle(bundle, work)
+    return output_dir
+
+
+def case_load_parsed_logs(bundle, work):
+    output_dir = parsed_output(bundle, work)
+    from logviewer.dataview import load_parsed_logs
+    start = time.perf_counter()
+    df = load_parsed_logs(output_dir)
+    wall = time.perf_counter() - start
+    return {"wall_s": wall, "rows": len(df)}
+
+
+def case_filters(bundle, work):
+    output_dir = parsed_output(bundle, work)
+    import pandas as pd
+    from logviewer.dataview import load_parsed_logs, apply_filters, find_entity_rows
+    from logviewer.entities import EntityIndex
+    df = load_parsed_logs(output_dir)
+    # Same preparation render_bundle_view does before filtering.
+    df["timestamp_dt"] = pd.to_datetime(df["timestamp"], errors="coerce")
+    lo, hi = df["timestamp_dt"].min(), df["timestamp_dt"].max()
+    quarter = (hi - lo) / 4
+    process = df["process"].dropna().mode().iloc[0]
+    filters = {
+        "none": ("All", "", True, None, None),
+        "keyword": ("All", "lldp", True, None, None),
+        "process": (process, "", True, None, None),
+        "time_range": ("All", "", True, lo + quarter, hi - quarter),
+        "no_fastlogs": ("All", "", False, None, None),
+        "combined": (process, "link", False, lo + quarter, hi - quarter),
+    }
+    timings = {}
+    rows = {}
+    for name, args in filters.items():
+        start = time.perf_counter()
+        result = apply_filters(df, *args)
+        timings[name] = time.perf_counter() - start
+        rows[name] = len(result)
+    # The entity filter through the index, and the message scan it replaces.
+    indexes = [(part["offset"], EntityIndex.load(part["path"])) for part in df.attrs.get("parts", [])]
+    for name, index in (("entity_index", indexes), ("entity_scan", None)):
+        start = time.perf_counter()
+        result = apply_filters(df, "All", "", True, None, None, find_entity_rows(df, index, "1/1/1"))
+        timings[name] = time.perf_counter() - start
+        rows[name] = len(result)
+    return {"wall_s": sum(timings.values()), "rows": len(df), "filters": timings, "matched": rows}
+
+
+def extracted_bundle(bundle, work):
+    import tarfile
+    target = os.path.join(work, "extracted")
+    if not os.path.exists(target):
+        with tarfile.open(bundle, "r:gz") as tar:
+            tar.extractall(target)
+    return target
+
+
+def event_log_sources(bundle_dir):
+    parser = quiet_parser()
+    sources = []
+    for root, _, files in os.walk(bundle_dir):
+        for file in files:
+            full_path = os.path.join(root, file)
+            if file.endswith(".gz") and any(file.startswith(prefix) for prefix in parser.LOG_FILE_PREFIXES):
+                sources.append((file, full_path, True))
+            elif file.endswith(".log"):
+                sources.append((file, full_path, False))
+    return sources
+
+
+def ingest_result(entries, lines, wall, sources):
+    return {
+        "wall_s": wall,
+        "entries": entries,
+        "lines": lines,
+        "lines_per_s": lines / wall if wall else None,
+        "bytes": sum(os.path.getsize(path) for _, path, _ in sources),
+    }
+
+
+def case_ingest_text(bundle, work):
+    # Reference: the pre-byte-level path (decode every line, str regexes).
+    import gzip
+    parser = quiet_parser()
+    from logviewer.metrics import PatternStats
+    sources = event_log_sources(extracted_bundle(bundle, work))
+    stats = PatternStats(parser.EVENT_LOG_PATTERN_NAMES)
+    entries = 0
+    start = time.perf_counter()
+    for file, path, compressed in sources:
+        with (gzip.open(path, "rt", errors="ignore") if compressed else open(path, "r", errors="ignore")) as f:
+            lines = f if compressed else f.readlines()
+            for line in lines:
+                if parser.parse_line(line, stats):
+                    entries += 1
+    wall = time.perf_counter() - start
+    return ingest_result(entries, stats.scanned[0], wall, sources)
+
+
+def case_ingest_bytes(bundle, work):
+    parser = quiet_parser()
+    from logviewer.job import ParseJob
+    from logviewer.metrics import PatternStats
+    sources = event_log_sources(extracted_bundle(bundle, work))
+    stats = PatternStats(parser.EVENT_LOG_PATTERN_NAMES)
+
+    class Counter:
+        # Count entries without keeping them, so RSS reflects ingestion only.
+        entries = 0
+
+        def append(self, entry):
+            self.entries += 1
+
+    logs = Counter()
+    start = time.perf_counter()
+    for file, path, compressed in sources:
+        parser.parse_event_log_file(file, path, compressed, logs, stats, ParseJob(path))
+    wall = time.perf_counter() - start
+    return ingest_result(logs.entries, stats.scanned[0], wall, sources)
+
+
+def run_case_in_child(case, bundle, work):
+    os.makedirs(work, exist_ok=True)
+    os.chdir(work)
+    cpu_start = time.process_time()
+    result = globals()[f"case_{case}"](bundle, work)
+    result["cpu_s"] = time.process_time() - cpu_start
+    result["peak_rss_bytes"] = peak_rss_bytes()
+    print(json.dumps(result))
+
+
+# --- driver -----------------------------------------------------------------
+
+def bundle_for_scale(scale, workdir):
+    from benchmarks.generate import generate_bundle, DEFAULTS
+    cfg = dict(DEFAULTS, **SCALES[scale])
+    key = hashlib.sha1(json.dumps(cfg, sort_keys=True).encode()).hexdigest()[:10]
+    path = os.path.join(workdir, f"synthetic_{scale}_{key}.tar.gz")
+    if not os.path.exists(path):
+        print(f"🏗️ Generating {scale} bundle → {path}")
+        generate_bundle(path, **cfg)
+    return path, cfg
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_benchmarks(scales, cases, workdir, repeat=1, real_fastlog=False):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = REPO_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    if not real_fastlog:
+        env["LOGVIEWER_FASTLOG_PARSER"] = STUB
+
+    results = {
+        "meta": {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "commit": git_commit(),
+            "fastlog_parser": "real" if real_fastlog else "stub",
+        },
+        "scales": {},
+    }
+    for scale in scales:
+        bundle, cfg = bundle_for_scale(scale, workdir)
+        scale_results = {"config": cfg, "bundle_bytes": os.path.getsize(bundle), "cases": {}}
+        work = os.path.join(workdir, f"work_{scale}")
+        shutil.rmtree(work, ignore_errors=True)
+        for case in cases:
+            runs = []
+            for _ in range(repeat):
+                proc = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.run", "--child", case, "--bundle", bundle, "--work", work],
+                    env=env, cwd=REPO_ROOT, capture_output=True, text=True)
+                if proc.returncode != 0:
+                    print(f"❌ {scale}/{case} failed:\n{proc.stderr[-2000:]}")
+                    runs.append({"error": proc.stderr[-2000:]})
+                    break
+                runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+            best = min((r for r in runs if "wall_s" in r), key=lambda r: r["wall_s"], default=runs[-1])
+            best["runs"] = [r.get("wall_s") for r in runs]
+            scale_results["cases"][case] = best
+            if "wall_s" in best:
+                rss = (best.get("peak_rss_bytes") or 0) / 1024 / 1024
+                print(f"⏱️ {scale:<7} {case:<24} {best['wall_s']:9.3f}s  peak RSS {rss:8.1f} MB")
+        results["scales"][scale] = scale_results
+    return results
+
+
+def save_results(results, path=None):
+    if not path:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Saved results to {path}")
+    return path
+
+
+def compare_results(base_path, new_path):
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{'Scale':<8} {'Case':<24} {'Base (s)':>10} {'New (s)':>10} {'Speedup':>8} {'Base RSS':>10} {'New RSS':>10}")
+    for scale, scale_results in new["scales"].items():
+        base_cases = base.get("scales", {}).get(scale, {}).get("cases", {})
+        for case, result in scale_results["cases"].items():
+            old = base_cases.get(case, {})
+            if "wall_s" not in result or "wall_s" not in old:
+                continue
+            speedup = old["wall_s"] / result["wall_s"] if result["wall_s"] else float("inf")
+            old_rss = (old.get("peak_rss_bytes") or 0) / 1024 / 1024
+            new_rss = (result.get("peak_rss_bytes") or 0) / 1024 / 1024
+            print(f"{scale:<8} {case:<24} {old['wall_s']:>10.3f} {result['wall_s']:>10.3f} {speedup:>7.2f}x "
+                  f"{old_rss:>8.1f}MB {new_rss:>8.1f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LogViewer end-to-end benchmarks")
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=["small", "medium"])
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=CASES)
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per case; the fastest is kept")
+    parser.add_argument("--workdir", default=os.path.join(BENCH_DIR, ".work"),
+                        help="Where synthetic bundles and parse outputs are kept")
+    parser.add_argument("--out", help="Results JSON path (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--real-fastlog", action="store_true", help="Use the packaged fastlogParser instead of the stub")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="Compare two results files")
+    parser.add_argument("--child", choices=CASES, help=argparse.SUPPRESS)
+    parser.add_argument("--bundle", help=argparse.SUPPRESS)
+    parser.add_argument("--work", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_case_in_child(args.child, args.bundle, args.work)
+    elif args.compare:
+        compare_results(*args.compare)
+    else:
+        workdir = os.path.abspath(args.workdir)
+        os.makedirs(workdir, exist_ok=True)
+        results = run_benchmarks(args.scales, args.cases, workdir, args.repeat, args.real_fastlog)
+        save_results(results, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# chunks.py
+#
+# TimelineWriter writes a timeline in chunks of CHUNK_ROWS records, each
+# compressed on its own (a gzip member or a zstd frame), so any chunk can be
+# read without the ones before it. timeline_chunks.json, committed with the
+# timeline, gives each chunk's byte range, first record number, first/last
+# timestamp and a Bloom filter of the words of its messages, plus every
+# template version, so keyword, entity and time queries decompress and scan
+# only the chunks that can match.
+
+import json
+import os
+import re
+
+from logviewer.rollup import WORD_RE, BloomFilter, words
+
+CHUNK_INDEX_FILE = "timeline_chunks.json"
+CHUNK_INDEX_VERSION = 1
+CHUNK_ROWS = 4096
+
+REGEX_CHARS = frozenset(".^$*+?{}[]\\|()")
+
+
+def keyword_pattern(keyword):
+    """Case-insensitive pattern matching ``keyword`` as whole words."""
+    pattern = re.escape(keyword)
+    if re.match(r"\w", keyword):
+        pattern = r"\b" + pattern
+    if re.search(r"\w$", keyword):
+        pattern += r"\b"
+    return re.compile(pattern, re.IGNORECASE)
+
+
+def keyword_words(keyword, whole_words=True):
+    """Indexed words every message matching ``keyword`` contains.
+
+    A whole-word match contains all of the keyword's words. A substring match
+    only contains those the keyword itself delimits on both sides: "link" may
+    be part of "uplink", but " link " is not. A keyword with regex characters
+    is taken as a regex and guarantees nothing.
+    """
+    if whole_words:
+        return words(keyword)
+    if any(char in REGEX_CHARS for char in keyword):
+        return set()
+    inner = " ".join(match.group() for match in WORD_RE.finditer(keyword)
+                     if match.start() > 0 and match.end() < len(keyword))
+    return words(inner)
+
+
+class ChunkIndexBuilder:
+    """Collects the chunk index while TimelineWriter writes chunks.
+
+    ``add`` takes each record's timestamp, the texts its words come from and
+    its template version; ``close_chunk`` seals the current chunk once its
+    bytes are written. ``words`` is the union over all chunks, for the rollup.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.words = set()
+        self._texts = set()
+        self._versions = set()
+        self._first = self._last = None
+        self._version_words = []  # words of each template version's literals
+
+    def add(self, timestamp, texts, version=None):
+        self._texts.update(texts)
+        if version is not None:
+            self._versions.add(version)
+        if timestamp is not None:
+            if self._first is None:
+                self._first = self._last = timestamp
+            elif timestamp > self._last:
+                self._last = timestamp
+            elif timestamp < self._first:
+                self._first = timestamp
+
+    def close_chunk(self, offset, size, first_row, rows, templates):
+        """Seal the chunk of ``rows`` records from ``first_row`` at ``offset``; ``templates`` are the miner's versions."""
+        while len(self._version_words) < len(templates):
+            self._version_words.append(words(templates[len(self._version_words)][1]))
+        chunk_words = words(" ".join(self._texts))
+        for version in self._versions:
+            chunk_words |= self._version_words[version]
+        self.words |= chunk_words
+        self.chunks.append({"offset": offset, "bytes": size, "first_row": first_row, "rows": rows,
+                            "first": self._first, "last": self._last,
+                            "words": BloomFilter.for_items(chunk_words).to_json()})
+        self._texts = set()
+        self._versions = set()
+        self._first = self._last = None
+
+    def write(self, output_dir, templates, compression=None):
+        """Atomically write ``timeline_chunks.json``."""
+        last = self.chunks[-1] if self.chunks else {"offset": 0, "bytes": 0, "first_row": 0, "rows": 0}
+        data = {"version": CHUNK_INDEX_VERSION, "chunk_rows": CHUNK_ROWS, "compression": compression,
+                "rows": last["first_row"] + last["rows"], "bytes": last["offset"] + last["bytes"],
+                "templates": [list(version) for version in templates], "chunks": self.chunks}
+        path = os.path.join(output_dir, CHUNK_INDEX_FILE)
+        with open(path + ".tmp", "w") as f:
+            f.write(json.dumps(data, separators=(",", ":")))
+        os.replace(path + ".tmp", path)
+        return path
+
+
+class ChunkIndex:
+    """A loaded ``timeline_chunks.json``."""
+
+    def __init__(self, data):
+        self.rows = data["rows"]
+        self.chunk_rows = data["chunk_rows"]
+        self.bytes = data["bytes"]
+        self.compression = data["compression"]
+        self.templates = data["templates"]  # [template id, text] of every version, by version
+        self.chunks = data["chunks"]
+        self._blooms = {}
+
+    @classmethod
+    def load(cls, output_dir, timeline_path):
+        """The chunk index of the timeline at ``timeline_path``, or None when it has none or it is stale."""
+        try:
+            with open(os.path.join(output_dir, CHUNK_INDEX_FILE)) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != CHUNK_INDEX_VERSION:
+            return None
+        try:
+            if os.path.getsize(timeline_path) != data["bytes"]:
+                return None
+        except OSError:
+            return None
+        return cls(data)
+
+    def _bloom(self, position):
+        bloom = self._blooms.get(position)
+        if bloom is None:
+            bloom = self._blooms[position] = BloomFilter.from_json(self.chunks[position]["words"])
+        return bloom
+
+    def may_contain(self, position, wanted):
+        bloom = self._bloom(position)
+        return all(word in bloom for word in wanted)
+
+    def candidates(self, wanted=(), rows=None):
+        """Positions of the chunks that may hold a row with all of the ``wanted`` words,
+        among those holding one of ``rows`` (sorted record numbers) when given."""
+        positions = range(len(self.chunks))
+        if rows is not None:
+            positions = sorted({self.chunk_of(row) for row in rows} - {None})
+        return [position for position in positions if not wanted or self.may_contain(position, wanted)]
+
+    def chunk_of(self, row):
+        """Position of the chunk holding record number ``row``."""
+        position = row // self.chunk_rows
+        if position < len(self.chunks) and self.chunks[position]["first_row"] <= row \
+                < self.chunks[position]["first_row"] + self.chunks[position]["rows"]:
+            return position
+        return None
+
+    def rows_in(self, positions):
+        """Record numbers of the chunks at ``positions``, in order."""
+        return [row for position in positions
+                for row in range(self.chunks[position]["first_row"],
+                                 self.chunks[position]["first_row"] + self.chunks[position]["rows"])]
@@ -1,41 +1,64 @@
 import argparse
 import os
 import sys
-import subprocess
-import webbrowser
-import time
-import socket
 from pathlib import Path
 from logviewer.parser import parse_bundle
+from logviewer.job import ParseJob
+from logviewer.trace import TraceRecorder
+from logviewer.metrics import load_metrics, aggregate_metrics
+from logviewer.timeline import compression_available, TimeWindow
 from logviewer.gui import launch_gui
+from logviewer.search import SearchQuery, search_bundles, DEFAULT_LIMIT
+from logviewer.export import SHARD_ROWS, export_html
+from logviewer.service import (DEFAULT_VIEWER_PORT, PAGES, VIEWER_LOG, match_bundles, open_viewer, running_service,
+                               start_viewer_service, stop_viewer_service, viewer_bundles, viewer_url)
 from logviewer.state import (
     add_parsed_bundle, remove_parsed_bundle,
-    get_parsed_bundles, get_next_available_port
+    get_parsed_bundles
 )
 
-def analyze_bundle(bundle_path, open_after=False):
+def analyze_bundle(bundle_path, open_after=False, trace_path=None, options=None, full=False):
     if not os.path.isfile(bundle_path):
         print(f"❌ File not found: {bundle_path}")
         sys.exit(1)
 
+    compression = (options or {}).get("compression")
+    if not compression_available(compression):
+        print(f"❌ {compression} compression requires the zstandard package (pip install zstandard)")
+        sys.exit(1)
+
+    try:
+        window = TimeWindow.from_options(options or {})
+    except ValueError as e:
+        print(f"❌ Invalid time window: {e}")
+        sys.exit(1)
+
     print(f"📦 Parsing: {bundle_path}...")
+    if window:
+        print(f"🕒 Only keeping entries in {window}")
 
     output_dir = bundle_path + "_log_analysis_results"
-    out_dir = parse_bundle(bundle_path, output_dir)
+    tracer = TraceRecorder() if trace_path else None
+    job = ParseJob(bundle_path, tracer=tracer)
+    try:
+        out_dir = parse_bundle(bundle_path, output_dir, options=options, job=job, incremental=not full)
+    finally:
+        if tracer:
+            tracer.write(trace_path)
+            print(f"🧵 Trace written to {trace_path} (open in chrome://tracing or ui.perfetto.dev)")
 
     if not out_dir:
         print("❌ Parsing failed.")
         return
 
-    port = get_next_available_port()
-    add_parsed_bundle(bundle_path, out_dir, port)
+    add_parsed_bundle(bundle_path, out_dir)
     print(f"✅ Parsed output saved to: {out_dir}")
 
     if open_after:
         print("🔍 Launching viewer...")
         view_bundle(os.path.basename(out_dir))
 
-def list_bundles():
+def list_bundles(stats=False):
     bundles = get_parsed_bundles()
     if not bundles:
         print("ℹ️  No parsed bundles found.")
@@ -43,51 +66,157 @@ def list_bundles():
 
     print("📁 Parsed Bundles:")
     for idx, (src, meta) in enumerate(bundles.items(), 1):
-        print(f"{idx}. {os.path.basename(src)} -> {meta['output_path']} (Port: {meta.get('port', 'Not assigned')})")
-
-def wait_for_server(host, port, timeout=5):
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        try:
-            with socket.create_connection((host, port), timeout=1):
-                return True
-        except OSError:
-            time.sleep(0.2)
-    return False
-
-def view_bundle(bundle_name):
+        print(f"{idx}. {os.path.basename(src)} -> {meta['output_path']}")
+    service = running_service()
+    if service:
+        print(f"🌐 Viewer service running at {viewer_url(service['port'])}")
+
+    if stats:
+        print_parse_stats(bundles)
+
+def format_bytes(count):
+    for unit in ["B", "KB", "MB", "GB"]:
+        if count < 1024:
+            return f"{count:.1f} {unit}"
+        count /= 1024
+    return f"{count:.1f} TB"
+
+def print_parse_stats(bundles):
+    all_metrics = []
+    for meta in bundles.values():
+        all_metrics.extend(load_metrics(meta["output_path"]))
+    if not all_metrics:
+        print("\nℹ️  No parse_metrics.json found (bundles parsed before metrics were recorded).")
+        return
+
+    summary = aggregate_metrics(all_metrics)
+    top_level = sum(1 for m in all_metrics if not m.get("context") and m.get("run") != "update")
+    updates = sum(1 for m in all_metrics if m.get("run") == "update")
+    print(f"\n📊 Parse metrics across {top_level} bundle(s), {summary['runs']} context(s)"
+          + (f", {updates} incremental update(s)" if updates else ""))
+    print(f"   Total wall: {summary['wall_s']:.2f}s  CPU: {summary['cpu_s']:.2f}s  "
+          f"Read: {format_bytes(summary['bytes_read'])}  Written: {format_bytes(summary['bytes_written'])}")
+    print(f"   Peak RSS: {format_bytes(summary['peak_rss_bytes'])}  Peak threads: {summary['peak_threads']}  "
+          f"Peak child processes: {summary['peak_child_processes']}")
+
+    print(f"\n   {'Stage':<14}{'Runs':>6}{'Wall s':>10}{'Max s':>10}{'CPU s':>10}{'Child CPU s':>13}")
+    for name, stage in sorted(summary["stages"].items(), key=lambda kv: kv[1]["wall_s"], reverse=True):
+        print(f"   {name:<14}{stage['runs']:>6}{stage['wall_s']:>10.2f}{stage['max_wall_s']:>10.2f}"
+              f"{stage['cpu_s']:>10.2f}{stage['child_cpu_s']:>13.2f}")
+
+    if summary["patterns"]:
+        print(f"\n   {'Pattern':<16}{'Scanned':>12}{'Matched':>12}{'Hit %':>8}")
+        for name, counts in summary["patterns"].items():
+            rate = 100 * counts["matched"] / counts["scanned"] if counts["scanned"] else 0
+            print(f"   {name:<16}{counts['scanned']:>12}{counts['matched']:>12}{rate:>7.1f}%")
+
+    if summary["subprocesses"]:
+        print(f"\n   {'Subprocess':<16}{'Count':>8}{'Wall s':>10}{'Avg s':>8}")
+        for label, proc in summary["subprocesses"].items():
+            avg = proc["wall_s"] / proc["count"] if proc["count"] else 0
+            print(f"   {label:<16}{proc['count']:>8}{proc['wall_s']:>10.2f}{avg:>8.2f}")
+
+    if summary["warnings"]:
+        print(f"\n   {'Warning':<24}{'Count':>10}")
+        for category, count in sorted(summary["warnings"].items(), key=lambda kv: kv[1], reverse=True):
+            print(f"   {category:<24}{count:>10}")
+
+def search_parsed_bundles(query_args, bundle_names=None, workers=None, limit=DEFAULT_LIMIT):
     bundles = get_parsed_bundles()
+    if not bundles:
+        print("ℹ️  No parsed bundles found.")
+        return
+
+    selected = []
+    for src, meta in bundles.items():
+        name = os.path.basename(src)
+        if not bundle_names or any(name.startswith(wanted) or os.path.basename(meta["output_path"]).startswith(wanted)
+                                   for wanted in bundle_names):
+            selected.append((name, meta["output_path"]))
+    if not selected:
+        print(f"❌ No parsed bundle matches {', '.join(bundle_names)}")
+        sys.exit(1)
 
+    try:
+        query = SearchQuery(**query_args)
+    except ValueError as e:  # bad --since/--until or --regex
+        print(f"❌ Invalid query: {e}")
+        sys.exit(1)
+
+    print(f"🔎 Searching {len(selected)} bundle(s)...")
+    stats = {}
+    count = 0
+    for row in search_bundles(selected, query, workers=workers, limit=limit, progress=stats.update):
+        where = row["bundle"] + (f"/{row['context']}" if row["context"] else "")
+        print(f"{row.get('timestamp', '')}  {where}  {row.get('process', '')}  {row.get('severity', '')}  "
+              f"{row.get('message', '')}")
+        count += 1
+    print(f"\n✅ {count} row(s) from {stats.get('searched', 0)} searched context(s); "
+          f"{stats.get('skipped', 0)} of {stats.get('contexts', 0)} skipped by their rollups"
+          + (f"; {stats['failed']} failed" if stats.get("failed") else ""))
+    if stats.get("chunks"):
+        print(f"   Read {stats['chunks_read']} of {stats['chunks']} timeline chunks of the indexed contexts")
+    if count >= limit:
+        print(f"ℹ️  Stopped at --limit {limit}; narrow the query or raise the limit for later rows.")
+
+def find_parsed_bundle(bundle_name):
+    """State entry of the parsed bundle named ``bundle_name`` (a prefix of its output dir) or 'latest'."""
+    bundles = get_parsed_bundles()
     if bundle_name == "latest":
         if not bundles:
             print("❌ No parsed bundles found.")
-            return
-        latest_entry = max(bundles.items(), key=lambda kv: kv[1].get("timestamp", ""))
-        bundle = latest_entry[1]
-    else:
-        matched = None
-        for meta in bundles.values():
-            if os.path.basename(meta["output_path"]).startswith(bundle_name):
-                matched = meta
-                break
-        if not matched:
-            print(f"❌ Bundle '{bundle_name}' not found in state.")
-            return
-        bundle = matched
-
-    path = bundle["output_path"]
-    port = bundle.get("port") or get_next_available_port()
-    add_parsed_bundle(path, path, port)  # Re-update with port if it was missing
-
-    print(f"🌐 Serving '{path}' at http://localhost:{port}")
-    proc = subprocess.Popen(["python", "-m", "http.server", str(port), "--directory", path])
-
-    if wait_for_server("localhost", port, timeout=5):
-        webbrowser.open(f"http://localhost:{port}/index.html")
-        proc.wait()
-    else:
-        print("❌ Server failed to start in time.")
-        proc.terminate()
+            return None
+        return max(bundles.values(), key=lambda meta: meta.get("timestamp", ""))
+    for meta in bundles.values():
+        if os.path.basename(meta["output_path"]).startswith(bundle_name):
+            return meta
+    print(f"❌ Bundle '{bundle_name}' not found in state.")
+    return None
+
+def export_bundle_html(bundle_name, dest=None, shard_rows=SHARD_ROWS):
+    bundle = find_parsed_bundle(bundle_name)
+    if not bundle:
+        return None
+    print(f"📤 Exporting '{bundle['output_path']}' as a static dashboard...")
+    index = export_html(bundle["output_path"], dest, shard_rows=shard_rows,
+                        progress=lambda context: print(f"  🧩 {context}"))
+    print(f"✅ Dashboard written to {index}")
+    print(f"   Serve it with: python -m http.server --directory {os.path.dirname(index)}")
+    return index
+
+def view_bundle(bundle_name, page=None):
+    matches = match_bundles(viewer_bundles(), bundle_name)
+    if not matches:
+        print(f"❌ No parsed bundle '{bundle_name}' with logs to view.")
+        return
+    if len(matches) > 1:
+        print(f"❌ '{bundle_name}' matches several bundles: {', '.join(bundle['name'] for bundle in matches)}")
+        return
+    bundle = matches[0]
+    try:
+        url = open_viewer(bundle["name"], page)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return
+    print(f"🌐 Viewing '{bundle['path']}' at {url}")
+
+def serve_viewer(port=None, stop=False):
+    if stop:
+        stopped = stop_viewer_service()
+        print(f"🛑 Viewer service on port {stopped} stopped" if stopped else "ℹ️  No viewer service is running.")
+        return
+    service = running_service()
+    if service and port in (None, service["port"]):
+        print(f"ℹ️  Viewer service already running at {viewer_url(service['port'])}")
+        return
+    print("🚀 Starting the viewer service...")
+    try:
+        port = start_viewer_service(port)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"✅ Viewer service running at {viewer_url(port)} (log: {VIEWER_LOG})")
+    print("   It serves every parsed bundle; LogViewer view and the GUI open pages on it.")
 
 def main():
     parser = argparse.ArgumentParser(
@@ -95,9 +224,24 @@ def main():
                     "Usage examples:\n"
                     "  LogViewer analyze --path support1.tar.gz\n"
                     "  LogViewer analyze --path support1.tar.gz --open\n"
+                    "  LogViewer analyze --path support1.tar.gz --trace trace.json\n"
+                    "  LogViewer analyze --path support1.tar.gz --compress gzip\n"
+                    "  LogViewer analyze --path support1.tar.gz --partition hour\n"
+                    "  LogViewer analyze --path chassis.tar.gz --memory-budget 2048\n"
+                    "  LogViewer analyze --path support1.tar.gz --since 2024-05-16T12:00 --until 2024-05-16T13:00\n"
+                    "  LogViewer analyze --path stack.tar.gz --lazy --open\n"
+                    "  LogViewer analyze --path stack.tar.gz --no-fastlogs --no-vsf   (re-run without them to add them later)\n"
                     "  LogViewer list\n"
+                    "  LogViewer list --stats\n"
+                    "  LogViewer search --keyword \"link down\" --severity err --since 2024-05-16T12:00\n"
+                    "  LogViewer search --process bgpd --event-id 5309 --bundle support.files.123456\n"
+                    "  LogViewer search --entity 1/1/12 --since 2024-05-16T12:00\n"
+                    "  LogViewer export-html --bundle latest\n"
+                    "  LogViewer export-html --bundle support.files.123456 --out shared/support123456\n"
                     "  LogViewer view --bundle latest\n"
-                    "  LogViewer view --bundle support.files.123456",
+                    "  LogViewer view --bundle support.files.123456 --page merged\n"
+                    "  LogViewer serve\n"
+                    "  LogViewer serve --stop",
         formatter_class=argparse.RawTextHelpFormatter
     )
     subparsers = parser.add_subparsers(dest="command")
@@ -114,19 +258,127 @@ def main():
         action="store_true",
         help="Open parsed bundle in browser after parsing"
     )
+    analyze.add_argument(
+        "--trace",
+        metavar="OUT.json",
+        help="Record a Chrome trace-event timeline of the parse pipeline to this file"
+    )
+    analyze.add_argument(
+        "--compress",
+        choices=["gzip", "zstd"],
+        help="Compress the parsed timeline (parsed_logs.ndjson.gz / .zst; zstd needs the zstandard package)"
+    )
+    analyze.add_argument(
+        "--partition",
+        choices=["day", "hour"],
+        help="Split the parsed timeline into daily (default) or hourly partitions; the viewer loads only "
+             "those in its Time Range"
+    )
+    analyze.add_argument(
+        "--memory-budget",
+        type=int,
+        metavar="MB",
+        help="Cap the in-memory timeline at MB megabytes; sorted runs beyond it are spilled to disk and merged"
+    )
+    analyze.add_argument(
+        "--spill-dir",
+        metavar="DIR",
+        help="Directory for spilled timeline runs (default: system temp dir)"
+    )
+    analyze.add_argument(
+        "--since",
+        metavar="TIME",
+        help="Only parse entries at or after TIME (ISO 8601, e.g. 2024-05-16T12:00 or 2024-05-16T12:00+02:00; "
+             "local time if no offset). Log files wholly before it are skipped"
+    )
+    analyze.add_argument(
+        "--until",
+        metavar="TIME",
+        help="Only parse entries at or before TIME (same format as --since)"
+    )
+    analyze.add_argument(
+        "--lazy",
+        action="store_true",
+        help="Record VSF members, linecards and previous boots without parsing them; "
+             "each is parsed when first opened in the viewer"
+    )
+    for name, what in [("fastlogs", "fastlogs"), ("vsf", "VSF member bundles"),
+                       ("linecards", "linecard bundles"), ("prevboot", "previous boot logs")]:
+        analyze.add_argument(
+            f"--no-{name}",
+            action="store_true",
+            help=f"Skip {what}; analyzing again without this flag adds only them to the existing output"
+        )
+    analyze.add_argument(
+        "--full",
+        action="store_true",
+        help="Re-parse everything even if the bundle was already parsed (default: only add what the options add)"
+    )
     list_cmd = subparsers.add_parser("list", help="List previously parsed bundles")
+    list_cmd.add_argument(
+        "--stats",
+        action="store_true",
+        help="Aggregate parse_metrics.json (per-stage timings, bytes, pattern hits) across bundles"
+    )
 
-    view = subparsers.add_parser("view", help="Open the log viewer for a parsed bundle")
+    search = subparsers.add_parser("search", help="Search the timelines of all (or some) parsed bundles at once")
+    search.add_argument("--keyword", metavar="TEXT", help="Whole words to find in messages, case-insensitive")
+    search.add_argument("--regex", metavar="PATTERN", help="Regular expression to search messages for")
+    search.add_argument("--entity", metavar="TEXT",
+                        help="Port (1/1/12), MAC, IP, VLAN (vlan 10) or LAG (lag1) the rows must mention")
+    search.add_argument("--since", metavar="TIME", help="Only rows at or after TIME (same format as analyze --since)")
+    search.add_argument("--until", metavar="TIME", help="Only rows at or before TIME")
+    search.add_argument("--severity", action="append", default=[], metavar="LEVEL",
+                        help="Only this severity (err, LOG_WARNING, ...); repeat for several")
+    search.add_argument("--process", action="append", default=[], metavar="NAME",
+                        help="Only this process; repeat for several")
+    search.add_argument("--event-id", action="append", default=[], metavar="ID",
+                        help="Only this event id; repeat for several")
+    search.add_argument("--bundle", action="append", default=[], metavar="NAME",
+                        help="Only bundles whose name starts with NAME; repeat for several (default: all)")
+    search.add_argument("--workers", type=int, metavar="N", help="Worker processes (default: one per CPU)")
+    search.add_argument("--limit", type=int, default=DEFAULT_LIMIT, metavar="N",
+                        help=f"Stop after the N earliest matching rows (default: {DEFAULT_LIMIT})")
+
+    export = subparsers.add_parser("export-html", help="Export a parsed bundle as a static HTML dashboard")
+    export.add_argument("--bundle", required=True, metavar="NAME", help="Bundle name or 'latest'")
+    export.add_argument("--out", metavar="DIR", help="Write the dashboard here (default: the bundle's output dir)")
+    export.add_argument("--shard-rows", type=int, default=SHARD_ROWS, metavar="N",
+                        help=f"Rows per compressed data shard the page loads at a time (default: {SHARD_ROWS})")
+
+    view = subparsers.add_parser("view", help="Open a parsed bundle in the viewer service")
     view.add_argument("--bundle", required=True, metavar="NAME", help="Bundle name or 'latest'")
+    view.add_argument("--page", choices=PAGES, help="Dashboard page to open (default: bundle)")
+
+    serve = subparsers.add_parser("serve", help="Start the viewer service hosting every parsed bundle")
+    serve.add_argument("--port", type=int, metavar="N",
+                       help=f"Port to serve on (default: {DEFAULT_VIEWER_PORT}, or a free one if taken)")
+    serve.add_argument("--stop", action="store_true", help="Stop the running viewer service")
 
     args = parser.parse_args()
 
     if args.command == "analyze":
-        analyze_bundle(args.path, open_after=args.open)
+        analyze_bundle(args.path, open_after=args.open, trace_path=args.trace,
+                       options={"compression": args.compress, "partition": args.partition, "memory_budget_mb": args.memory_budget,
+                                "spill_dir": args.spill_dir, "since": args.since, "until": args.until,
+                                "lazy_contexts": args.lazy, "include_fastlogs": not args.no_fastlogs,
+                                "include_vsf": not args.no_vsf, "include_linecards": not args.no_linecards,
+                                "include_prevboot": not args.no_prevboot},
+                       full=args.full)
     elif args.command == "list":
-        list_bundles()
+        list_bundles(stats=args.stats)
+    elif args.command == "search":
+        search_parsed_bundles({"keyword": args.keyword, "regex": args.regex, "entity": args.entity,
+                               "since": args.since,
+                               "until": args.until, "severities": args.severity,
+                               "processes": args.process, "event_ids": args.event_id},
+                              bundle_names=args.bundle, workers=args.workers, limit=args.limit)
+    elif args.command == "export-html":
+        export_bundle_html(args.bundle, args.out, shard_rows=args.shard_rows)
     elif args.command == "view":
-        view_bundle(args.bundle)
+        view_bundle(args.bundle, args.page)
+    elif args.command == "serve":
+        serve_viewer(args.port, args.stop)
     else:
         launch_gui()
 
@@ -0,0 +1,151 @@
+# dataview.py
+#
+# Data-loading and filtering helpers used by the Streamlit dashboard (app.py).
+# Kept free of Streamlit imports so they can be reused and benchmarked.
+
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from logviewer.chunks import keyword_pattern, keyword_words
+from logviewer.entities import query_entities, scan_entity_rows
+from logviewer.templates import render
+from logviewer.partitions import timeline_parts
+from logviewer.timeline import find_timeline, open_timeline, LEGACY_TIMELINE_FILE
+
+LOAD_CHUNK_ROWS = 100000
+
+
+def load_parsed_logs(path, window=None, chunksize=LOAD_CHUNK_ROWS):
+    """The timeline of a parsed context as a DataFrame; of a partitioned one (``partitions.py``),
+    only the partitions overlapping ``window`` (a TimeWindow) when given.
+
+    ``df.attrs["parts"]`` lists the directories the rows came from, as
+    ``{"path", "offset", "rows"}``, for their entity and chunk indexes.
+    """
+    frames, parts, offset = [], [], 0
+    for part in timeline_parts(path, window):
+        log_path = find_timeline(part)
+        if not log_path:
+            continue
+        if log_path.endswith(LEGACY_TIMELINE_FILE):
+            with open(log_path) as f:
+                part_frames = [pd.DataFrame(json.load(f))]
+        else:
+            # NDJSON: parse in chunks so only one chunk of raw records is held at a time.
+            with open_timeline(log_path) as f, pd.read_json(f, lines=True, chunksize=chunksize, dtype=False,
+                                                            convert_dates=False) as reader:
+                part_frames = list(reader)
+        rows = sum(len(frame) - (int(frame["tpl_def"].notna().sum()) if "tpl_def" in frame else 0)
+                   for frame in part_frames)
+        frames.extend(part_frames)
+        parts.append({"path": part, "offset": offset, "rows": rows})
+        offset += rows
+    if not frames:
+        return pd.DataFrame()
+    # Template versions are numbered per context, so partitions decode together.
+    df = decode_templates(pd.concat(frames, ignore_index=True))
+    df.attrs["parts"] = parts
+    return df
+
+
+def decode_templates(df):
+    """Drop the ``tpl_def`` lines of a template-compacted timeline, rebuild ``message``
+    from template parameters, and label rows with ``template_id`` and ``template``
+    (the template's final text)."""
+    if "tpl_def" not in df.columns:
+        return df
+    is_def = df["tpl_def"].notna()
+    defs = df[is_def]
+    df = df[~is_def].reset_index(drop=True)
+    versions = {int(version): (int(template_id), text.split(" "))
+                for version, template_id, text in zip(defs["tpl_def"], defs["template_id"], defs["template"])}
+    if "params" in df.columns:
+        compact = df["params"].notna()
+        messages = [render(versions[int(version)][1], params)
+                    for version, params in zip(df.loc[compact, "tpl"], df.loc[compact, "params"])]
+        if "message" not in df.columns:
+            df["message"] = None
+        df.loc[compact, "message"] = messages
+    # Versions only generalize a template, so its last version has the final text.
+    final = {template_id: " ".join(tokens) for _, (template_id, tokens) in sorted(versions.items())}
+    df["template_id"] = df["tpl"].map({version: template_id for version, (template_id, _) in versions.items()}) \
+        .astype("Int64")
+    df["template"] = df["template_id"].map(final)
+    columns = [column for column in df.columns if column not in ("tpl", "params", "tpl_def", "template_id", "template")]
+    return df[columns + ["template_id", "template"]]
+
+
+def format_timestamp(ts):
+    try:
+        return datetime.fromisoformat(ts).strftime("%Y-%m-%d %H:%M:%S")
+    except:
+        return ts
+
+
+def find_entity_rows(df, indexes, query):
+    """Positions of the rows of ``df`` that mention every entity in ``query``.
+
+    ``indexes`` are ``[(offset, EntityIndex or None)]``, one for each part of
+    ``df.attrs["parts"]``. Read from the indexes when they match the loaded
+    timeline; otherwise (an index missing, or a timeline rewritten since) the
+    messages are scanned.
+    """
+    entities = query_entities(query)
+    parts = df.attrs.get("parts", [])
+    if indexes and len(indexes) == len(parts) and all(index is not None and index.rows == part["rows"]
+                                                      for (_, index), part in zip(indexes, parts)):
+        return [offset + row for offset, index in indexes for row in index.lookup(entities)]
+    return scan_entity_rows(df["message"], entities)
+
+
+def find_keyword_rows(df, indexes, keyword, whole_words=False):
+    """Rows of ``df`` in the timeline chunks that may hold ``keyword``, per the ChunkIndexes of its parts
+    (``[(offset, ChunkIndex or None)]``, as for ``find_entity_rows``), with how many chunks those are
+    and how many there are; None when every row has to be scanned (an index missing, or no word to look for)."""
+    parts = df.attrs.get("parts", [])
+    if not indexes or len(indexes) != len(parts) or any(index is None or index.rows != part["rows"]
+                                                        for (_, index), part in zip(indexes, parts)):
+        return None
+    wanted = keyword_words(keyword, whole_words)
+    if not wanted:
+        return None
+    rows, read, total = [], 0, 0
+    for offset, index in indexes:
+        positions = index.candidates(wanted)
+        rows.extend(offset + row for row in index.rows_in(positions))
+        read += len(positions)
+        total += len(index.chunks)
+    return rows, read, total
+
+
+def template_groups(df, time_column="timestamp_dt"):
+    """One row per template: its text, how many rows of ``df`` it has, and when it was first and last seen."""
+    if "template_id" not in df.columns or df.empty:
+        return pd.DataFrame(columns=["template_id", "template", "count", "first_seen", "last_seen"])
+    grouped = df.groupby("template_id").agg(template=("template", "first"), count=("template", "size"),
+                                            first_seen=(time_column, "min"), last_seen=(time_column, "max"))
+    return grouped.sort_values("count", ascending=False).reset_index()
+
+
+def apply_filters(df, proc_filter, keyword, include_fastlogs, start_date, end_date, entity_rows=None,
+                  keyword_rows=None, whole_words=False):
+    rows = entity_rows
+    if keyword_rows is not None:
+        rows = keyword_rows if rows is None else sorted(set(rows).intersection(keyword_rows))
+    filtered_df = df.iloc[rows] if rows is not None else df.copy()
+    if proc_filter != "All":
+        filtered_df = filtered_df[filtered_df['process'] == proc_filter]
+    if keyword and whole_words:
+        filtered_df = filtered_df[filtered_df['message'].str.contains(keyword_pattern(keyword), na=False)]
+    elif keyword:
+        filtered_df = filtered_df[filtered_df['message'].str.contains(keyword, case=False, na=False)]
+    if not include_fastlogs:
+        filtered_df = filtered_df[~filtered_df['source'].eq("fastlog")]
+    if start_date and end_date:
+        filtered_df = filtered_df[
+            (filtered_df["timestamp_dt"] >= start_date) & (filtered_df["timestamp_dt"] <= end_date)
+        ]
+    return filtered_df
@@ -0,0 +1,53 @@
+# diagnostics.py
+
+import threading
+
+SAMPLES_PER_KEY = 3
+MAX_SAMPLE_LENGTH = 200
+
+
+class WarningCounter:
+    """Counts parse warnings by (category, file) instead of logging each one.
+
+    Hot loops call ``add`` for every bad line; only the first few examples per
+    key are kept. ``summarize`` returns what accumulated since the previous
+    call so stages can report one line per category and file.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._samples = {}
+        self._reported = {}
+
+    def add(self, category, source, example=None):
+        key = (category, source or "")
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + 1
+            if example is not None:
+                samples = self._samples.setdefault(key, [])
+                if len(samples) < SAMPLES_PER_KEY:
+                    samples.append(str(example)[:MAX_SAMPLE_LENGTH])
+
+    def summarize(self):
+        """Return [(category, source, new_count, total_count, samples)] not yet reported."""
+        with self._lock:
+            summary = []
+            for key, total in self._counts.items():
+                new = total - self._reported.get(key, 0)
+                if new:
+                    summary.append((key[0], key[1], new, total, list(self._samples.get(key, []))))
+                    self._reported[key] = total
+            return summary
+
+    def to_dict(self):
+        with self._lock:
+            result = {}
+            for (category, source), count in self._counts.items():
+                entry = result.setdefault(category, {"count": 0, "files": {}, "samples": []})
+                entry["count"] += count
+                entry["files"][source] = count
+                for sample in self._samples.get((category, source), []):
+                    if len(entry["samples"]) < SAMPLES_PER_KEY:
+                        entry["samples"].append(sample)
+            return result
@@ -0,0 +1,282 @@
+# entities.py
+#
+# Network entities named in log messages (ports, MAC addresses, IPv4
+# addresses, VLANs, LAGs), pulled out with one compiled pattern while a
+# timeline is written and kept as an inverted index (entity -> row ids) in
+# entity_index.json next to it, so the dashboard can find every row about
+# e.g. port 1/1/12 without scanning messages.
+
+import json
+import os
+import re
+from array import array
+
+ENTITY_INDEX_FILE = "entity_index.json"
+ENTITY_INDEX_VERSION = 1
+
+ENTITY_KINDS = {"port": "Interface", "mac": "MAC", "ip": "IP", "vlan": "VLAN", "lag": "LAG"}
+
+# One pass finds candidates: runs of hex digits joined by / . : - (ports, IPs and
+# MACs, but also times and versions, told apart afterwards by their separators)
+# and VLAN/LAG names. There is deliberately no \b, lookaround or IGNORECASE:
+# each makes the regex engine do work at every position of every message.
+# NUL matches too, as the row separator of a batch.
+CANDIDATE_RE = re.compile(r"\x00|[0-9A-Fa-f]{1,4}(?:[/.:-][0-9A-Fa-f]+)+|(?:VLAN|[Vv]lan|LAG|[Ll]ag) ?\d+")
+PORT_RE = re.compile(r"\d{1,2}/\d{1,2}/\d{1,3}(?::\d{1,2})?")
+MAC_RE = re.compile(r"[0-9a-f]{2}([:-])[0-9a-f]{2}(?:\1[0-9a-f]{2}){4}", re.IGNORECASE)
+IP_RE = re.compile(r"(?:\d{1,3}\.){3}\d{1,3}")
+# A whole token that is one port, IPv4 address (maybe with a prefix length) or MAC.
+TOKEN_RE = re.compile(r"(?P<port>\d{1,2}/\d{1,2}/\d{1,3}(?::\d{1,2})?)|(?P<ip>(?:\d{1,3}\.){3}\d{1,3})(?:/\d{1,2})?"
+                      r"|(?P<mac>[0-9A-Fa-f]{2}([:-])[0-9A-Fa-f]{2}(?:\4[0-9A-Fa-f]{2}){4})")
+CANDIDATE_CACHE_LIMIT = 65536
+BATCH_ROWS = 4096
+
+
+def _classify(token):
+    if token[0] in "VvLl":
+        if token[0] in "Ll":
+            return "lag", f"lag{int(token[3:])}"
+        number = int(token[4:])
+        return ("vlan", str(number)) if number <= 4095 else None
+    if "." in token:
+        address = token.split("/", 1)[0]  # 10.0.0.1/24
+        if address.count(".") == 3 and IP_RE.fullmatch(address) \
+                and max(map(int, address.split("."))) <= 255:
+            return "ip", address
+    elif "/" in token:
+        if PORT_RE.fullmatch(token):
+            return "port", token
+    elif len(token) == 17 and MAC_RE.fullmatch(token):
+        return "mac", token.lower().replace("-", ":")
+    return None
+
+
+def _classify_token(token):
+    entity = _classify(token)
+    if entity is None and not token[0].isdigit() and len(token) > 7:
+        # Hex letters glued to the front, as in "mac:aa:bb:cc:dd:ee:ff" or "ip-10.0.0.1".
+        for position, char in enumerate(token[:5]):
+            if char in "/.:-":
+                return _classify(token[position + 1:])
+    return entity
+
+
+# Ports, VLANs and LAGs repeat in almost every message; remember what each candidate turned out to be.
+_candidates = {}
+
+
+def _entity(token):
+    entity = _candidates.get(token)
+    if entity is None:
+        entity = _classify_token(token) or False
+        if len(_candidates) >= CANDIDATE_CACHE_LIMIT:
+            _candidates.clear()
+        _candidates[token] = entity
+    return entity
+
+
+# The same for whole whitespace-delimited tokens, which may carry punctuation ("1/1/12," or "(10.0.0.1)").
+_tokens = {}
+NAMED_NUMBERS = frozenset(["VLAN", "Vlan", "vlan", "LAG", "Lag", "lag"])
+
+
+def _token_entities(token):
+    match = TOKEN_RE.fullmatch(token)
+    if match is None:
+        entities = tuple(extract_entities(token))
+    elif match.lastgroup == "port":
+        entities = (("port", token),)
+    elif match.lastgroup == "mac":
+        entities = (("mac", token.lower().replace("-", ":")),)
+    else:
+        address = match.group("ip")
+        entities = (("ip", address),) if max(map(int, address.split("."))) <= 255 else ()
+    if len(_tokens) >= CANDIDATE_CACHE_LIMIT:
+        _tokens.clear()
+    _tokens[token] = entities
+    return entities
+
+
+def extract_entities(message):
+    """Distinct ``(kind, value)`` entities mentioned in a message, in order of appearance."""
+    if not message:
+        return []
+    found = {}
+    for token in CANDIDATE_RE.findall(message):
+        entity = _entity(token)
+        if entity:
+            found[entity] = None
+    return list(found)
+
+
+def query_entities(query):
+    """Entities a dashboard query asks for; a bare term no pattern recognizes matches that value of any kind."""
+    entities = extract_entities(query)
+    if not entities and query.strip():
+        entities = [(None, query.strip().lower())]
+    return entities
+
+
+class EntityIndexBuilder:
+    """Collects the postings of a timeline as its rows are written, in row order.
+
+    Messages are matched in batches of BATCH_ROWS joined by NUL, so the regex
+    runs once per batch instead of once per row.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.rows = 0
+        self._pending = []
+
+    def add(self, message):
+        if not isinstance(message, str):
+            message = ""
+        elif message.startswith("("):
+            # A fastlog record's "(20 May 24 11:59:57.781222114)" header would be a candidate in every row.
+            message = message[message.find(")") + 1:]
+        self._pending.append(message)
+        if len(self._pending) >= BATCH_ROWS:
+            self._flush()
+
+    def add_tokens(self, tokens, positions):
+        """Add a row that is already split into whitespace tokens, looking only at ``tokens[positions]``.
+
+        TimelineWriter passes the template slots (``templates.py``): the
+        template miner masks every token holding a digit, so the slots are
+        where the entities are, and the literal rest of a message isn't matched
+        again for every row.
+        """
+        if self._pending:
+            self._flush()
+        row = self.rows
+        self.rows += 1
+        if not positions:
+            return
+        start = 0
+        if tokens[0].startswith("("):  # skip the fastlog record header, as add() does
+            for start, token in enumerate(tokens, 1):
+                if token.endswith(")"):
+                    break
+            else:
+                start = 0
+        postings = self.postings
+        cached = _tokens.get
+        for position in positions:
+            if position < start:
+                continue
+            token = tokens[position]
+            entities = cached(token)
+            if entities is None:
+                entities = _token_entities(token)
+            if not entities:
+                # "VLAN 10": the number is the slot, the name a literal before it.
+                if position and token[0].isdigit() and tokens[position - 1] in NAMED_NUMBERS:
+                    entities = extract_entities(tokens[position - 1] + " " + token)
+                if not entities:
+                    continue
+            for entity in entities:
+                rows = postings.get(entity)
+                if rows is None:
+                    postings[entity] = array("I", (row,))
+                elif rows[-1] != row:
+                    rows.append(row)
+
+    def _flush(self):
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        block = "\x00".join(batch)
+        if block.count("\x00") != len(batch) - 1:  # a message holds a NUL of its own
+            tokens = []
+            for message in batch:
+                tokens.extend(CANDIDATE_RE.findall(message.replace("\x00", " ")))
+                tokens.append("\x00")
+        else:
+            tokens = CANDIDATE_RE.findall(block)
+        postings = self.postings
+        cached = _candidates.get
+        row = self.rows
+        for token in tokens:
+            if token == "\x00":
+                row += 1
+                continue
+            entity = cached(token)
+            if entity is None:
+                entity = _entity(token)
+            if entity:
+                rows = postings.get(entity)
+                if rows is None:
+                    postings[entity] = array("I", (row,))
+                elif rows[-1] != row:
+                    rows.append(row)
+        self.rows += len(batch)
+
+    def write(self, output_dir):
+        """Atomically write ``entity_index.json``."""
+        self._flush()
+        entities = {}
+        for (kind, value), rows in self.postings.items():
+            entities.setdefault(kind, {})[value] = rows.tolist()
+        path = os.path.join(output_dir, ENTITY_INDEX_FILE)
+        with open(path + ".tmp", "w") as f:
+            f.write(json.dumps({"version": ENTITY_INDEX_VERSION, "rows": self.rows, "entities": entities},
+                               separators=(",", ":")))
+        os.replace(path + ".tmp", path)
+        return path
+
+
+class EntityIndex:
+    """A loaded ``entity_index.json``. Row ids are record numbers of the timeline it was written with."""
+
+    def __init__(self, rows, entities):
+        self.rows = rows
+        self.entities = entities  # kind -> value -> ascending row ids
+
+    @classmethod
+    def load(cls, output_dir):
+        """The index of a parsed context, or None when it has none (older parses, legacy JSON timelines)."""
+        try:
+            with open(os.path.join(output_dir, ENTITY_INDEX_FILE)) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != ENTITY_INDEX_VERSION:
+            return None
+        return cls(data["rows"], data["entities"])
+
+    def counts(self):
+        """Distinct entities per kind."""
+        return {kind: len(values) for kind, values in self.entities.items()}
+
+    def rows_for(self, entity):
+        kind, value = entity
+        kinds = [kind] if kind is not None else list(self.entities)
+        found = set()
+        for name in kinds:
+            rows = self.entities.get(name, {}).get(value)
+            if rows:
+                found.update(rows)
+        return found
+
+    def lookup(self, entities):
+        """Sorted row ids mentioning every one of ``entities``."""
+        rows = None
+        for entity in entities:
+            matched = self.rows_for(entity)
+            rows = matched if rows is None else rows & matched
+            if not rows:
+                return []
+        return sorted(rows) if rows is not None else []
+
+
+def scan_entity_rows(messages, entities):
+    """Row positions whose message mentions every one of ``entities``; for timelines without an index."""
+    wanted = [(kind, value) for kind, value in entities if kind is not None]
+    bare = {value for kind, value in entities if kind is None}
+    rows = []
+    for position, message in enumerate(messages):
+        found = extract_entities(message) if isinstance(message, str) else []
+        if all(entity in found for entity in wanted) and bare <= {value for _, value in found}:
+            rows.append(position)
+    return rows
@@ -0,0 +1,94 @@
+# export.py
+#
+# Static HTML export of a parsed bundle, for people without Streamlit: an
+# index.html (html_template.py) plus html_data/, where every context's
+# timeline is cut into gzip-compressed JSON shards of SHARD_ROWS rows listed
+# in manifest.json with their time spans. The page reads only the manifest
+# up front, fetches the shards overlapping the chosen time window, and
+# filters the rows it has loaded in the browser. Any static file server will
+# do (python -m http.server).
+
+import gzip
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+
+from logviewer.html_template import render_index
+from logviewer.merged import context_tags
+from logviewer.partitions import iter_context
+from logviewer.search import context_dirs
+
+EXPORT_DATA_DIR = "html_data"
+EXPORT_MANIFEST = "manifest.json"
+EXPORT_INDEX = "index.html"
+EXPORT_VERSION = 1
+SHARD_ROWS = 20000
+SHARD_COLUMNS = ("timestamp", "severity", "process", "event_id", "source", "message")
+
+
+def _write_shard(path, rows):
+    with open(path, "wb") as f:
+        f.write(gzip.compress(json.dumps(rows, separators=(",", ":")).encode("utf-8"), compresslevel=6))
+    return os.path.getsize(path)
+
+
+def export_context(path, data_dir, prefix, shard_rows=SHARD_ROWS):
+    """Write one context's timeline as shards named ``<prefix>-<n>.json.gz``; returns their manifest entries."""
+    shards, rows = [], []
+
+    def flush():
+        name = f"{prefix}-{len(shards):05d}.json.gz"
+        size = _write_shard(os.path.join(data_dir, name), rows)
+        dated = [row[0] for row in rows if row[0]]
+        shards.append({"file": name, "rows": len(rows), "bytes": size,
+                       "first": dated[0] if dated else None, "last": dated[-1] if dated else None})
+
+    for record in iter_context(path):
+        rows.append([record.get(column) for column in SHARD_COLUMNS])
+        if len(rows) >= shard_rows:
+            flush()
+            rows = []
+    if rows:
+        flush()
+    return shards
+
+
+def export_html(output_dir, dest=None, shard_rows=SHARD_ROWS, progress=None):
+    """Export the parsed bundle in ``output_dir`` as a static dashboard under ``dest``
+    (default: ``output_dir`` itself). Returns the index.html path.
+
+    The data dir is written next to the old one and swapped in, so a page
+    being served never sees half an export.
+    """
+    dest = dest or output_dir
+    os.makedirs(dest, exist_ok=True)
+    data_dir = os.path.join(dest, EXPORT_DATA_DIR)
+    tmp_dir = data_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    name = os.path.basename(os.path.normpath(output_dir)).replace("_log_analysis_results", "")
+    contexts = []
+    try:
+        for number, (context, path) in enumerate(context_dirs(output_dir)):
+            if progress:
+                progress(context or "main")
+            shards = export_context(path, tmp_dir, f"c{number:03d}", shard_rows)
+            contexts.append({**context_tags(context), "rows": sum(shard["rows"] for shard in shards),
+                             "first": next((shard["first"] for shard in shards if shard["first"]), None),
+                             "last": next((shard["last"] for shard in reversed(shards) if shard["last"]), None),
+                             "shards": shards})
+        manifest = {"version": EXPORT_VERSION, "bundle": name, "columns": list(SHARD_COLUMNS),
+                    "generated": datetime.now(timezone.utc).isoformat(timespec="seconds"), "contexts": contexts}
+        with open(os.path.join(tmp_dir, EXPORT_MANIFEST), "w") as f:
+            json.dump(manifest, f, separators=(",", ":"))
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    shutil.rmtree(data_dir, ignore_errors=True)
+    os.replace(tmp_dir, data_dir)
+    index = os.path.join(dest, EXPORT_INDEX)
+    with open(index + ".tmp", "w", encoding="utf-8") as f:
+        f.write(render_index(name))
+    os.replace(index + ".tmp", index)
+    return index
@@ -11,17 +11,26 @@ import time
 import multiprocessing
 import os
 import threading
-import subprocess
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox
 from pathlib import Path
 import shutil
-import json
 from logviewer.parser import find_readme, parse_bundle
+from logviewer.job import CancelToken, STAGES
+from logviewer.timeline import TimeWindow
+from logviewer.partitions import has_timeline
+from logviewer.manifest import parse_complete
 from logviewer.state import (
     add_parsed_bundle, remove_parsed_bundle,
-    get_parsed_bundles, get_next_available_port
+    get_parsed_bundles, get_parsed_paths
 )
+from logviewer.service import open_viewer, stop_viewer_service, viewer_bundles
+
+SCAN_BATCH_SIZE = 500
+SCAN_BATCH_INTERVAL_MS = 50
+PROGRESS_REFRESH_MS = 250
+DEBUG_LINES_PER_TICK = 200
+DEBUG_MAX_LINES = 5000
 
 class LogViewerApp:
     def __init__(self, root):
@@ -49,12 +58,19 @@ class LogViewerApp:
         self.scroll_y.pack(side="right", fill="y")
 
         # .scrollable_frame inside create_widgets
-        self.running_servers = {}
-        self.viewing_in_progress = False
+        self.viewing_in_progress = False  # the viewer service is being started or reached
+        self.tree_index = {}  # bundle path -> Treeview item id
+        self.scan_queue = queue.Queue()
+        self.scan_in_progress = False
+        self.progress_queue = queue.Queue()
+        self.parse_progress = {}  # bundle path -> per-bundle progress state
+        self.cancel_tokens = {}  # bundle path -> CancelToken of a running parse
+        self.scan_count = 0
 
         self.create_widgets()  
         self.debug_queue = queue.Queue()
         self.root.after(500, self.update_debug_log)
+        self.root.after(PROGRESS_REFRESH_MS, self.update_parse_progress)
         self.load_previous_bundles()
 
         from logviewer import parser
@@ -65,12 +81,30 @@ class LogViewerApp:
         self.debug_queue.put(f"[{timestamp}] {message}")
 
     def update_debug_log(self):
-        while not self.debug_queue.empty():
-            msg = self.debug_queue.get_nowait()
+        # Drain in one batch per tick; anything beyond the per-tick cap is
+        # counted and dropped so a flood of messages cannot freeze the UI.
+        lines = []
+        dropped = 0
+        while True:
+            try:
+                msg = self.debug_queue.get_nowait()
+            except queue.Empty:
+                break
+            if len(lines) < DEBUG_LINES_PER_TICK:
+                lines.append(msg)
+            else:
+                dropped += 1
+        if dropped:
+            lines.append(f"… {dropped} debug message(s) suppressed")
+
+        if lines:
             self.debug_output.config(state="normal")
-            self.debug_output.insert("end", f"{msg}\n")
+            self.debug_output.insert("end", "\n".join(lines) + "\n")
+            line_count = int(self.debug_output.index("end-1c").split(".")[0])
+            if line_count > DEBUG_MAX_LINES:
+                self.debug_output.delete("1.0", f"{line_count - DEBUG_MAX_LINES}.0")
             self.debug_output.see("end")
-        self.debug_output.config(state="disabled")
+            self.debug_output.config(state="disabled")
         self.root.after(500, self.update_debug_log)
         
     
@@ -103,6 +137,18 @@ class LogViewerApp:
         worker_frame.pack(pady=(0, 5))
         tk.Label(worker_frame, text="Max Parallel Parses:").pack(side="left", padx=5)
         tk.Spinbox(worker_frame, from_=1, to=multiprocessing.cpu_count(), textvariable=self.worker_var, width=5, state="readonly").pack(side="left")
+        self.memory_budget_var = tk.IntVar(value=0)
+        tk.Label(worker_frame, text="Timeline Memory Budget per Bundle (MB, 0 = unlimited):").pack(side="left", padx=(15, 5))
+        tk.Spinbox(worker_frame, from_=0, to=1024 * 1024, increment=256, textvariable=self.memory_budget_var, width=7).pack(side="left")
+        window_frame = tk.Frame(self.scrollable_frame)
+        window_frame.pack(pady=(0, 5))
+        self.since_var = tk.StringVar()
+        self.until_var = tk.StringVar()
+        tk.Label(window_frame, text="Only parse entries from:").pack(side="left", padx=5)
+        tk.Entry(window_frame, textvariable=self.since_var, width=20).pack(side="left")
+        tk.Label(window_frame, text="to:").pack(side="left", padx=5)
+        tk.Entry(window_frame, textvariable=self.until_var, width=20).pack(side="left")
+        tk.Label(window_frame, text="(ISO 8601, e.g. 2024-05-16T12:00; blank = unbounded)", fg="gray").pack(side="left", padx=5)
         tk.Label(self.scrollable_frame, text="LogViewer - Aruba Log Analysis GUI", font=("Helvetica", 18, "bold"), pady=10).pack()
         self.cpu_usage_label = tk.Label(self.scrollable_frame, text="CPU Usage: 0%", fg="gray")
         self.cpu_usage_label.pack()
@@ -119,13 +165,15 @@ class LogViewerApp:
         self.tree_scroll_x = tk.Scrollbar(self.tree_frame, orient='horizontal')
         self.tree_scroll_x.pack(side=tk.BOTTOM, fill=tk.X)
 
-        self.tree = ttk.Treeview(self.tree_frame, columns=("path", "status"), show='headings', height=15,
+        self.tree = ttk.Treeview(self.tree_frame, columns=("path", "status", "progress"), show='headings', height=15,
                                  yscrollcommand=self.tree_scroll_y.set,
                                  xscrollcommand=self.tree_scroll_x.set)
         self.tree.heading("path", text="Support Bundle Path")
         self.tree.heading("status", text="Status")
-        self.tree.column("path", width=700, anchor="w")
+        self.tree.heading("progress", text="Progress")
+        self.tree.column("path", width=500, anchor="w")
         self.tree.column("status", width=100, anchor="center")
+        self.tree.column("progress", width=260, anchor="w")
         self.tree.pack(fill="both", expand=True)
         self.tree_scroll_y.config(command=self.tree.yview)
         self.tree_scroll_x.config(command=self.tree.xview)
@@ -136,20 +184,25 @@ class LogViewerApp:
         self.include_vsf = tk.BooleanVar(value=True)
         self.include_prevboot = tk.BooleanVar(value=True)
         self.include_linecards = tk.BooleanVar(value=True)
+        self.lazy_contexts = tk.BooleanVar(value=False)
+        self.record_trace = tk.BooleanVar(value=False)
 
         tk.Checkbutton(self.scrollable_frame, text="Parse Fastlogs", variable=self.include_fastlogs).pack()
         tk.Checkbutton(self.scrollable_frame, text="Parse VSF Members", variable=self.include_vsf).pack()
         tk.Checkbutton(self.scrollable_frame, text="Parse Linecard logs", variable=self.include_linecards).pack()
         tk.Checkbutton(self.scrollable_frame, text="Parse Previous Boot Logs", variable=self.include_prevboot).pack()
+        tk.Checkbutton(self.scrollable_frame, text="Parse Members/Linecards/Boots When First Viewed", variable=self.lazy_contexts).pack()
+        tk.Checkbutton(self.scrollable_frame, text="Record Parse Trace (parse_trace.json)", variable=self.record_trace).pack()
         
         tk.Button(action_frame, text="Analyze Selected", command=self.analyze_selected, bg="#28a745", fg="white").grid(row=0, column=0, padx=10)
         tk.Button(action_frame, text="Start Viewer", command=self.start_viewer, bg="#17a2b8", fg="white").grid(row=0, column=1, padx=10)
         tk.Button(action_frame, text="Stop Viewer", command=self.stop_viewer, bg="#dc3545", fg="white").grid(row=0, column=2, padx=10)
+        tk.Button(action_frame, text="Cancel Analysis", command=self.cancel_analysis, bg="#6c757d", fg="white").grid(row=0, column=3, padx=10)
 
         self.status = tk.Label(self.scrollable_frame, text="Ready", anchor="w")
         self.status.pack(fill="x")
 
-        self.progress = ttk.Progressbar(self.scrollable_frame, mode="indeterminate")
+        self.progress = ttk.Progressbar(self.scrollable_frame, mode="determinate", maximum=100)
         self.progress.pack(fill="x", padx=10)
         self.progress.stop()
         self.progress.pack_forget()
@@ -179,18 +232,62 @@ class LogViewerApp:
             self.add_bundle(file)
 
     def scan_directory(self):
+        if self.scan_in_progress:
+            self.log_debug("⚠️ A directory scan is already running.")
+            return
+        # Dialogs must run on the Tk main thread; only the filesystem walk is backgrounded.
+        folder = filedialog.askdirectory()
+        if not folder:
+            return
+
+        self.scan_in_progress = True
+        self.scan_count = 0
+        self.scan_status.config(text="Files scanned: 0")
+
         def background_scan():
-            folder = filedialog.askdirectory()
+            parsed_paths = get_parsed_paths()
             count = 0
-            if folder:
+            batch = []
+            try:
                 for path in Path(folder).rglob("*.tar.gz"):
-                    self.add_bundle(str(path))
+                    filepath = str(path)
+                    batch.append((filepath, os.path.abspath(filepath) in parsed_paths))
                     count += 1
-                self.scan_status.config(text=f"Files scanned: {count}")
-                self.log_debug(f"📦 Found {count} .tar.gz files.")
-        
+                    if len(batch) >= SCAN_BATCH_SIZE:
+                        self.scan_queue.put(batch)
+                        batch = []
+            except Exception as e:
+                self.log_debug(f"❌ Directory scan failed: {e}")
+            if batch:
+                self.scan_queue.put(batch)
+            self.scan_queue.put(None)  # end-of-scan marker
+            self.log_debug(f"📦 Found {count} .tar.gz files.")
+
         threading.Thread(target=background_scan, daemon=True).start()
-        
+        self.root.after(SCAN_BATCH_INTERVAL_MS, self.drain_scan_queue)
+
+    def drain_scan_queue(self):
+        # Runs on the Tk main thread via after(); inserts at most one batch per tick.
+        try:
+            batch = self.scan_queue.get_nowait()
+        except queue.Empty:
+            self.root.after(SCAN_BATCH_INTERVAL_MS, self.drain_scan_queue)
+            return
+
+        if batch is None:
+            self.scan_in_progress = False
+            return
+
+        added = 0
+        for filepath, analyzed in batch:
+            if self.insert_bundle_row(filepath, "Analyzed" if analyzed else "Pending"):
+                added += 1
+        skipped = len(batch) - added
+        if skipped:
+            self.log_debug(f"⚠️ Skipped {skipped} duplicate bundle(s)")
+        self.scan_count += len(batch)
+        self.scan_status.config(text=f"Files scanned: {self.scan_count}")
+        self.root.after(SCAN_BATCH_INTERVAL_MS if self.scan_queue.empty() else 1, self.drain_scan_queue)
 
     def clear_entries(self):
         selected = self.tree.selection()
@@ -203,15 +300,15 @@ class LogViewerApp:
                 return
             self.log_debug("🧹 Clearing all unprocessed (Pending/Error) entries...")
             for item in self.tree.get_children():
-                path, status = self.tree.item(item, "values")
-                if status in ("Pending", "Error"):
+                path, status = self.tree.item(item, "values")[:2]
+                if status in ("Pending", "Error", "Cancelled"):
                     to_remove.append(item)
                     self.log_debug(f"🗑️ Removing: {path} [{status}]")
         else:
             self.log_debug(f"🧹 Clearing selected {len(selected)} item(s)...")
             for item in selected:
-                path, status = self.tree.item(item, "values")
-                if status in ("Pending", "Error"):
+                path, status = self.tree.item(item, "values")[:2]
+                if status in ("Pending", "Error", "Cancelled"):
                     to_remove.append(item)
                     self.log_debug(f"🗑️ Removing: {path} [{status}]")
                 elif status == "Analyzed":
@@ -230,6 +327,8 @@ class LogViewerApp:
                         self.log_debug(f"🚫 Skipped deletion of: {path}")
 
         for item in to_remove:
+            path = self.tree.item(item, "values")[0]
+            self.tree_index.pop(path, None)
             self.tree.delete(item)
 
         self.status.config(text="Updated entries after clear operation.", fg="orange")
@@ -237,40 +336,37 @@ class LogViewerApp:
         
     
 
+    def insert_bundle_row(self, filepath, status):
+        if filepath in self.tree_index:
+            return None
+        item = self.tree.insert("", "end", values=(filepath, status, ""))
+        self.tree_index[filepath] = item
+        return item
+
     def add_bundle(self, filepath):
-        for row in self.tree.get_children():
-            if self.tree.item(row, "values")[0] == filepath:
-                self.log_debug(f"⚠️ Skipped duplicate bundle: {filepath}")
-                return
-        analyzed = filepath in get_parsed_bundles()
+        if filepath in self.tree_index:
+            self.log_debug(f"⚠️ Skipped duplicate bundle: {filepath}")
+            return
+        analyzed = os.path.abspath(filepath) in get_parsed_paths()
         status = "Analyzed" if analyzed else "Pending"
-        self.tree.insert("", "end", values=(filepath, status))
+        self.insert_bundle_row(filepath, status)
         self.log_debug(f"📥 Added bundle: {filepath} [{status}]")
 
     def load_previous_bundles(self):
         parsed = get_parsed_bundles()
         known_paths = set(parsed.keys())
 
-        existing_tree_paths = {
-            self.tree.item(item, "values")[0]
-            for item in self.tree.get_children()
-        }
-
         for bundle_path, meta in parsed.items():
-            if os.path.exists(bundle_path) and bundle_path not in existing_tree_paths:
-                self.tree.insert("", "end", values=(bundle_path, "Analyzed"))
+            if os.path.exists(bundle_path):
+                self.insert_bundle_row(bundle_path, "Analyzed")
 
         for child in Path(".").iterdir():
             if child.is_dir() and child.name.endswith("_log_analysis_results"):
-                parsed_log = child / "parsed_logs.json"
-                if parsed_log.exists():
+                if parse_complete(str(child)):
                     bundle_path = str(child)
-                    if bundle_path not in known_paths and bundle_path not in existing_tree_paths:
-                        self.tree.insert("", "end", values=(bundle_path, "Analyzed"))
+                    if os.path.abspath(bundle_path) not in known_paths and bundle_path not in self.tree_index:
+                        self.insert_bundle_row(bundle_path, "Analyzed")
                         add_parsed_bundle(bundle_path, str(child.resolve()))
-                        
-
-       
 
     def analyze_selected(self):
         selected_items = self.tree.selection()
@@ -280,9 +376,27 @@ class LogViewerApp:
 
         filepaths = [self.tree.item(item, "values")[0] for item in selected_items]
 
+        time_window = {"since": self.since_var.get().strip() or None, "until": self.until_var.get().strip() or None}
+        try:
+            TimeWindow.from_options(time_window)
+        except ValueError as e:
+            messagebox.showerror("Invalid Time Window", f"Could not use the time window: {e}")
+            return
+
+        running = [path for path in filepaths if path in self.cancel_tokens]
+        if running:
+            messagebox.showinfo("Already Analyzing", f"{len(running)} selected bundle(s) are already being analyzed.")
+            return
+
         # Update status to Analyzing in GUI
-        for item in selected_items:
+        now = time.time()
+        cancel_tokens = {}
+        for item, path in zip(selected_items, filepaths):
             self.tree.set(item, column="status", value="Analyzing")
+            self.tree.set(item, column="progress", value="Queued")
+            cancel_tokens[path] = self.cancel_tokens[path] = CancelToken()
+            self.parse_progress[path] = {"queued": now, "started": None, "stage": None, "done_stages": set(),
+                                         "planned": list(STAGES), "bytes_done": 0, "bytes_total": 0, "detail": ""}
 
         self.status.config(text="Analyzing selected bundles...", fg="blue")
         self.show_progress()
@@ -299,37 +413,138 @@ class LogViewerApp:
                     "include_fastlogs": self.include_fastlogs.get(),
                     "include_vsf": self.include_vsf.get(),
                     "include_linecards": self.include_linecards.get(),
-                    "include_prevboot": self.include_prevboot.get()
-                }
+                    "include_prevboot": self.include_prevboot.get(),
+                    "lazy_contexts": self.lazy_contexts.get(),
+                    "memory_budget_mb": self.memory_budget_mb(),
+                    **time_window
+                },
+                progress_callback=self.progress_queue.put,
+                cancel_tokens=cancel_tokens,
+                trace=self.record_trace.get()
             )
 
             self.log_debug(f"✅ Parsing completed for {len(results)} bundles.")
 
             for result in results:
-                for item in self.tree.get_children():
-                    path = self.tree.item(item, "values")[0]
-                    if path == result["path"]:
-                        if result["status"] == "Success":
-                            
-                            add_parsed_bundle(result["path"], result["output"])
-                            self.tree.set(item, column="status", value="Analyzed")
-                            self.log_debug(f"✅ Parsed {result['path']} → {result['output']}")
-                        else:
-                            self.tree.set(item, column="status", value="Error")
-                            self.log_debug(f"❌ Failed to parse {result['path']}: {result.get('error')}")
+                if result["status"] == "Success":
+                    add_parsed_bundle(result["path"], result["output"])
+                    self.log_debug(f"✅ Parsed {result['path']} → {result['output']}")
+                elif result["status"] == "Cancelled":
+                    self.log_debug(f"🛑 Cancelled parsing of {result['path']}")
+                else:
+                    self.log_debug(f"❌ Failed to parse {result['path']}: {result.get('error')}")
 
-            
+            self.root.after(0, self.apply_parse_results, results)
+
+        threading.Thread(target=background_parse, daemon=True).start()
+
+    def memory_budget_mb(self):
+        try:
+            return max(0, int(self.memory_budget_var.get())) or None
+        except (tk.TclError, ValueError):
+            return None
+
+    def apply_parse_results(self, results):
+        for result in results:
+            self.cancel_tokens.pop(result["path"], None)
+            self.parse_progress.pop(result["path"], None)
+            item = self.tree_index.get(result["path"])
+            if item is None:
+                continue
+            status = {"Success": "Analyzed", "Cancelled": "Cancelled"}.get(result["status"], "Error")
+            self.tree.set(item, column="status", value=status)
+            self.tree.set(item, column="progress", value="")
+
+        if not self.cancel_tokens:
             self.status.config(text="Done analyzing selected bundles.", fg="green")
             self.hide_progress()
 
-        threading.Thread(target=background_parse, daemon=True).start()
+    def cancel_analysis(self):
+        selected = {self.tree.item(item, "values")[0] for item in self.tree.selection()}
+        targets = [path for path in self.cancel_tokens if not selected or path in selected]
+        if not targets:
+            self.status.config(text="No running analysis to cancel", fg="orange")
+            return
+        for path in targets:
+            self.cancel_tokens[path].cancel()
+            item = self.tree_index.get(path)
+            if item is not None:
+                self.tree.set(item, column="progress", value="Cancelling...")
+        self.status.config(text=f"Cancelling {len(targets)} analysis job(s)...", fg="orange")
+        self.log_debug(f"🛑 Cancel requested for {len(targets)} bundle(s)")
+
+    def update_parse_progress(self):
+        now = time.time()
+        while not self.progress_queue.empty():
+            event = self.progress_queue.get_nowait()
+            state = self.parse_progress.get(event["bundle"])
+            if state is None:
+                continue
+            if state["started"] is None:
+                state["started"] = event["time"]
+            if event["event"] == "published" and not event["context"] and not state.get("viewable"):
+                # First artifact is committed: the bundle can be viewed while parsing continues.
+                state["viewable"] = True
+                add_parsed_bundle(event["bundle"], event["output_dir"])
+                self.log_debug(f"👀 {os.path.basename(event['bundle'])} is viewable while parsing continues")
+            if event["context"]:
+                # Nested member / linecard / boot parse: show it as detail of the top-level stage.
+                state["detail"] = f"{event['context']}: {event['stage']}"
+                continue
+            if event["event"] == "plan":
+                # Stages skipped by the options (or done by an interrupted run) don't count towards 100%.
+                state["planned"] = event["stages"]
+            elif event["event"] == "start":
+                state.update(stage=event["stage"], stage_started=event["time"], bytes_done=0, bytes_total=0, detail="")
+            elif event["event"] == "progress":
+                state["bytes_done"] = event.get("bytes_done", state["bytes_done"])
+                state["bytes_total"] = event.get("bytes_total", state["bytes_total"])
+            elif event["event"] == "end" and event["stage"] in state["planned"]:
+                state["done_stages"].add(event["stage"])
+                state["bytes_done"] = state["bytes_total"]
+
+        fractions = []
+        for path, state in self.parse_progress.items():
+            item = self.tree_index.get(path)
+            if item is None or state["started"] is None or path not in self.cancel_tokens:
+                continue
+            if self.cancel_tokens[path].cancelled:
+                continue
+            fraction = self.bundle_fraction(state)
+            fractions.append(fraction)
+            text = f"{state['stage'] or 'starting'} ({len(state['done_stages'])}/{len(state['planned'])}) {fraction * 100:.0f}%"
+            elapsed = now - state["started"]
+            if fraction > 0.02:
+                text += f" · ETA {self.format_duration(elapsed * (1 - fraction) / fraction)}"
+            if state["detail"]:
+                text += f" · {state['detail']}"
+            self.tree.set(item, column="progress", value=text)
+
+        if fractions:
+            self.progress["value"] = 100 * sum(fractions) / len(fractions)
+        self.root.after(PROGRESS_REFRESH_MS, self.update_parse_progress)
+
+    def bundle_fraction(self, state):
+        done = len(state["done_stages"])
+        current = 0.0
+        if state["stage"] and state["stage"] not in state["done_stages"] and state["bytes_total"]:
+            current = min(1.0, state["bytes_done"] / state["bytes_total"])
+        return min(1.0, (done + current) / max(1, len(state["planned"])))
+
+    def format_duration(self, seconds):
+        seconds = int(seconds)
+        if seconds >= 3600:
+            return f"{seconds // 3600}h{(seconds % 3600) // 60:02d}m"
+        if seconds >= 60:
+            return f"{seconds // 60}m{seconds % 60:02d}s"
+        return f"{seconds}s"
 
     def run_analysis(self, filepath, tree_id):
         self.status.config(text=f"Analyzing {filepath}...")
         self.show_progress()
         try:
             output_dir = f"{Path(filepath).stem}_log_analysis_results"
-            if not os.path.exists(os.path.join(output_dir, "parsed_logs.json")):
+            if not parse_complete(output_dir):
                 from logviewer import parser
                 parser.set_logger(self.log_debug)
                 parse_bundle(filepath, output_dir)
@@ -347,110 +562,85 @@ class LogViewerApp:
     def start_viewer(self):
         selected = self.tree.selection()
         if self.viewing_in_progress:
-            self.status.config(text="Viewer already running", fg="orange")
-            self.log_debug("⚠️ Viewer already running. Skipping launch.")
+            self.status.config(text="Viewer is already starting", fg="orange")
+            self.log_debug("⚠️ Viewer is already starting. Skipping launch.")
             return
 
-        parsed_bundles = get_parsed_bundles()
-        entries = []
+        # Viewer names are unique even when bundles at different paths share a file name.
+        viewable = {bundle["source"]: bundle["name"] for bundle in viewer_bundles()}
+        names = []
 
         for item in selected:
             filepath = self.tree.item(item, "values")[0]
-            meta = parsed_bundles.get(filepath)
-            if meta and os.path.exists(os.path.join(meta["output_path"], "parsed_logs.json")):
-                entries.append({
-                    "name": os.path.basename(filepath),
-                    "path": os.path.abspath(meta["output_path"])
-                })
-
-        if not entries:
+            if filepath in viewable:
+                names.append(viewable[filepath])
+
+        if not names and not viewable:
             fallback_dir = Path(".")
             recovered = []
             for child in fallback_dir.iterdir():
                 if child.is_dir() and child.name.endswith("_log_analysis_results"):
-                    parsed_path = child / "parsed_logs.json"
-                    if parsed_path.exists():
-                        recovered.append({
-                            "name": child.name,
-                            "path": str(child.resolve())
-                        })
+                    if has_timeline(str(child)):
+                        recovered.append(child.name)
                         add_parsed_bundle(str(child), str(child.resolve()))
             if recovered:
-                entries = recovered
-                self.status.config(text=f"Recovered {len(entries)} parsed bundles", fg="blue")
-                self.log_debug(f"🔄 Recovered {len(entries)} parsed bundles from fallback scan.")
+                names = recovered
+                self.status.config(text=f"Recovered {len(recovered)} parsed bundles", fg="blue")
+                self.log_debug(f"🔄 Recovered {len(recovered)} parsed bundles from fallback scan.")
             else:
                 self.status.config(text="No valid parsed bundles to view", fg="red")
                 self.log_debug("❌ No parsed bundles available to start the viewer.")
                 return
 
-        config = {
-            "mode": "carousel" if len(entries) > 1 else "single",
-            "bundle_list": entries if len(entries) > 1 else None,
-            "bundle_path": entries[0]["path"] if len(entries) == 1 else None
-        }
-
-        with open("config.json", "w") as f:
-            json.dump(config, f, indent=2)
-        self.log_debug(f"⚙️ Created config.json with {len(entries)} bundle(s)")
-
-        port = get_next_available_port()
-        self.log_debug(f"🚀 Launching Streamlit on port {port}...")
-
-        proc = subprocess.Popen(
-            ["streamlit", "run", "app.py", "--server.port", str(port)],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            creationflags=subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0
-        )
-
-        time.sleep(2)
+        # One viewer service hosts every parsed bundle; open the first selected one on it,
+        # starting the service if none is running (that can take a few seconds, so off the UI thread).
+        self.viewing_in_progress = True
+        self.status.config(text="Opening viewer...", fg="blue")
+        if len(names) > 1:
+            self.log_debug(f"ℹ️ Opening {names[0]}; the other {len(names) - 1} selected bundle(s) are in the viewer's bundle list.")
+
+        def run():
+            try:
+                url = open_viewer(names[0] if names else None)
+            except RuntimeError as e:
+                self.root.after(0, self.viewer_failed, str(e))
+            else:
+                self.root.after(0, self.viewer_opened, url)
 
-        if proc.poll() is not None:
-            out, err = proc.communicate()
-            self.status.config(text="❌ Viewer failed to launch", fg="red")
-            self.log_debug("❌ Streamlit failed to launch. Output below:")
-            self.log_debug(out.decode(errors="ignore"))
-            self.log_debug(err.decode(errors="ignore"))
-            return
+        threading.Thread(target=run, daemon=True).start()
 
-        self.running_servers["streamlit"] = (proc, port)
-        self.status.config(text=f"Viewer running on http://localhost:{port}", fg="green")
-        self.log_debug(f"✅ Viewer running at http://localhost:{port}")
-        self.viewing_in_progress = True
+    def viewer_opened(self, url):
+        self.viewing_in_progress = False
+        self.status.config(text=f"Viewer running on {url}", fg="green")
+        self.log_debug(f"✅ Viewer opened at {url}")
 
-        if os.name == "nt":
-            os.system(f"start http://localhost:{port}")
-        elif os.name == "posix":
-            os.system(f"xdg-open http://localhost:{port} 2>/dev/null &")
+    def viewer_failed(self, error):
+        self.viewing_in_progress = False
+        self.status.config(text="❌ Viewer failed to launch", fg="red")
+        self.log_debug("❌ Viewer failed to launch. Output below:")
+        self.log_debug(error)
 
     def stop_viewer(self):
-        if not self.running_servers:
+        port = stop_viewer_service()
+        if port is None:
             self.status.config(text="No viewer is currently running", fg="orange")
             self.log_debug(f"No viewer is currently running")
-            
             return
 
-        for key, (proc, port) in self.running_servers.items():
-            proc.terminate()
-            self.status.config(text=f"Stopped viewer on port {port}", fg="gray")
-            self.log_debug(f"🛑 Terminating viewer on port {port}")
-
-        self.running_servers.clear()
-        self.viewing_in_progress = False
+        self.status.config(text=f"Stopped viewer on port {port}", fg="gray")
+        self.log_debug(f"🛑 Stopped the viewer service on port {port}")
 
     def show_progress(self):
+        self.progress["value"] = 0
         self.progress.pack(fill="x", padx=10)
-        self.progress.start(10)
 
     def hide_progress(self):
-        self.progress.stop()
         self.progress.pack_forget()
 
     def on_close(self):
-        for proc, _ in self.running_servers.values():
-            proc.terminate()
-       
+        for token in self.cancel_tokens.values():
+            token.cancel()
+        # The viewer service outlives the GUI; "Stop Viewer" or `LogViewer serve --stop` ends it.
         self.root.destroy()
 
 
@@ -0,0 +1,252 @@
+# html_template.py
+#
+# The page of a static HTML export (export.py): plain HTML, CSS and JS with
+# no external assets, so it works offline from any static file server. It
+# reads html_data/manifest.json, fetches the gzip shards overlapping the
+# chosen time window (decompressed with DecompressionStream), and filters and
+# pages the loaded rows in the browser.
+
+import html
+
+INDEX_TEMPLATE = r"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>__TITLE__ · LogViewer</title>
+<style>
+  body { font-family: system-ui, sans-serif; margin: 1rem 1.5rem; color: #222; }
+  h1 { font-size: 1.4rem; margin: 0 0 .25rem; }
+  .muted { color: #666; font-size: .85rem; }
+  form { display: flex; flex-wrap: wrap; gap: .75rem; align-items: end; margin: 1rem 0 .5rem; }
+  label { display: flex; flex-direction: column; font-size: .8rem; color: #444; gap: .2rem; }
+  input, select, button { font: inherit; padding: .25rem .4rem; }
+  table { border-collapse: collapse; width: 100%; font-size: .85rem; }
+  th, td { border-bottom: 1px solid #ddd; padding: .2rem .4rem; text-align: left; vertical-align: top; }
+  th { background: #f4f4f4; position: sticky; top: 0; }
+  td.message { white-space: pre-wrap; font-family: ui-monospace, monospace; }
+  td.nowrap { white-space: nowrap; }
+  tr.LOG_ERR, tr.LOG_CRIT, tr.LOG_ALERT, tr.LOG_EMERG { background: #fdecea; }
+  tr.LOG_WARN, tr.LOG_WARNING { background: #fff8e1; }
+  #pager { margin: .5rem 0; display: flex; gap: .5rem; align-items: center; }
+</style>
+</head>
+<body>
+<h1>📋 __TITLE__</h1>
+<div class="muted" id="generated"></div>
+<form id="window" onsubmit="return false">
+  <label>Context <select id="context"></select></label>
+  <label>From (UTC) <input type="datetime-local" id="from" step="60"></label>
+  <label>To (UTC) <input type="datetime-local" id="to" step="60"></label>
+  <button id="load" type="submit">Load</button>
+  <label>Keyword <input type="search" id="keyword" placeholder="substring, any case"></label>
+  <label>Severity <select id="severity"><option value="">All</option></select></label>
+  <label>Process <select id="process"><option value="">All</option></select></label>
+  <label>&nbsp;<span><input type="checkbox" id="fastlogs" checked> Fastlogs</span></label>
+</form>
+<div class="muted" id="span"></div>
+<div class="muted" id="status">Loading manifest…</div>
+<div id="pager">
+  <button id="previous" type="button">⬅️ Previous</button>
+  <button id="next" type="button">Next ➡️</button>
+  <span class="muted" id="showing"></span>
+</div>
+<table>
+  <thead><tr id="header"></tr></thead>
+  <tbody id="rows"></tbody>
+</table>
+<script>
+"use strict";
+const DATA = "html_data/";
+const PAGE_ROWS = 500;
+const CACHE_SHARDS = 24;  // loaded shards kept around beyond those of the current window
+const ALL = "__all__";
+const [TIMESTAMP, SEVERITY, PROCESS, EVENT_ID, SOURCE, MESSAGE, CONTEXT] = [0, 1, 2, 3, 4, 5, 6];
+const $ = (id) => document.getElementById(id);
+const cache = new Map();  // shard file -> Promise of its rows
+let manifest = null, rows = [], filtered = [], page = 0, shardsLoaded = 0, shardsTotal = 0, multi = false;
+
+async function fetchShard(file) {
+  if (cache.has(file)) return cache.get(file);
+  const promise = (async () => {
+    const response = await fetch(DATA + file);
+    if (!response.ok) throw new Error(`${file}: HTTP ${response.status}`);
+    let bytes = new Uint8Array(await response.arrayBuffer());
+    if (bytes[0] === 0x1f && bytes[1] === 0x8b) {  // servers may already have undone the gzip
+      const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("gzip"));
+      bytes = new Uint8Array(await new Response(stream).arrayBuffer());
+    }
+    return JSON.parse(new TextDecoder().decode(bytes));
+  })();
+  cache.set(file, promise);
+  promise.catch(() => cache.delete(file));
+  return promise;
+}
+
+// Timestamps are UTC ISO strings, so windows compare on their first 19 characters.
+function bound(value, seconds) {
+  if (!value) return null;
+  return value.length === 16 ? value + seconds : value.slice(0, 19);
+}
+
+function overlaps(shard, since, until) {
+  if (!shard.first) return !since && !until;
+  return !(until && shard.first.slice(0, 19) > until) && !(since && shard.last.slice(0, 19) < since);
+}
+
+function compareTimestamps(a, b) {
+  if (a === b) return 0;
+  if (a === null) return 1;
+  if (b === null) return -1;
+  return a < b ? -1 : 1;
+}
+
+function selectedContexts() {
+  const value = $("context").value;
+  return value === ALL ? manifest.contexts : [manifest.contexts[Number(value)]];
+}
+
+function showSpan() {
+  const contexts = selectedContexts();
+  const firsts = contexts.map((c) => c.first).filter(Boolean).sort();
+  const lasts = contexts.map((c) => c.last).filter(Boolean).sort();
+  const rowsTotal = contexts.reduce((sum, c) => sum + c.rows, 0);
+  $("span").textContent = firsts.length
+    ? `${rowsTotal.toLocaleString()} rows from ${firsts[0].slice(0, 19)} to ${lasts[lasts.length - 1].slice(0, 19)} UTC`
+    : `${rowsTotal.toLocaleString()} rows`;
+}
+
+async function load() {
+  const contexts = selectedContexts();
+  const since = bound($("from").value, ":00"), until = bound($("to").value, ":59");
+  const wanted = [];
+  shardsTotal = 0;
+  for (const context of contexts) {
+    shardsTotal += context.shards.length;
+    for (const shard of context.shards) if (overlaps(shard, since, until)) wanted.push([context, shard]);
+  }
+  $("status").textContent = `Loading ${wanted.length} shard(s)…`;
+  let parts;
+  try {
+    parts = await Promise.all(wanted.map(([context, shard]) => fetchShard(shard.file).then((data) => [context, data])));
+  } catch (error) {
+    $("status").textContent = `❌ ${error.message}`;
+    return;
+  }
+  const keep = new Set(wanted.map(([, shard]) => shard.file));
+  for (const file of cache.keys()) {
+    if (cache.size <= keep.size + CACHE_SHARDS) break;
+    if (!keep.has(file)) cache.delete(file);
+  }
+  multi = contexts.length > 1;
+  rows = [];
+  for (const [context, data] of parts) {
+    for (const row of data) {
+      const key = row[TIMESTAMP] ? row[TIMESTAMP].slice(0, 19) : null;
+      if (key === null ? (since || until) : (since && key < since) || (until && key > until)) continue;
+      row[CONTEXT] = context.context;
+      rows.push(row);
+    }
+  }
+  if (multi) rows.sort((a, b) => compareTimestamps(a[TIMESTAMP], b[TIMESTAMP]));
+  shardsLoaded = wanted.length;
+  fillOptions("severity", SEVERITY);
+  fillOptions("process", PROCESS);
+  applyFilters();
+}
+
+function fillOptions(id, column) {
+  const select = $(id), current = select.value;
+  const values = [...new Set(rows.map((row) => row[column]).filter((v) => v !== null && v !== undefined))].sort();
+  select.replaceChildren(new Option("All", ""), ...values.map((v) => new Option(v, v)));
+  select.value = values.includes(current) ? current : "";
+}
+
+function applyFilters() {
+  const keyword = $("keyword").value.toLowerCase();
+  const severity = $("severity").value, process = $("process").value, fastlogs = $("fastlogs").checked;
+  filtered = rows.filter((row) =>
+    (!severity || row[SEVERITY] === severity) &&
+    (!process || row[PROCESS] === process) &&
+    (fastlogs || row[SOURCE] !== "fastlog") &&
+    (!keyword || (typeof row[MESSAGE] === "string" && row[MESSAGE].toLowerCase().includes(keyword))));
+  page = 0;
+  render();
+}
+
+function cell(text, className) {
+  const td = document.createElement("td");
+  td.textContent = text === null || text === undefined ? "" : String(text);
+  if (className) td.className = className;
+  return td;
+}
+
+function render() {
+  const columns = ["Timestamp", ...(multi ? ["Context"] : []), "Severity", "Process", "Event ID", "Message"];
+  $("header").replaceChildren(...columns.map((name) => {
+    const th = document.createElement("th");
+    th.textContent = name;
+    return th;
+  }));
+  const start = page * PAGE_ROWS, shown = filtered.slice(start, start + PAGE_ROWS);
+  $("rows").replaceChildren(...shown.map((row) => {
+    const tr = document.createElement("tr");
+    if (row[SEVERITY]) tr.className = row[SEVERITY];
+    tr.append(cell(row[TIMESTAMP] && row[TIMESTAMP].slice(0, 26).replace("T", " "), "nowrap"));
+    if (multi) tr.append(cell(row[CONTEXT], "nowrap"));
+    tr.append(cell(row[SEVERITY]), cell(row[PROCESS]), cell(row[EVENT_ID]), cell(row[MESSAGE], "message"));
+    return tr;
+  }));
+  $("status").textContent = `${shardsLoaded} of ${shardsTotal} shard(s) loaded · ` +
+    `${rows.length.toLocaleString()} rows in window · ${filtered.length.toLocaleString()} match`;
+  $("showing").textContent = filtered.length
+    ? `rows ${(start + 1).toLocaleString()}–${(start + shown.length).toLocaleString()}` : "";
+  $("previous").disabled = page === 0;
+  $("next").disabled = start + PAGE_ROWS >= filtered.length;
+}
+
+function latestWindow() {
+  // Default to the latest shard of the selected context(s): one fetch to first paint.
+  const shards = selectedContexts().flatMap((c) => c.shards).filter((s) => s.first);
+  if (!shards.length) return;
+  const latest = shards.reduce((a, b) => (a.last > b.last ? a : b));
+  $("from").value = latest.first.slice(0, 16);
+  $("to").value = latest.last.slice(0, 16);
+}
+
+async function main() {
+  const response = await fetch(DATA + "manifest.json");
+  if (!response.ok) {
+    $("status").textContent = `❌ Cannot read ${DATA}manifest.json (HTTP ${response.status}); serve this folder over HTTP.`;
+    return;
+  }
+  manifest = await response.json();
+  $("generated").textContent = `Exported ${manifest.generated} · ${manifest.contexts.length} context(s)`;
+  $("context").replaceChildren(
+    ...manifest.contexts.map((c, i) => new Option(c.context, String(i))),
+    ...(manifest.contexts.length > 1 ? [new Option("All contexts (merged)", ALL)] : []));
+  $("context").addEventListener("change", () => { showSpan(); load(); });
+  $("load").addEventListener("click", load);
+  for (const id of ["severity", "process", "fastlogs"]) $(id).addEventListener("change", applyFilters);
+  let typing = null;
+  $("keyword").addEventListener("input", () => { clearTimeout(typing); typing = setTimeout(applyFilters, 200); });
+  $("previous").addEventListener("click", () => { page -= 1; render(); });
+  $("next").addEventListener("click", () => { page += 1; render(); });
+  if (!manifest.contexts.length) {
+    $("status").textContent = "No logs were exported.";
+    return;
+  }
+  showSpan();
+  latestWindow();
+  await load();
+}
+
+main().catch((error) => { $("status").textContent = `❌ ${error.message}`; });
+</script>
+</body>
+</html>
+"""
+
+
+def render_index(title):
+    """The export's index.html, titled with the bundle name."""
+    return INDEX_TEMPLATE.replace("__TITLE__", html.escape(title))
@@ -0,0 +1,284 @@
+# job.py
+
+import os
+import shutil
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from logviewer.metrics import ParseMetrics, child_cpu_seconds
+from logviewer.trace import now_us
+from logviewer.diagnostics import WarningCounter
+from logviewer.timeline import Timeline
+
+# Top-level stages of parse_bundle, in the order they run.
+STAGES = ["extract", "event_logs", "fastlogs", "showtech", "linecards", "members", "prev_boots"]
+
+PROGRESS_INTERVAL = 0.25  # seconds between throttled progress events per stage
+
+
+class ParseCancelled(Exception):
+    pass
+
+
+class CancelToken:
+    """Cooperative cancellation shared by every collector of one or more parse jobs.
+
+    Child processes and scratch paths registered here are killed / removed when
+    the token is cancelled, so a cancelled parse does not leave fastlogParser
+    processes or tmp_extracted debris behind.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._processes = set()
+        self._scratch = set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        self._event.set()
+        with self._lock:
+            processes = list(self._processes)
+        for proc in processes:
+            try:
+                proc.kill()
+            except Exception:
+                pass
+
+    def check(self):
+        if self._event.is_set():
+            raise ParseCancelled()
+
+    def register_process(self, proc):
+        with self._lock:
+            self._processes.add(proc)
+        if self._event.is_set():
+            proc.kill()
+
+    def unregister_process(self, proc):
+        with self._lock:
+            self._processes.discard(proc)
+
+    def register_scratch(self, path):
+        with self._lock:
+            self._scratch.add(path)
+
+    def release_scratch(self, path):
+        with self._lock:
+            self._scratch.discard(path)
+
+    def cleanup_scratch(self):
+        with self._lock:
+            paths = list(self._scratch)
+            self._scratch.clear()
+        for path in paths:
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            elif os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+class ParseJob:
+    """Per-parse runtime state handed to parse_bundle and its collectors.
+
+    Progress is reported as plain dicts passed to ``progress_callback``:
+
+        {"bundle": ..., "context": ..., "stage": ..., "event": "start" | "progress" | "end",
+         "bytes_done": int, "bytes_total": int, "entries": int, "time": float}
+
+    A parse first announces the top-level stages it will run with a
+    ``"plan"`` event carrying ``"stages"`` (a subset of STAGES, in order).
+
+    ``context`` is ``""`` for the main bundle and e.g. ``"members/mem_2"`` for
+    nested member, linecard and boot parses.
+    """
+
+    def __init__(self, bundle="", progress_callback=None, cancel_token=None, context="", tracer=None, strings=None,
+                 options=None, budget=None, window=None, resume=False):
+        self.bundle = bundle
+        self.options = options or {}
+        self.budget = budget  # MemoryBudget shared by every Timeline of the parse, or None
+        self.window = window  # TimeWindow from the since/until options, or None
+        self.resume = resume  # continue an interrupted parse from its journal and manifest
+        self.journal = None  # ParseJournal of this context's output dir, set when collecting starts
+        self.sources = None  # SourceTable of this context's output dir, set when collecting starts
+        self.context = context
+        self.progress_callback = progress_callback
+        self.cancel_token = cancel_token or CancelToken()
+        self.tracer = tracer
+        # Intern table for repeated field values, shared by every Timeline of the parse.
+        self.strings = strings if strings is not None else {}
+        self._last_progress = {}
+        self.warnings = WarningCounter()
+        self.metrics = ParseMetrics(bundle, context, self.warnings)
+
+    def child(self, context):
+        context = f"{self.context}/{context}" if self.context else context
+        return ParseJob(self.bundle, self.progress_callback, self.cancel_token, context, self.tracer, self.strings,
+                        self.options, self.budget, self.window, self.resume)
+
+    def timeline(self):
+        return Timeline(self.strings, self.budget)
+
+    @contextmanager
+    def span(self, name, cat="parse", **args):
+        if self.tracer is None:
+            yield self
+            return
+        args["bundle"] = os.path.basename(self.bundle)
+        if self.context:
+            args["context"] = self.context
+        with self.tracer.span(name, cat, args):
+            yield self
+
+    def check(self):
+        self.cancel_token.check()
+
+    def emit(self, stage, event, **fields):
+        if not self.progress_callback:
+            return
+        payload = {
+            "bundle": self.bundle,
+            "context": self.context,
+            "stage": stage,
+            "event": event,
+            "time": time.time(),
+        }
+        payload.update(fields)
+        try:
+            self.progress_callback(payload)
+        except Exception:
+            pass
+
+    def plan(self, stages):
+        """Announce the top-level stages this parse will run; stages left out (by options or a resume) never start."""
+        self.emit("", "plan", stages=list(stages))
+
+    def progress(self, stage, bytes_done=None, bytes_total=None, entries=None, force=False):
+        if not self.progress_callback:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_progress.get(stage, 0) < PROGRESS_INTERVAL:
+            return
+        self._last_progress[stage] = now
+        fields = {}
+        if bytes_done is not None:
+            fields["bytes_done"] = bytes_done
+        if bytes_total is not None:
+            fields["bytes_total"] = bytes_total
+        if entries is not None:
+            fields["entries"] = entries
+        self.emit(stage, "progress", **fields)
+
+    @contextmanager
+    def timed(self, name):
+        """Record wall and CPU time of a block under ``name`` in this job's metrics.
+
+        CPU time is process-wide, so stages running concurrently on other
+        threads are included; child_cpu_s covers reaped child processes.
+        """
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        child_start = child_cpu_seconds()
+        try:
+            with self.span(name, cat="stage"):
+                yield self
+        finally:
+            self.metrics.record_stage(
+                name,
+                time.perf_counter() - wall_start,
+                time.process_time() - cpu_start,
+                child_cpu_seconds() - child_start,
+            )
+
+    @contextmanager
+    def stage(self, name):
+        self.check()
+        self.emit(name, "start")
+        status = "done"
+        try:
+            with self.timed(name):
+                yield self
+        except ParseCancelled:
+            status = "cancelled"
+            raise
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            self.emit(name, "end", status=status)
+        self.check()
+
+    def run_process(self, cmd, label="subprocess", **kwargs):
+        """Run a child process to completion, killing it if the job is cancelled."""
+        self.check()
+        started = time.perf_counter()
+        started_us = now_us()
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, **kwargs)
+        self.metrics.process_started()
+        self.cancel_token.register_process(proc)
+        try:
+            with self.span(label, cat="subprocess", pid=proc.pid):
+                stdout, _ = proc.communicate()
+        finally:
+            self.cancel_token.unregister_process(proc)
+            self.metrics.process_finished(label, time.perf_counter() - started)
+            if self.tracer is not None:
+                self.tracer.add_process_span(label, proc.pid, started_us, now_us(),
+                                             {"cmd": " ".join(str(part) for part in cmd)})
+        self.check()
+        return stdout
+
+    @contextmanager
+    def scratch(self, path):
+        """Track a scratch file/dir and remove it when the block exits, cancelled or not."""
+        self.cancel_token.register_scratch(path)
+        try:
+            yield path
+        finally:
+            self.cancel_token.release_scratch(path)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            elif os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+def run_parallel(fns, on_error=None):
+    """Run callables on their own threads and wait for all of them.
+
+    A cancellation raised in any thread is re-raised once every thread has
+    joined; other failures are handed to ``on_error`` so one broken collector
+    does not abort the whole parse.
+    """
+    errors = []
+
+    def wrap(fn):
+        def runner():
+            try:
+                fn()
+            except BaseException as e:
+                errors.append(e)
+        return runner
+
+    threads = [threading.Thread(target=wrap(fn)) for fn in fns]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for e in errors:
+        if isinstance(e, ParseCancelled):
+            raise e
+    if on_error:
+        for e in errors:
+            on_error(e)
@@ -0,0 +1,88 @@
+# journal.py
+#
+# parse_journal.jsonl in an output dir: an append-only record of the work a
+# parse has finished (the extracted bundle, each parsed event log file, each
+# decoded supportlog), so a parse that crashed or was cancelled can resume
+# where it stopped. Parsed rows are kept next to it under checkpoints/.
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+JOURNAL_FILE = "parse_journal.jsonl"
+CHECKPOINT_DIR = "checkpoints"
+
+
+def read_journal(path):
+    """Return ``{(kind, key): entry}``; a line torn by a crash ends the journal."""
+    entries = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                entries[(entry["kind"], entry["key"])] = entry
+    except OSError:
+        pass
+    return entries
+
+
+class ParseJournal:
+    """Completed work of one context's parse. Without ``resume`` any previous journal is discarded."""
+
+    def __init__(self, output_dir, resume=False):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, JOURNAL_FILE)
+        self.checkpoint_dir = os.path.join(output_dir, CHECKPOINT_DIR)
+        self._lock = threading.Lock()
+        self._entries = {}
+        if resume:
+            self._entries = read_journal(self.path)
+        else:
+            self.clear()
+
+    def get(self, kind, key):
+        return self._entries.get((kind, key))
+
+    def record(self, kind, key, **fields):
+        """Append a completed unit of work; it is on disk before this returns."""
+        entry = {"kind": kind, "key": key, **fields}
+        with self._lock:
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._entries[(kind, key)] = entry
+        return entry
+
+    def save_timeline(self, kind, key, timeline, **fields):
+        """Checkpoint the rows parsed from one source, then journal it as done."""
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        name = hashlib.sha1(f"{kind}:{key}".encode()).hexdigest()[:16] + ".pkl"
+        path = os.path.join(self.checkpoint_dir, name)
+        timeline.dump(path + ".tmp")
+        os.replace(path + ".tmp", path)
+        return self.record(kind, key, checkpoint=name, **fields)
+
+    def load_timeline(self, entry, timeline):
+        """Append a checkpoint's rows to ``timeline``; False if it is missing."""
+        path = os.path.join(self.checkpoint_dir, entry.get("checkpoint", ""))
+        if not entry.get("checkpoint") or not os.path.exists(path):
+            return False
+        timeline.load(path)
+        return True
+
+    def drop_checkpoints(self):
+        """Remove the row checkpoints once the timeline they feed has been committed."""
+        shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
+
+    def clear(self):
+        self.drop_checkpoints()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self._entries = {}
@@ -0,0 +1,95 @@
+# manifest.py
+#
+# manifest.json in a parsed bundle's output dir: the options it was parsed
+# with, which of its artifacts are ready, and the nested contexts (members,
+# linecards, boots) it contains.
+
+import json
+import os
+import threading
+
+from logviewer.partitions import has_timeline
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+# Artifacts published by parse_bundle, in the order they become ready.
+ARTIFACT_STAGES = ["event_logs", "timeline", "showtech", "diag", "linecards", "members", "prev_boots"]
+
+_lock = threading.Lock()
+
+
+def manifest_path(output_dir):
+    return os.path.join(output_dir, MANIFEST_FILE)
+
+
+def load_manifest(output_dir):
+    """Return the manifest of an output dir; outputs parsed before manifests get an empty one."""
+    try:
+        with open(manifest_path(output_dir)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    manifest.setdefault("version", MANIFEST_VERSION)
+    manifest.setdefault("options", {})
+    manifest.setdefault("stages", {})
+    manifest.setdefault("contexts", {})
+    return manifest
+
+
+def write_json_atomic(path, data):
+    """Write JSON to a temp file and rename it into place, so readers never see a partial file."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def write_manifest(output_dir, manifest):
+    os.makedirs(output_dir, exist_ok=True)
+    write_json_atomic(manifest_path(output_dir), manifest)
+
+
+def update_manifest(output_dir, update):
+    """Load, apply ``update(manifest)`` and write back under a process-wide lock."""
+    with _lock:
+        manifest = load_manifest(output_dir)
+        update(manifest)
+        write_manifest(output_dir, manifest)
+        return manifest
+
+
+def set_status(output_dir, status):
+    """Overall parse status: "parsing", "complete", "cancelled" or "failed"."""
+    return update_manifest(output_dir, lambda m: m.update(status=status))
+
+
+def set_stage(output_dir, stage, status):
+    """Status of one published artifact stage: "running" or "done"."""
+    return update_manifest(output_dir, lambda m: m["stages"].update({stage: status}))
+
+
+def set_context(output_dir, context, **fields):
+    """Create or update the entry of a nested context, e.g. ``members/mem_1``."""
+    return update_manifest(output_dir, lambda m: m["contexts"].setdefault(context, {}).update(fields))
+
+
+def pending_contexts(output_dir):
+    """Nested contexts recorded by a lazy parse that have not been parsed yet."""
+    return {context: entry for context, entry in load_manifest(output_dir)["contexts"].items()
+            if entry.get("status") != "parsed"}
+
+
+def parse_complete(output_dir):
+    """True when an output dir holds a finished parse, not one that stopped halfway."""
+    if not has_timeline(output_dir):
+        return False
+    # Outputs written before manifests have no status but were only kept once complete.
+    return load_manifest(output_dir).get("status") in (None, "complete")
+
+
+def can_resume(manifest, bundle_path, options):
+    """True when the manifest was left by an interrupted parse of the same bundle with the same options."""
+    return (manifest.get("status") in ("parsing", "cancelled", "failed")
+            and manifest.get("bundle") == os.path.abspath(bundle_path)
+            and manifest.get("options") == json.loads(json.dumps(options)))
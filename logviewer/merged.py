@@ -0,0 +1,187 @@
+# merged.py
+#
+# One timeline for a whole bundle: the main context, VSF members, linecards
+# and previous boots k-way merged by timestamp, each row tagged with where it
+# came from. Nothing is materialized: a page is read by seeking every
+# context to a cursor (its next record number) through its partitions and
+# chunk index (partitions.py, chunks.py) and merging forward from there, so
+# a page costs about a chunk per context however far into the stream it is.
+# The merge behind the last page served is kept, so paging forward just
+# continues it.
+
+import heapq
+import itertools
+import threading
+from datetime import datetime
+
+from logviewer.chunks import ChunkIndex
+from logviewer.partitions import timeline_parts
+from logviewer.search import context_dirs
+from logviewer.timeline import (LEGACY_TIMELINE_FILE, find_timeline, iter_timeline, iter_timeline_chunks,
+                                record_epoch_us, to_epoch_us)
+
+NO_TIMESTAMP = float("inf")  # rows without a usable timestamp sort last
+CONTEXT_TAGS = {"members": "member", "linecards": "linecard", "previous": "boot"}
+
+
+def context_tags(context):
+    """``{"context", "member", "linecard", "boot"}`` of a context path like ``members/mem_1/previous/boot2``."""
+    tags = {"context": context or "main", "member": None, "linecard": None, "boot": "current"}
+    parts = context.split("/") if context else []
+    for parent, name in zip(parts[::2], parts[1::2]):
+        tags[CONTEXT_TAGS[parent]] = name
+    return tags
+
+
+def _timestamp_us(record):
+    try:
+        return record_epoch_us(record)
+    except (KeyError, TypeError, ValueError):
+        return NO_TIMESTAMP
+
+
+def _epoch_us(timestamp):
+    return to_epoch_us(datetime.fromisoformat(timestamp)) if timestamp else None
+
+
+class _Part:
+    """One timeline file of a context, with its chunk index when it has a current one."""
+
+    def __init__(self, path, timeline, offset):
+        self.timeline = timeline
+        self.offset = offset  # record number of its first record within the context
+        self.chunks = ChunkIndex.load(path, timeline) if not timeline.endswith(LEGACY_TIMELINE_FILE) else None
+        if self.chunks is not None:
+            self.rows = self.chunks.rows
+            dated = [chunk for chunk in self.chunks.chunks if chunk["first"]]
+            self.first = dated[0]["first"] if dated else None
+            self.last = dated[-1]["last"] if dated else None
+        else:
+            # Timelines from before chunk indexes are read through once to size them.
+            self.rows, self.first, self.last = 0, None, None
+            for record in iter_timeline(timeline):
+                self.rows += 1
+                timestamp = record.get("timestamp")
+                if timestamp:
+                    self.first = self.first or timestamp
+                    self.last = timestamp
+
+    def iter_from(self, row=0):
+        """Yield ``(record number, record)`` from record number ``row`` of this part on."""
+        if self.chunks is not None:
+            start = self.chunks.chunk_of(row)
+            if start is None:
+                return
+            records = iter_timeline_chunks(self.timeline, self.chunks, range(start, len(self.chunks.chunks)))
+        else:
+            records = enumerate(iter_timeline(self.timeline))
+        for local, record in records:
+            if local >= row:
+                yield self.offset + local, record
+
+    def seek(self, since_us):
+        """Record number of the first record at or after ``since_us``, or None when there is none."""
+        row = 0
+        if self.chunks is not None:
+            # Chunks are in timestamp order: start at the first one not wholly before.
+            for chunk in self.chunks.chunks:
+                if chunk["last"] and _epoch_us(chunk["last"]) < since_us:
+                    row = chunk["first_row"] + chunk["rows"]
+                else:
+                    break
+        for number, record in self.iter_from(row):
+            if _timestamp_us(record) >= since_us:
+                return number
+        return None
+
+
+class ContextReader:
+    """Seekable sequential reads of one context's timeline, partitioned or not."""
+
+    def __init__(self, path):
+        self.parts = []
+        offset = 0
+        for part_dir in timeline_parts(path):
+            timeline = find_timeline(part_dir)
+            if timeline is not None:
+                part = _Part(part_dir, timeline, offset)
+                self.parts.append(part)
+                offset += part.rows
+        self.rows = offset
+
+    def span(self):
+        dated = [part for part in self.parts if part.first]
+        return (dated[0].first, dated[-1].last) if dated else (None, None)
+
+    def iter_from(self, row=0):
+        for part in self.parts:
+            if row < part.offset + part.rows:
+                yield from part.iter_from(max(0, row - part.offset))
+
+    def seek(self, since_us):
+        """Record number of the first record at or after ``since_us``; ``rows`` when there is none."""
+        for part in self.parts:
+            if part.last is not None and _epoch_us(part.last) < since_us:
+                continue
+            row = part.seek(since_us)
+            if row is not None:
+                return row
+        return self.rows
+
+
+def _keyed(number, rows):
+    for row, record in rows:
+        yield _timestamp_us(record), number, row, record
+
+
+class MergedTimeline:
+    """The contexts ``[(context, path)]`` of a bundle as one stream in timestamp order.
+
+    A cursor is a tuple of the next record number of every context; the sum
+    of its entries is the number of merged rows before it. Equal timestamps
+    keep the order of the contexts.
+    """
+
+    def __init__(self, contexts):
+        self.contexts = [context for context, _ in contexts]
+        self.readers = [ContextReader(path) for _, path in contexts]
+        self.tags = [context_tags(context) for context in self.contexts]
+        self.rows = sum(reader.rows for reader in self.readers)
+        self._live = None  # (cursor, merge) of the page after the last one served
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_bundle(cls, output_dir, contexts=None):
+        """Every parsed context of a bundle's output dir, or just those named in ``contexts``."""
+        return cls([(context, path) for context, path in context_dirs(output_dir)
+                    if contexts is None or context in contexts])
+
+    def span(self):
+        """First and last timestamp over all contexts, or (None, None)."""
+        spans = [reader.span() for reader in self.readers]
+        firsts = [first for first, _ in spans if first]
+        lasts = [last for _, last in spans if last]
+        return (min(firsts, key=_epoch_us) if firsts else None, max(lasts, key=_epoch_us) if lasts else None)
+
+    def start(self):
+        return tuple(0 for _ in self.readers)
+
+    def seek(self, since_us):
+        """The cursor of the first merged row at or after ``since_us``."""
+        return tuple(reader.seek(since_us) for reader in self.readers)
+
+    def page(self, cursor, size):
+        """The ``size`` merged rows from ``cursor`` on, tagged with their context, and the cursor after them."""
+        with self._lock:
+            if self._live is not None and self._live[0] == cursor:
+                merged = self._live[1]
+            else:
+                merged = heapq.merge(*(_keyed(number, reader.iter_from(row))
+                                       for number, (reader, row) in enumerate(zip(self.readers, cursor))))
+            position = list(cursor)
+            rows = []
+            for _, number, row, record in itertools.islice(merged, size):
+                position[number] = row + 1
+                rows.append({**record, **self.tags[number]})
+            self._live = (tuple(position), merged)
+        return rows, tuple(position)
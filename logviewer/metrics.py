@@ -0,0 +1,239 @@
+# metrics.py
+
+import json
+import os
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+METRICS_FILE = "parse_metrics.json"
+# Incremental updates of a parsed bundle keep their metrics next to the full parse's, one file per update.
+UPDATE_METRICS_PREFIX = "parse_metrics.update-"
+
+
+def peak_rss_bytes():
+    if resource is not None:
+        # ru_maxrss is KiB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss)
+    return None
+
+
+def child_cpu_seconds():
+    if resource is not None:
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        return usage.ru_utime + usage.ru_stime
+    return 0.0
+
+
+class PatternStats:
+    """Lines scanned vs matched per named regex pattern.
+
+    Counters are plain ints updated without locking; each collector thread
+    uses its own instance and merges it into ParseMetrics when done.
+    """
+
+    def __init__(self, names):
+        self.names = list(names)
+        self.scanned = [0] * len(self.names)
+        self.matched = [0] * len(self.names)
+
+    def hit(self, index, matched):
+        self.scanned[index] += 1
+        if matched:
+            self.matched[index] += 1
+
+    def add(self, index, scanned, matched):
+        self.scanned[index] += scanned
+        self.matched[index] += matched
+
+
+class ParseMetrics:
+    def __init__(self, bundle="", context="", warnings=None):
+        self.bundle = bundle
+        self.context = context
+        self.warnings = warnings
+        self.run = "parse"  # or "update" for an incremental update of a parsed bundle
+        self.started = time.time()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        self._lock = threading.Lock()
+        self.stages = {}
+        self.bytes_read = {}
+        self.bytes_written = {}
+        self.patterns = {}
+        self.subprocesses = {}
+        self.entries = {}
+        self.peak_threads = threading.active_count()
+        self.peak_child_processes = 0
+        self._running_children = 0
+        self.spill = None
+
+    def record_stage(self, name, wall, cpu, child_cpu):
+        with self._lock:
+            stage = self.stages.setdefault(name, {"wall_s": 0.0, "cpu_s": 0.0, "child_cpu_s": 0.0, "runs": 0})
+            stage["wall_s"] += wall
+            stage["cpu_s"] += cpu
+            stage["child_cpu_s"] += child_cpu
+            stage["runs"] += 1
+        self.sample_threads()
+
+    def add_bytes_read(self, stage, count):
+        with self._lock:
+            self.bytes_read[stage] = self.bytes_read.get(stage, 0) + count
+
+    def add_bytes_written(self, stage, count):
+        with self._lock:
+            self.bytes_written[stage] = self.bytes_written.get(stage, 0) + count
+
+    def add_entries(self, stage, count):
+        with self._lock:
+            self.entries[stage] = self.entries.get(stage, 0) + count
+
+    def merge_patterns(self, stats):
+        with self._lock:
+            for name, scanned, matched in zip(stats.names, stats.scanned, stats.matched):
+                counts = self.patterns.setdefault(name, {"scanned": 0, "matched": 0})
+                counts["scanned"] += scanned
+                counts["matched"] += matched
+
+    def process_started(self):
+        with self._lock:
+            self._running_children += 1
+            self.peak_child_processes = max(self.peak_child_processes, self._running_children)
+        self.sample_threads()
+
+    def process_finished(self, label, wall):
+        with self._lock:
+            self._running_children -= 1
+            proc = self.subprocesses.setdefault(label, {"count": 0, "wall_s": 0.0})
+            proc["count"] += 1
+            proc["wall_s"] += wall
+
+    def record_spill(self, budget):
+        self.spill = {
+            "limit_bytes": budget.limit_bytes,
+            "peak_bytes": budget.peak_bytes,
+            "runs": budget.spilled_runs,
+            "rows": budget.spilled_rows,
+        }
+
+    def sample_threads(self):
+        count = threading.active_count()
+        if count > self.peak_threads:
+            self.peak_threads = count
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "bundle": self.bundle,
+                "context": self.context,
+                "run": self.run,
+                "started": self.started,
+                "wall_s": round(time.perf_counter() - self._wall_start, 6),
+                "cpu_s": round(time.process_time() - self._cpu_start, 6),
+                "stages": {name: {k: round(v, 6) if isinstance(v, float) else v for k, v in stage.items()}
+                           for name, stage in self.stages.items()},
+                "bytes_read": dict(self.bytes_read),
+                "bytes_written": dict(self.bytes_written),
+                "entries": dict(self.entries),
+                "patterns": {name: dict(counts) for name, counts in self.patterns.items()},
+                "subprocesses": {label: {"count": p["count"], "wall_s": round(p["wall_s"], 6)}
+                                 for label, p in self.subprocesses.items()},
+                "peak_threads": self.peak_threads,
+                "peak_child_processes": self.peak_child_processes,
+                "peak_rss_bytes": peak_rss_bytes(),
+                "warnings": self.warnings.to_dict() if self.warnings is not None else {},
+                "spill": self.spill,
+            }
+
+    def write(self, output_dir):
+        """Write ``parse_metrics.json``; an update writes its own ``parse_metrics.update-<time>.json`` instead."""
+        os.makedirs(output_dir, exist_ok=True)
+        name = METRICS_FILE
+        if self.run == "update":
+            name = f"{UPDATE_METRICS_PREFIX}{time.strftime('%Y%m%dT%H%M%S', time.localtime(self.started))}.json"
+        with open(os.path.join(output_dir, name), "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+def is_metrics_file(name):
+    return name == METRICS_FILE or (name.startswith(UPDATE_METRICS_PREFIX) and name.endswith(".json"))
+
+
+def clear_update_metrics(output_dir):
+    """Drop the update metrics of an output dir that a full parse replaced."""
+    for name in os.listdir(output_dir) if os.path.isdir(output_dir) else ():
+        if name.startswith(UPDATE_METRICS_PREFIX):
+            os.remove(os.path.join(output_dir, name))
+
+
+def load_metrics(output_dir):
+    """Return every parse_metrics.json under an output dir (main context and nested ones), and those of its updates."""
+    found = []
+    for root, _, files in os.walk(output_dir):
+        for name in sorted(filter(is_metrics_file, files)):
+            try:
+                with open(os.path.join(root, name)) as f:
+                    found.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+    return found
+
+
+def aggregate_metrics(metrics_list):
+    """Sum per-stage timings, bytes, pattern hit counts and subprocess time across runs."""
+    summary = {
+        "runs": len(metrics_list),
+        "wall_s": 0.0,
+        "cpu_s": 0.0,
+        "stages": {},
+        "bytes_read": 0,
+        "bytes_written": 0,
+        "patterns": {},
+        "subprocesses": {},
+        "peak_threads": 0,
+        "peak_child_processes": 0,
+        "peak_rss_bytes": 0,
+        "warnings": {},
+    }
+    for m in metrics_list:
+        if not m.get("context"):
+            # Nested contexts run inside the main parse; only top-level wall/cpu is additive.
+            summary["wall_s"] += m.get("wall_s", 0.0)
+            summary["cpu_s"] += m.get("cpu_s", 0.0)
+        for name, stage in m.get("stages", {}).items():
+            agg = summary["stages"].setdefault(name, {"wall_s": 0.0, "cpu_s": 0.0, "child_cpu_s": 0.0,
+                                                      "runs": 0, "max_wall_s": 0.0})
+            agg["wall_s"] += stage.get("wall_s", 0.0)
+            agg["cpu_s"] += stage.get("cpu_s", 0.0)
+            agg["child_cpu_s"] += stage.get("child_cpu_s", 0.0)
+            agg["runs"] += stage.get("runs", 1)
+            agg["max_wall_s"] = max(agg["max_wall_s"], stage.get("wall_s", 0.0))
+        summary["bytes_read"] += sum(m.get("bytes_read", {}).values())
+        summary["bytes_written"] += sum(m.get("bytes_written", {}).values())
+        for name, counts in m.get("patterns", {}).items():
+            agg = summary["patterns"].setdefault(name, {"scanned": 0, "matched": 0})
+            agg["scanned"] += counts.get("scanned", 0)
+            agg["matched"] += counts.get("matched", 0)
+        for label, proc in m.get("subprocesses", {}).items():
+            agg = summary["subprocesses"].setdefault(label, {"count": 0, "wall_s": 0.0})
+            agg["count"] += proc.get("count", 0)
+            agg["wall_s"] += proc.get("wall_s", 0.0)
+        summary["peak_threads"] = max(summary["peak_threads"], m.get("peak_threads") or 0)
+        summary["peak_child_processes"] = max(summary["peak_child_processes"], m.get("peak_child_processes") or 0)
+        summary["peak_rss_bytes"] = max(summary["peak_rss_bytes"], m.get("peak_rss_bytes") or 0)
+        for category, warning in m.get("warnings", {}).items():
+            summary["warnings"][category] = summary["warnings"].get(category, 0) + warning.get("count", 0)
+    return summary
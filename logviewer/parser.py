@@ -15,13 +15,54 @@ import importlib.util
 import logviewer
 import traceback
 import gzip
+import zlib
 import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import accumulate, chain
+from logviewer.job import ParseJob, CancelToken, ParseCancelled, run_parallel
+from logviewer.metrics import PatternStats, clear_update_metrics
+from logviewer.trace import TraceRecorder, TRACE_FILE
+from logviewer.timeline import MemoryBudget, TimeWindow, to_epoch_us
+from logviewer.partitions import PartitionedTimelineWriter, has_timeline, merge_partitions
+from logviewer.manifest import (load_manifest, update_manifest, set_context, set_stage, set_status, write_json_atomic,
+                                parse_complete, can_resume, pending_contexts, ARTIFACT_STAGES)
+from logviewer.journal import ParseJournal
+from logviewer.provenance import RAW_DIR, SOURCE_TEXT, SourceTable
+from logviewer.systemd_journal import (JournalFile, JournalFormatError, is_journal_file, journal_files,
+                                       journalctl_json_command, iter_journal_json)
 
 _log_debug_callback = print  # default fallback
 
 LOG_FILE_PREFIXES = ["event", "messages", "supportlog", "critical", "diagdump"]
 
+LAZY_SOURCES_DIR = "sources"  # nested bundles and boot folders kept for on-demand parsing
+
+CANCEL_CHECK_LINES = 10000  # hot loops check for cancellation every N lines
+
+EVENT_LOG_PATTERNS = [
+    ("event", re.compile(r'(?P<timestamp>\d{4}-\d{2}-\d{2}T[\d:.+\-]+)\s+(?P<hostname>\S+)\s+(?P<process>[^\[:]+)(?:\[(?P<pid>\d+)\])?:\s+Event\|(?P<event_id>\d+)\|(?P<severity>\S+)\|(?P<module>\S+)\|(?P<slot>[^|]*)\|(?P<message>.+)')),
+    ("syslog_fields", re.compile(r'(?P<timestamp>\d{4}-\d{2}-\d{2}T[\d:.+\-]+)\s+(?P<hostname>\S+)\s+(?P<process>[^\[:]+)(?:\[(?P<pid>\d+)\])?:\s+(?P<facility>\S+)\|(?P<severity>\S+)\|(?P<module>\S+)\|(?P<slot>[^|]*)\|(?P<submodule>[^|]*)\|(?P<source>[^|]*)\|(?P<message>.+)')),
+    ("bsd_syslog", re.compile(r'(?P<timestamp>[A-Z][a-z]{2}\s+\d{1,2}\s+[\d:]{8})\s+(?P<hostname>\S+)\s+(?P<process>[^\[:]+)(?:\[(?P<pid>\d+)\])?:\s+(?P<message>.+)')),
+]
+EVENT_LOG_PATTERN_NAMES = [name for name, _ in EVENT_LOG_PATTERNS]
+# Same patterns over raw bytes; only captured groups of matching lines get decoded.
+EVENT_LOG_BYTE_PATTERNS = [(name, re.compile(pattern.pattern.encode())) for name, pattern in EVENT_LOG_PATTERNS]
+EVENT_LOG_BYTE_FIELDS = [tuple(pattern.groupindex) for _, pattern in EVENT_LOG_BYTE_PATTERNS]
+
+READ_BLOCK_SIZE = 1 << 20  # bytes per read/decompress step when streaming logs
+PEEK_TAIL_BYTES = 64 * 1024  # bytes read from the end of a plain log to find its last timestamp
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+# Leading timestamp of any event log line, for peeking at file and batch bounds.
+EVENT_LOG_TIMESTAMP_BYTES = re.compile(rb'\s*(\d{4}-\d{2}-\d{2}T[\d:.+\-]+|[A-Z][a-z]{2}\s+\d{1,2}\s+[\d:]{8})\s')
+ROTATION_SUFFIX_RE = re.compile(r'(\.\d+)?(\.gz)?$')
+
+FASTLOG_HEADER_RE = re.compile(r"\((?P<ts>\d{2} \w{3} \d{2} \d{2}:\d{2}:\d{2}\.\d+)")
+LINECARD_BUNDLE_RE = re.compile(r"lc\d+\.tar\.gz")
+MEMBER_BUNDLE_RE = re.compile(r"mem_\d+_support_files\.tar\.gz")
+STALE_SCRATCH_RE = re.compile(r"(mem_\d+|lc\d+)_tmp\d?")
+SHOWTECH_COMMAND_RE = re.compile(r'Command\s*:\s*show (.+)')
+
 def log_debug(message):
     _log_debug_callback(message)
 
@@ -30,19 +71,31 @@ def set_logger(callback):
     _log_debug_callback  = callback
     log_debug("✅ Custom logger has been set.")
 
-def safe_parse(path, options=None):
+def safe_parse(path, options=None, progress_callback=None, cancel_token=None, trace=False):
     try:
         output_dir = f"{Path(path).stem}_log_analysis_results"
-        if not os.path.exists(os.path.join(output_dir, "parsed_logs.json")):
-            parse_bundle(path, output_dir, options=options)
+        # A complete output is only re-parsed (fully or incrementally) when the options ask for more.
+        up_to_date = parse_complete(output_dir) and options_delta(load_manifest(output_dir)["options"], options or {}) == []
+        if not up_to_date:
+            if cancel_token:
+                cancel_token.check()
+            tracer = TraceRecorder() if trace else None
+            job = ParseJob(path, progress_callback, cancel_token, tracer=tracer)
+            parse_bundle(path, output_dir, options=options, job=job)
+            if tracer:
+                trace_path = tracer.write(os.path.join(output_dir, TRACE_FILE))
+                log_debug(f"🧵 Wrote parse trace: {trace_path}")
         return {"path": path, "status": "Success", "output": output_dir}
+    except ParseCancelled:
+        return {"path": path, "status": "Cancelled"}
     except Exception as e:
         return {"path": path, "status": "Error", "error": str(e)}
 
-def parse_multiple_bundles(bundle_paths, workers=4, options=None):
+def parse_multiple_bundles(bundle_paths, workers=4, options=None, progress_callback=None, cancel_tokens=None, trace=False):
     options = options or {}
+    cancel_tokens = cancel_tokens or {}
     def safe_parse_with_opts(path):
-        return safe_parse(path, options)
+        return safe_parse(path, options, progress_callback, cancel_tokens.get(path), trace)
 
     with ThreadPoolExecutor(max_workers=workers) as executor:
         futures = [executor.submit(safe_parse_with_opts, path) for path in bundle_paths]
@@ -58,140 +111,193 @@ def find_readme():
         log_debug(f"❌ Could not locate README.md: {e}")
     return None
 
-def parse_linecard_bundle(tar_path, linecard_output_dir):
-    log_debug(f"📦 Parsing Linecard bundle: {tar_path}")
-    
-    # Step 1: Extract lcX.tar.gz
-    first_extract_dir = extract_bundle(tar_path, target_dir=linecard_output_dir + "_tmp1")
-    if not first_extract_dir:
-        log_debug(f"⚠️ Could not extract outer bundle: {tar_path}")
-        return
+def log_context(job, message):
+    log_debug(f"[{job.context}] {message}" if job.context else message)
 
-    # Step 2: Find and extract LC_X_support_files.tar.gz
-    nested_tar = None
-    for file in os.listdir(first_extract_dir):
-        if file.endswith("_support_files.tar.gz") and file.startswith("LC_"):
-            nested_tar = os.path.join(first_extract_dir, file)
-            break
+def collect_context_logs(source_dir, output_dir, job, include_fastlogs=True, publish_event_logs=False):
+    if job.journal is None:
+        job.journal = ParseJournal(output_dir, resume=job.resume)
+    if job.sources is None:
+        job.sources = SourceTable(output_dir, keep=job.resume)
+    logs = job.timeline()
+    fastlog_entries = job.timeline()
+    fastlog_files = []
+    fastlogs_done = threading.Event()
+    if not include_fastlogs:
+        fastlogs_done.set()
 
-    if not nested_tar or not os.path.exists(nested_tar):
-        log_debug(f"⚠️ Nested LC_X_support_files.tar.gz not found in {first_extract_dir}")
-        shutil.rmtree(first_extract_dir, ignore_errors=True)
-        return
+    def collect_logs():
+        nonlocal logs
+        with job.stage("event_logs"):
+            log_context(job, "📑 Collecting event logs...")
+            logs = collect_event_logs(source_dir, job=job)
+            log_context(job, f"📑 Collected {len(logs)} event log entries")
+            report_warnings(job)
+        if publish_event_logs and not fastlogs_done.is_set():
+            # Fastlog decoding is still running: let the viewer open on event logs alone.
+            publish_event_log_timeline(output_dir, logs, job)
+
+    def collect_all_fastlogs():
+        try:
+            collect_fastlog_stage()
+        finally:
+            fastlogs_done.set()
 
-    extracted = extract_bundle(nested_tar, target_dir=linecard_output_dir + "_tmp2")
-    if not extracted:
-        log_debug(f"⚠️ Could not extract nested linecard bundle: {nested_tar}")
-        shutil.rmtree(first_extract_dir, ignore_errors=True)
+    def collect_fastlog_stage():
+        nonlocal fastlog_entries, fastlog_files
+        if include_fastlogs:
+            with job.stage("fastlogs"):
+                log_context(job, "⚡ Collecting fastlog files and entries...")
+                try:
+                    # One fastlogParser run per supportlog feeds both the decoded text and the entries.
+                    with job.span("collect_fastlog_outputs", cat="collector"):
+                        fastlog_entries, fastlog_files = collect_fastlog_outputs(source_dir, output_dir, job=job)
+                except ParseCancelled:
+                    raise
+                except Exception as e:
+                    log_thread_error(e)
+                log_context(job, f"🗂️ Collected {len(fastlog_files)} fastlog files")
+                log_context(job, f"⚡ Collected {len(fastlog_entries)} fastlog entries")
+                report_warnings(job)
+
+    run_parallel([collect_logs, collect_all_fastlogs], on_error=log_thread_error)
+
+    with job.timed("merge"):
+        logs.extend(fastlog_entries)
+        logs.sort()
+    return logs, fastlog_files
+
+def write_context_logs(output_dir, logs, fastlog_files, job):
+    os.makedirs(output_dir, exist_ok=True)
+    with job.timed("write"):
+        with PartitionedTimelineWriter(output_dir, compression=job.options.get("compression"),
+                                       granularity=job.options.get("partition")) as writer:
+            writer.write_all(logs)
+        logs.discard()
+        index_path = os.path.join(output_dir, "fastlog_index.json")
+        write_json_atomic(index_path, fastlog_files)
+    if job.journal is not None:
+        job.journal.drop_checkpoints()
+    job.metrics.add_bytes_written("write", writer.bytes + os.path.getsize(index_path))
+
+def publish_event_log_timeline(output_dir, logs, job):
+    """Commit an event-log-only timeline ahead of the fastlog-merged one."""
+    with job.timed("publish"):
+        logs.sort()
+        # The fastlog-merged timeline replaces this one shortly; it gets the entity index, templates and rollup.
+        with PartitionedTimelineWriter(output_dir, compression=job.options.get("compression"),
+                                       granularity=job.options.get("partition"),
+                                       index_entities=False, mine_templates=False, rollup=False) as writer:
+            writer.write_all(logs)
+    job.metrics.add_bytes_written("publish", writer.bytes)
+    publish_stage(output_dir, "event_logs", job)
+
+def publish_stage(output_dir, stage, job):
+    """Mark an artifact stage as ready in the manifest so the viewer picks it up."""
+    set_stage(output_dir, stage, "done")
+    job.emit(stage, "published", output_dir=output_dir)
+    log_context(job, f"📣 Published {stage}")
+
+def parse_nested_context(output_dir, context, kind, parse, resume=False):
+    """Run an eager member/linecard/boot parse, tracking its status in the parent manifest.
+
+    When resuming, a context an earlier run already finished is skipped.
+    """
+    if resume and load_manifest(output_dir)["contexts"].get(context, {}).get("status") == "parsed":
+        log_debug(f"⏭️ Already parsed: {context}")
         return
+    set_context(output_dir, context, kind=kind, status="parsing")
+    try:
+        parse()
+    except Exception as e:
+        set_context(output_dir, context, status="error", error=str(e))
+        raise
+    set_context(output_dir, context, status="parsed")
 
-    logs = []
-    fastlog_entries = []
-    fastlog_files = []
+def report_warnings(job):
+    for category, source, count, total, samples in job.warnings.summarize():
+        example = f" (e.g. {samples[0]!r})" if samples else ""
+        where = f" in {source}" if source else ""
+        log_context(job, f"⚠️ {count} × {category}{where}{example}")
 
-    def get_logs():
-        nonlocal logs
-        logs = collect_event_logs(extracted)
+def log_thread_error(e):
+    log_debug(f"❌ Collector failed: {e}")
 
-    def get_fastlog_entries():
-        nonlocal fastlog_entries
-        fastlog_entries = collect_fastlog_entries(extracted)
+def parse_linecard_bundle(tar_path, linecard_output_dir, job=None):
+    job = job or ParseJob(tar_path)
+    log_debug(f"📦 Parsing Linecard bundle: {tar_path}")
 
-    def get_fastlog_files():
-        nonlocal fastlog_files
-        fastlog_files = collect_fastlogs(extracted, linecard_output_dir)
+    with job.scratch(linecard_output_dir + "_tmp1"), job.scratch(linecard_output_dir + "_tmp2"):
+        with job.stage("extract"):
+            # Step 1: Extract lcX.tar.gz
+            first_extract_dir = extract_bundle(tar_path, target_dir=linecard_output_dir + "_tmp1", job=job)
+            if not first_extract_dir:
+                log_debug(f"⚠️ Could not extract outer bundle: {tar_path}")
+                return
+
+            # Step 2: Find and extract LC_X_support_files.tar.gz
+            nested_tar = None
+            for file in os.listdir(first_extract_dir):
+                if file.endswith("_support_files.tar.gz") and file.startswith("LC_"):
+                    nested_tar = os.path.join(first_extract_dir, file)
+                    break
+
+            if not nested_tar or not os.path.exists(nested_tar):
+                log_debug(f"⚠️ Nested LC_X_support_files.tar.gz not found in {first_extract_dir}")
+                return
+
+            extracted = extract_bundle(nested_tar, target_dir=linecard_output_dir + "_tmp2", job=job)
+            if not extracted:
+                log_debug(f"⚠️ Could not extract nested linecard bundle: {nested_tar}")
+                return
+
+        logs, fastlog_files = collect_context_logs(extracted, linecard_output_dir, job)
+        write_context_logs(linecard_output_dir, logs, fastlog_files, job)
+
+        # Copy diag_dump_*.txt to feature folder
+        diag_dir = os.path.join(linecard_output_dir, "feature")
+        os.makedirs(diag_dir, exist_ok=True)
+        for root, _, files in os.walk(extracted):
+            for file in files:
+                if file.startswith("diag_dump_") and file.endswith(".txt"):
+                    try:
+                        shutil.copy(os.path.join(root, file), os.path.join(diag_dir, file))
+                    except Exception as e:
+                        log_debug(f"⚠️ Failed to copy {file}: {e}")
 
-    threads = []
-    for fn in [get_logs, get_fastlog_entries, get_fastlog_files]:
-        t = threading.Thread(target=fn)
-        t.start()
-        threads.append(t)
-    for t in threads:
-        t.join()
+        # Handle previous boot logs if any
+        parse_previous_boot_logs(extracted, linecard_output_dir, job=job)
+        job.metrics.write(linecard_output_dir)
+        job.journal.clear()
 
-    logs.extend(fastlog_entries)
-    logs.sort(key=lambda x: datetime.fromisoformat(x["timestamp"]))
+def parse_boot_folder(boot_path, out_path, job):
+    os.makedirs(out_path, exist_ok=True)
+    logs, fastlog_files = collect_context_logs(boot_path, out_path, job)
 
-    os.makedirs(linecard_output_dir, exist_ok=True)
-    with open(os.path.join(linecard_output_dir, "parsed_logs.json"), "w") as f:
-        json.dump(logs, f, indent=2)
-    with open(os.path.join(linecard_output_dir, "fastlog_index.json"), "w") as f:
-        json.dump(fastlog_files, f, indent=2)
+    if not logs:
+        log_debug(f"⚠️ No logs parsed from {boot_path}")
 
-    # Copy diag_dump_*.txt to feature folder
-    diag_dir = os.path.join(linecard_output_dir, "feature")
-    os.makedirs(diag_dir, exist_ok=True)
-    for root, _, files in os.walk(extracted):
-        for file in files:
-            if file.startswith("diag_dump_") and file.endswith(".txt"):
-                try:
-                    shutil.copy(os.path.join(root, file), os.path.join(diag_dir, file))
-                except Exception as e:
-                    log_debug(f"⚠️ Failed to copy {file}: {e}")
+    write_context_logs(out_path, logs, fastlog_files, job)
+    job.metrics.write(out_path)
+    job.journal.clear()
 
-    # Handle previous boot logs if any
-    parse_previous_boot_logs(extracted, linecard_output_dir)
+def parse_flat_boot_logs(member_extracted_dir, member_output_dir, job=None):
+    job = job or ParseJob(member_extracted_dir)
 
-    # Cleanup both levels of extraction
-    for temp_dir in [first_extract_dir, extracted]:
-        try:
-            shutil.rmtree(temp_dir)
-        except Exception as e:
-            log_debug(f"⚠️ Failed to clean temp dir {temp_dir}: {e}")
-	    
-def parse_flat_boot_logs(member_extracted_dir, member_output_dir):
     def handle_boot_folder(entry):
         boot_path = os.path.join(member_extracted_dir, entry)
         if not os.path.isdir(boot_path) or not entry.startswith("boot"):
             return
         log_debug(f"🧠 Parsing VSF flat boot folder: {entry}")
         out_path = os.path.join(member_output_dir, "previous", entry)
-        os.makedirs(out_path, exist_ok=True)
-
-        logs = []
-        fastlog_entries = []
-        fastlog_files = []
-
-        def get_logs():
-            nonlocal logs
-            logs = collect_event_logs(boot_path)
+        parse_nested_context(member_output_dir, f"previous/{entry}", "boot",
+                             lambda: parse_boot_folder(boot_path, out_path, job.child(f"previous/{entry}")), job.resume)
 
-        def get_fastlog_entries():
-            nonlocal fastlog_entries
-            fastlog_entries = collect_fastlog_entries(boot_path)
+    run_parallel([lambda entry=entry: handle_boot_folder(entry) for entry in os.listdir(member_extracted_dir)],
+                 on_error=log_thread_error)
 
-        def get_fastlog_files():
-            nonlocal fastlog_files
-            fastlog_files = collect_fastlogs(boot_path, out_path)
-
-        threads = []
-        for fn in [get_logs, get_fastlog_entries, get_fastlog_files]:
-            t = threading.Thread(target=fn)
-            t.start()
-            threads.append(t)
-        for t in threads:
-            t.join()
-
-        logs.extend(fastlog_entries)
-        logs.sort(key=lambda x: datetime.fromisoformat(x["timestamp"]))
-
-        if not logs:
-            log_debug(f"⚠️ No logs parsed from {boot_path}")
-
-        with open(os.path.join(out_path, "parsed_logs.json"), "w") as f:
-            json.dump(logs, f, indent=2)
-        with open(os.path.join(out_path, "fastlog_index.json"), "w") as f:
-            json.dump(fastlog_files, f, indent=2)
-
-    threads = []
-    for entry in os.listdir(member_extracted_dir):
-        t = threading.Thread(target=handle_boot_folder, args=(entry,))
-        t.start()
-        threads.append(t)
-    for t in threads:
-        t.join()
-
-def parse_previous_boot_logs(bundle_dir, output_dir):
+def parse_previous_boot_logs(bundle_dir, output_dir, job=None):
+    job = job or ParseJob(bundle_dir)
     prev_dir = os.path.join(bundle_dir, "prev_boot_logs")  # Updated directory name
     if not os.path.exists(prev_dir):
         return
@@ -202,200 +308,454 @@ def parse_previous_boot_logs(bundle_dir, output_dir):
             return
         log_debug(f"🔁 Parsing previous boot: {entry}")
         out_path = os.path.join(output_dir, "previous", entry)
-        os.makedirs(out_path, exist_ok=True)
-
-        logs = []
-        fastlog_entries = []
-
-        def get_logs():
-            nonlocal logs
-            logs = collect_event_logs(boot_path)
+        parse_nested_context(output_dir, f"previous/{entry}", "boot",
+                             lambda: parse_boot_folder(boot_path, out_path, job.child(f"previous/{entry}")), job.resume)
 
-        def get_fastlogs():
-            nonlocal fastlog_entries
-            fastlog_entries = collect_fastlog_entries(boot_path)
+    run_parallel([lambda entry=entry: handle_boot_folder(entry) for entry in os.listdir(prev_dir)],
+                 on_error=log_thread_error)
 
-        t1 = threading.Thread(target=get_logs)
-        t2 = threading.Thread(target=get_fastlogs)
-        t1.start()
-        t2.start()
-        t1.join()
-        t2.join()
-
-        logs.extend(fastlog_entries)
-        logs.sort(key=lambda x: datetime.fromisoformat(x["timestamp"]))
-
-        if not logs:
-            log_debug(f"⚠️ No logs parsed from {boot_path}")
-
-        with open(os.path.join(out_path, "parsed_logs.json"), "w") as f:
-            json.dump(logs, f, indent=2)
-
-        collect_fastlogs(boot_path, out_path)
-
-    threads = []
-    for entry in os.listdir(prev_dir):
-        t = threading.Thread(target=handle_boot_folder, args=(entry,))
-        t.start()
-        threads.append(t)
-    for t in threads:
-        t.join()
-	    
-def parse_vsf_member(tar_path, member_output_dir):
+def parse_vsf_member(tar_path, member_output_dir, job=None):
+    job = job or ParseJob(tar_path)
     log_debug(f"📦 Parsing VSF member bundle: {tar_path}")
-    extracted = extract_bundle(tar_path, target_dir=member_output_dir + "_tmp")
-    if not extracted:
-        log_debug(f"⚠️ Could not extract {tar_path}")
-        return
-
-    logs = []
-    fastlog_entries = []
-    fastlog_files = []
-
-    def get_logs():
-        nonlocal logs
-        logs = collect_event_logs(extracted)
 
-    def get_fastlog_entries():
-        nonlocal fastlog_entries
-        fastlog_entries = collect_fastlog_entries(extracted)
-
-    def get_fastlog_files():
-        nonlocal fastlog_files
-        fastlog_files = collect_fastlogs(extracted, member_output_dir)
-
-    threads = []
-    for fn in [get_logs, get_fastlog_entries, get_fastlog_files]:
-        t = threading.Thread(target=fn)
-        t.start()
-        threads.append(t)
-    for t in threads:
-        t.join()
-
-    logs.extend(fastlog_entries)
-    logs.sort(key=lambda x: datetime.fromisoformat(x["timestamp"]))
+    with job.scratch(member_output_dir + "_tmp"):
+        with job.stage("extract"):
+            extracted = extract_bundle(tar_path, target_dir=member_output_dir + "_tmp", job=job)
+        if not extracted:
+            log_debug(f"⚠️ Could not extract {tar_path}")
+            return
 
-    os.makedirs(member_output_dir, exist_ok=True)
-    with open(os.path.join(member_output_dir, "parsed_logs.json"), "w") as f:
-        json.dump(logs, f, indent=2)
-    with open(os.path.join(member_output_dir, "fastlog_index.json"), "w") as f:
-        json.dump(fastlog_files, f, indent=2)
+        logs, fastlog_files = collect_context_logs(extracted, member_output_dir, job)
+        write_context_logs(member_output_dir, logs, fastlog_files, job)
 
-    # Copy diagdump_*.txt to feature folder
-    diag_dir = os.path.join(member_output_dir, "feature")
-    os.makedirs(diag_dir, exist_ok=True)
-    for root, _, files in os.walk(extracted):
-        for file in files:
-            if file.startswith("diagdump_") and file.endswith(".txt"):
-                shutil.copy(os.path.join(root, file), os.path.join(diag_dir, file))
+        # Copy diagdump_*.txt to feature folder
+        diag_dir = os.path.join(member_output_dir, "feature")
+        os.makedirs(diag_dir, exist_ok=True)
+        for root, _, files in os.walk(extracted):
+            for file in files:
+                if file.startswith("diagdump_") and file.endswith(".txt"):
+                    shutil.copy(os.path.join(root, file), os.path.join(diag_dir, file))
 
-    parse_previous_boot_logs(extracted, member_output_dir)
-    parse_flat_boot_logs(extracted, member_output_dir)
+        parse_previous_boot_logs(extracted, member_output_dir, job=job)
+        parse_flat_boot_logs(extracted, member_output_dir, job=job)
+        job.metrics.write(member_output_dir)
+        job.journal.clear()
 
-    try:
-        shutil.rmtree(extracted)
-    except Exception as e:
-        log_debug(f"⚠️ Failed to clean temp member dir {extracted}: {e}")
-		
-def extract_bundle(path, target_dir=None):
+def extract_bundle(path, target_dir=None, job=None, select=None):
+    """Extract a .tar.gz bundle; with ``select``, only the members whose name it accepts."""
+    job = job or ParseJob(path)
     name = os.path.basename(path).replace(".tar.gz", "")
     tmp_dir = target_dir or os.path.join("tmp_extracted", name)
     os.makedirs(tmp_dir, exist_ok=True)
     try:
-        with tarfile.open(path, "r:gz") as tar:
-            tar.extractall(path=tmp_dir)
+        total = os.path.getsize(path)
+        written = 0
+        with job.span("extract_bundle", cat="io", file=os.path.basename(path)), \
+                open(path, "rb") as raw, tarfile.open(fileobj=raw, mode="r:gz") as tar:
+            for member in tar:
+                job.check()
+                if select is not None and not (member.isfile() and select(member.name)):
+                    continue
+                tar.extract(member, path=tmp_dir)
+                written += member.size
+                job.progress("extract", bytes_done=raw.tell(), bytes_total=total)
+        job.progress("extract", bytes_done=total, bytes_total=total, force=True)
+        job.metrics.add_bytes_read("extract", total)
+        job.metrics.add_bytes_written("extract", written)
         return tmp_dir
+    except ParseCancelled:
+        raise
     except Exception as e:
         log_debug(f"❌ Failed to extract {path}: {e}")
         return None
 
-def read_lines(path):
-    if os.path.isdir(path):
-        if platform.system() == "Windows":
-            drive, rest = os.path.splitdrive(path)
-            rest_fixed = rest.replace("\\", "/")
-            wsl_path = f"/mnt/{drive[0].lower()}{rest_fixed}"
-            journal_cmd = ["wsl", "journalctl", "-D", wsl_path, "--no-pager"]
-
-            try:
-                result = subprocess.run(
-                    journal_cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.DEVNULL,
-                    text=True,
-                    creationflags=subprocess.CREATE_NO_WINDOW  # 👈 suppress WSL console popups
-                )
-                return result.stdout.splitlines()
-            except Exception as e:
-                log_debug(f"⚠️ Failed to read journal logs: {e}")
-                return []
-        else:
-            # Native Linux journal
-            journal_cmd = ["journalctl", "-D", path, "--no-pager"]
-            try:
-                result = subprocess.run(journal_cmd, stdout=subprocess.PIPE, text=True)
-                return result.stdout.splitlines()
-            except Exception as e:
-                log_debug(f"⚠️ Failed to read journal logs: {e}")
-                return []
+def journalctl_entries(path, since_us, until_us, job):
+    """Fallback for journals the native reader can't fully decode: journalctl's JSON export."""
+    directory = os.path.isdir(path)
+    creationflags = 0
+    if platform.system() == "Windows":
+        cmd = ["wsl"] + journalctl_json_command(translate_path_for_wsl(path), since_us, until_us, directory)
+        creationflags = subprocess.CREATE_NO_WINDOW  # 👈 suppress WSL console popups
     else:
+        cmd = journalctl_json_command(path, since_us, until_us, directory)
+    output = job.run_process(cmd, label="journalctl", creationflags=creationflags)
+    return iter_journal_json(output, since_us, until_us)
+
+def read_journal_file(path, since_us, until_us, job):
+    """Yield ``(offset, realtime_us, fields)`` for one journal file, read natively through mmap when possible.
+
+    ``offset`` is the entry's object offset, or None for entries exported by journalctl.
+    """
+    name = os.path.basename(path)
+    try:
+        journal = JournalFile(path)
+    except (OSError, JournalFormatError) as e:
+        log_debug(f"⚠️ {e}; reading {name} through journalctl")
         try:
-            with open(path, "r", errors='ignore') as f:
-                return f.readlines()
+            entries = journalctl_entries(path, since_us, until_us, job)
+        except ParseCancelled:
+            raise
         except Exception as e:
-            log_debug(f"⚠️ Failed to read file {path}: {e}")
-            return []
-		
-def parse_line(line):
-    patterns = [
-        re.compile(r'(?P<timestamp>\d{4}-\d{2}-\d{2}T[\d:.+\-]+)\s+(?P<hostname>\S+)\s+(?P<process>[^\[:]+)(?:\[(?P<pid>\d+)\])?:\s+Event\|(?P<event_id>\d+)\|(?P<severity>\S+)\|(?P<module>\S+)\|(?P<slot>[^|]*)\|(?P<message>.+)'),
-        re.compile(r'(?P<timestamp>\d{4}-\d{2}-\d{2}T[\d:.+\-]+)\s+(?P<hostname>\S+)\s+(?P<process>[^\[:]+)(?:\[(?P<pid>\d+)\])?:\s+(?P<facility>\S+)\|(?P<severity>\S+)\|(?P<module>\S+)\|(?P<slot>[^|]*)\|(?P<submodule>[^|]*)\|(?P<source>[^|]*)\|(?P<message>.+)'),
-        re.compile(r'(?P<timestamp>[A-Z][a-z]{2}\s+\d{1,2}\s+[\d:]{8})\s+(?P<hostname>\S+)\s+(?P<process>[^\[:]+)(?:\[(?P<pid>\d+)\])?:\s+(?P<message>.+)')
-    ]
-    for pattern in patterns:
-        match = pattern.match(line.strip())
-        if match:
-            group = match.groupdict()
+            log_debug(f"⚠️ Failed to read journal {name}: {e}")
+            return
+        for realtime, fields in entries:
+            yield None, realtime, fields
+        return
+
+    with journal:
+        missing = journal.missing_codecs()
+        if missing:
             try:
-                if "T" in group["timestamp"]:
-                    dt = datetime.fromisoformat(group["timestamp"])
-                else:
-                    dt = datetime.strptime(group["timestamp"], "%b %d %H:%M:%S").replace(year=datetime.now().year)
-                group["timestamp"] = dt.astimezone(timezone.utc).isoformat()
+                entries = journalctl_entries(path, since_us, until_us, job)
+            except ParseCancelled:
+                raise
             except Exception as e:
-                log_debug(f"⚠️ Failed to parse timestamp: {group.get('timestamp')} - {e}")
-                return None
-            return group
+                log_debug(f"⚠️ journalctl unavailable ({e}); {name} payloads compressed with "
+                          f"{'/'.join(missing)} will be skipped")
+            else:
+                for realtime, fields in entries:
+                    yield None, realtime, fields
+                return
+        try:
+            yield from journal.entries(since_us, until_us, offsets=True)
+        except JournalFormatError as e:
+            job.warnings.add("damaged_journal", name, str(e))
+        if journal.skipped_fields:
+            job.warnings.add("undecoded_journal_payload", name, f"{journal.skipped_fields} field(s)")
+
+def iter_journal_source(full_path, job):
+    """``(path, offset, realtime_us, fields)`` for the entries of a journal file, or of every journal file in a journal directory."""
+    window = job.window
+    since_us, until_us = (window.since_us, window.until_us) if window is not None else (None, None)
+    paths = journal_files(full_path) if os.path.isdir(full_path) else [full_path]
+    for path in paths:
+        for offset, realtime, fields in read_journal_file(path, since_us, until_us, job):
+            yield path, offset, realtime, fields
+
+def journal_record(realtime, fields):
+    """Timeline entry for a journal entry, named like the event log fields."""
+    return {
+        "timestamp": realtime,
+        "hostname": fields.get("_HOSTNAME"),
+        "process": fields.get("SYSLOG_IDENTIFIER") or fields.get("_COMM"),
+        "pid": fields.get("_PID") or fields.get("SYSLOG_PID"),
+        "severity": JOURNAL_SEVERITIES.get(fields.get("PRIORITY")),
+        "message": fields.get("MESSAGE", ""),
+        "source": "eventlog",
+    }
+
+def event_timestamp_us(text):
+    if "T" in text:
+        dt = datetime.fromisoformat(text)
+    else:
+        dt = datetime.strptime(text, "%b %d %H:%M:%S").replace(year=datetime.now().year)
+    return to_epoch_us(dt.astimezone(timezone.utc))
+
+def normalize_event_timestamp(group, warnings=None, source=None):
+    try:
+        group["timestamp"] = event_timestamp_us(group["timestamp"])
+    except Exception as e:
+        if warnings is not None:
+            warnings.add("bad_timestamp", source, group.get("timestamp"))
+        else:
+            log_debug(f"⚠️ Failed to parse timestamp: {group.get('timestamp')} - {e}")
+        return None
+    return group
+
+def parse_line(line, stats=None, warnings=None, source=None):
+    line = line.strip()
+    for index, (_, pattern) in enumerate(EVENT_LOG_PATTERNS):
+        match = pattern.match(line)
+        if stats is not None:
+            stats.hit(index, match is not None)
+        if match:
+            return normalize_event_timestamp(match.groupdict(), warnings, source)
+    return None
+
+FIELD_SEPARATOR = b"\x1f"
+
+# journald PRIORITY -> the severity names Aruba event logs use.
+JOURNAL_SEVERITIES = {"0": "LOG_EMER", "1": "LOG_ALERT", "2": "LOG_CRIT", "3": "LOG_ERR",
+                      "4": "LOG_WARN", "5": "LOG_NOTICE", "6": "LOG_INFO", "7": "LOG_DEBUG"}
+
+def decode_event_match(match, fields, warnings=None, source=None):
+    groups = match.groups()
+    values = None
+    if None not in groups:
+        # One decode for all captured fields instead of one per field.
+        values = FIELD_SEPARATOR.join(groups).decode("utf-8", "ignore").split("\x1f")
+    if values is None or len(values) != len(fields):
+        values = [None if value is None else value.decode("utf-8", "ignore") for value in groups]
+    return normalize_event_timestamp(dict(zip(fields, values)), warnings, source)
+
+def parse_line_bytes(line, stats=None, warnings=None, source=None, first_pattern=0):
+    line = line.strip()
+    for index in range(first_pattern, len(EVENT_LOG_BYTE_PATTERNS)):
+        match = EVENT_LOG_BYTE_PATTERNS[index][1].match(line)
+        if stats is not None:
+            stats.hit(index, match is not None)
+        if match:
+            return decode_event_match(match, EVENT_LOG_BYTE_FIELDS[index], warnings, source)
+    return None
+
+def parse_byte_lines(lines, logs, stats=None, warnings=None, source=None, window=None, file_id=None, offset=0):
+    # The primary pattern runs over the whole batch via map() so the common
+    # case stays in C; the fallback patterns only see the lines it missed.
+    primary = EVENT_LOG_BYTE_PATTERNS[0][1]
+    primary_fields = EVENT_LOG_BYTE_FIELDS[0]
+    stripped = list(map(bytes.strip, lines))
+    # With a file_id, rows record where their line starts: offset + the lengths and newlines before it.
+    starts = list(accumulate(chain((offset,), map(len, lines)))) if file_id is not None else None
+    matched = 0
+    for index, (line, match) in enumerate(zip(stripped, map(primary.match, stripped))):
+        if match:
+            matched += 1
+            entry = decode_event_match(match, primary_fields, warnings, source)
+        else:
+            entry = parse_line_bytes(line, stats, warnings, source, first_pattern=1)
+        if entry and (window is None or window.contains(entry["timestamp"])):
+            entry["source"] = "eventlog"
+            if starts is not None:
+                entry["file_id"] = file_id
+                entry["offset"] = starts[index] + index
+            logs.append(entry)
+    if stats is not None:
+        stats.add(0, len(stripped), matched)
+
+def iter_file_blocks(raw):
+    while True:
+        block = raw.read(READ_BLOCK_SIZE)
+        if not block:
+            return
+        yield block
+
+def iter_gzip_blocks(raw, warnings=None, source=None):
+    """Decompress a (possibly multi-member) gzip stream in bounded blocks."""
+    decomp = zlib.decompressobj(GZIP_WBITS)
+    pending = False  # current member has input but no end marker yet
+    data = b""
+    while True:
+        if not data:
+            data = raw.read(READ_BLOCK_SIZE)
+            if not data:
+                break
+        try:
+            block = decomp.decompress(data, READ_BLOCK_SIZE)
+        except zlib.error as e:
+            if warnings is not None:
+                warnings.add("corrupt_gzip", source, str(e))
+            return
+        pending = True
+        if block:
+            yield block
+        if decomp.eof:
+            pending = False
+            # Anything after the member is either another member or zero padding.
+            data = decomp.unused_data.lstrip(b"\0")
+            decomp = zlib.decompressobj(GZIP_WBITS)
+        else:
+            data = decomp.unconsumed_tail
+    tail = decomp.flush()
+    if tail:
+        yield tail
+    if pending and not decomp.eof and warnings is not None:
+        warnings.add("truncated_gzip", source)
+
+def iter_line_batches(blocks):
+    """Re-split a stream of byte blocks into per-block lists of complete lines.
+
+    Yields ``(offset, lines)``, ``offset`` being where the first line starts in the stream.
+    """
+    remainder = b""
+    offset = consumed = 0
+    for block in blocks:
+        consumed += len(block)
+        lines = block.split(b"\n")
+        if remainder:
+            lines[0] = remainder + lines[0]
+        remainder = lines.pop()
+        if lines:
+            yield offset, lines
+            offset = consumed - len(remainder)
+    if remainder:
+        yield offset, [remainder]
+
+def line_timestamp(line):
+    match = EVENT_LOG_TIMESTAMP_BYTES.match(line)
+    if not match:
+        return None
+    try:
+        return event_timestamp_us(match.group(1).decode("ascii"))
+    except ValueError:
+        return None
+
+def first_timestamp(lines):
+    for line in lines:
+        ts = line_timestamp(line)
+        if ts is not None:
+            return ts
     return None
 
-def collect_event_logs(bundle_dir):
-    logs = []
+def last_timestamp(lines):
+    return first_timestamp(reversed(lines))
+
+def peek_log_bounds(full_path, compressed):
+    """First and (for plain files) last timestamp of a log, reading only its head and tail."""
+    if is_journal_file(full_path):
+        try:
+            with JournalFile(full_path) as journal:
+                return journal.time_bounds()
+        except (OSError, JournalFormatError):
+            return None, None
+    first = last = None
+    try:
+        with open(full_path, "rb") as raw:
+            blocks = iter_gzip_blocks(raw) if compressed else iter_file_blocks(raw)
+            for _, lines in iter_line_batches(blocks):
+                first = first_timestamp(lines)
+                if first is not None:
+                    break
+            if not compressed:
+                size = os.path.getsize(full_path)
+                raw.seek(max(0, size - PEEK_TAIL_BYTES))
+                lines = raw.read().split(b"\n")
+                last = last_timestamp(lines[1:] if size > PEEK_TAIL_BYTES else lines)
+    except (OSError, zlib.error):
+        pass
+    return first, last
+
+def select_window_sources(sources, window):
+    """Drop log files that lie wholly outside the time window.
+
+    Heads come from peeking at each file; tails from the end of plain files.
+    A rotated .gz can't be read backwards, so its tail is bounded by the head
+    of the next newer file of the same log (event.log.2.gz by event.log.1.gz).
+    """
+    bounds = {}
+    families = {}
+    for file, full_path, compressed in sources:
+        if os.path.isfile(full_path):
+            first, last = bounds[full_path] = list(peek_log_bounds(full_path, compressed))
+            if first is not None:
+                family = os.path.join(os.path.dirname(full_path), ROTATION_SUFFIX_RE.sub("", file))
+                families.setdefault(family, []).append(full_path)
+    for paths in families.values():
+        paths.sort(key=lambda path: bounds[path][0])
+        for older, newer in zip(paths, paths[1:]):
+            if bounds[older][1] is None:
+                bounds[older][1] = bounds[newer][0]
+    selected = [source for source in sources
+                if source[1] not in bounds or window.overlaps(*bounds[source[1]])]
+    return selected, len(sources) - len(selected)
+
+def parse_event_log_file(file, full_path, compressed, logs, stats, job, keep=None):
+    """Parse one event log file or journal into ``logs``.
+
+    ``keep(path)``, when given, keeps a source file with the output and returns
+    its file id; rows then record it with their offset in the file.
+    """
+    window = job.window
+    if os.path.isdir(full_path) or is_journal_file(file):
+        # Binary systemd journals: structured fields straight from the file, already window-filtered.
+        file_ids = {}
+        for count, (path, offset, realtime, fields) in enumerate(iter_journal_source(full_path, job)):
+            if count % CANCEL_CHECK_LINES == 0:
+                job.check()
+            record = journal_record(realtime, fields)
+            if keep is not None and offset is not None:
+                file_id = file_ids.get(path)
+                if file_id is None:
+                    file_id = file_ids[path] = keep(path)
+                record["file_id"] = file_id
+                record["offset"] = offset
+            logs.append(record)
+        return
+
+    file_id = keep(full_path) if keep is not None else None
+    try:
+        with open(full_path, "rb") as raw:
+            blocks = iter_gzip_blocks(raw, job.warnings, file) if compressed else iter_file_blocks(raw)
+            for offset, lines in iter_line_batches(blocks):
+                job.check()
+                if window is not None:
+                    # Logs are written in time order: the first batch past the window
+                    # ends the file, and batches before it (or with no timestamped
+                    # line, which no pattern could match) are skipped without matching.
+                    first = first_timestamp(lines)
+                    if first is None:
+                        continue
+                    if not window.overlaps(first, None):
+                        break
+                    if not window.overlaps(None, last_timestamp(lines)):
+                        continue
+                parse_byte_lines(lines, logs, stats, job.warnings, file, window, file_id, offset)
+    except ParseCancelled:
+        raise
+    except Exception as e:
+        log_debug(f"⚠️ Failed to parse {'compressed ' if compressed else ''}log {file}: {e}")
+
+def collect_event_logs(bundle_dir, job=None):
+    job = job or ParseJob(bundle_dir)
+    logs = job.timeline()
+    sources = []
     for root, _, files in os.walk(bundle_dir):
         for file in files:
             full_path = os.path.join(root, file)
-
             if file.endswith(".gz") and any(file.startswith(prefix) for prefix in LOG_FILE_PREFIXES):
-                try:
-                    with gzip.open(full_path, "rt", errors='ignore') as f:
-                        for line in f:
-                            entry = parse_line(line)
-                            if entry:
-                                entry["source"] = "eventlog"
-                                logs.append(entry)
-                except Exception as e:
-                    log_debug(f"⚠️ Failed to parse compressed log {file}: {e}")
-                continue
-
-            if file.endswith(".log") or "journal" in file:
-                for line in read_lines(full_path):
-                    entry = parse_line(line)
-                    if entry:
-                        entry["source"] = "eventlog"
-                        logs.append(entry)
-
+                sources.append((file, full_path, True))
+            elif file.endswith(".log") or "journal" in file:
+                sources.append((file, full_path, False))
+
+    if job.window is not None:
+        with job.span("select_window_sources", cat="collector"):
+            sources, skipped = select_window_sources(sources, job.window)
+        if skipped:
+            log_context(job, f"⏭️ Skipped {skipped} event log file(s) outside {job.window}")
+
+    bytes_total = sum(os.path.getsize(path) for _, path, _ in sources if os.path.isfile(path))
+    bytes_done = 0
+    stats = PatternStats(EVENT_LOG_PATTERN_NAMES)
+    journal = job.journal
+    resumed = 0
+
+    for file, full_path, compressed in sources:
+        job.check()
+        size = os.path.getsize(full_path) if os.path.isfile(full_path) else None
+        with job.span("event_log_file", cat="collector", file=file):
+            # Each file's rows are checkpointed so a resumed parse can skip it.
+            key = os.path.relpath(full_path, bundle_dir)
+            entry = journal.get("event_log", key) if journal else None
+            file_logs = job.timeline()
+            if entry and entry.get("size") == size and journal.load_timeline(entry, file_logs):
+                resumed += 1
+            else:
+                keep = None
+                if job.sources is not None:
+                    keep = lambda path, compressed=compressed: job.sources.keep_file(
+                        os.path.relpath(path, bundle_dir), path, compressed)
+                parse_event_log_file(file, full_path, compressed, file_logs, stats, job, keep)
+                if journal:
+                    journal.save_timeline("event_log", key, file_logs, size=size)
+            logs.extend(file_logs)
+
+        if size is not None:
+            bytes_done += size
+        job.progress("event_logs", bytes_done=bytes_done, bytes_total=bytes_total, entries=len(logs))
+
+    job.progress("event_logs", bytes_done=bytes_total, bytes_total=bytes_total, entries=len(logs), force=True)
+    if resumed:
+        log_context(job, f"♻️ Reused {resumed} event log file(s) parsed by an earlier run")
+    job.metrics.merge_patterns(stats)
+    job.metrics.add_bytes_read("event_logs", bytes_total)
+    job.metrics.add_entries("event_logs", len(logs))
     return logs
 
 def get_fastlog_parser():
+    override = os.environ.get("LOGVIEWER_FASTLOG_PARSER")
+    if override:
+        # Alternate decoder (e.g. benchmarks/fastlog_stub.py); must be executable.
+        return override
+
     root = Path(__file__).resolve().parent
     exec_name = "fastlogParser"
     system = platform.system()
@@ -436,133 +796,217 @@ def translate_path_for_wsl(path):
     rest_fixed = rest.replace("\\", "/")
     return f"/mnt/{drive[0].lower()}{rest_fixed}"
 
-def collect_fastlogs(bundle_dir, output_dir):
-    fastlog_cmd = get_fastlog_parser()
-    fastlog_files = []
-    fastlog_output_dir = os.path.join(output_dir, "fastlogs")
-    os.makedirs(fastlog_output_dir, exist_ok=True)
-
-    def process_file(fname, root):
-        full_path = os.path.join(root, fname)
-        temp_decompressed = None
-
-        if fname.endswith(".gz"):
-            try:
-                temp_decompressed = os.path.join(tempfile.gettempdir(), f"{uuid.uuid4()}_{fname.replace('.gz', '')}")
-                with gzip.open(full_path, "rb") as f_in, open(temp_decompressed, "wb") as f_out:
-                    shutil.copyfileobj(f_in, f_out)
-                full_path = temp_decompressed
-            except Exception as e:
-                log_debug(f"⚠️ Failed to decompress {fname}: {e}")
-                return None
+def is_supportlog(fname):
+    return fname.endswith(".supportlog") or fname.endswith(".supportlog.gz")
 
-        cmd = [fastlog_cmd, "-v", full_path] if isinstance(fastlog_cmd, str) else fastlog_cmd + ["-v", translate_path_for_wsl(full_path)]
+def decode_fastlog(fname, root, job, fastlog_cmd=None):
+    """Run fastlogParser on one supportlog (decompressing .gz first); returns (decoded name, text) or None."""
+    fastlog_cmd = fastlog_cmd or get_fastlog_parser()
+    full_path = os.path.join(root, fname)
+    temp_decompressed = None
 
+    if fname.endswith(".gz"):
         try:
-            creationflags = subprocess.CREATE_NO_WINDOW if platform.system() == "Windows" else 0
-            result = subprocess.run(cmd, stdout=subprocess.PIPE, text=True, creationflags=creationflags)
-            out_file = os.path.join(fastlog_output_dir, os.path.basename(full_path) + ".txt")
-            with open(out_file, "w") as f:
-                f.write(result.stdout)
-            return os.path.basename(out_file)
+            job.check()
+            temp_decompressed = os.path.join(tempfile.gettempdir(), f"{uuid.uuid4()}_{fname.replace('.gz', '')}")
+            job.cancel_token.register_scratch(temp_decompressed)
+            with job.span("decompress", cat="io", file=fname), \
+                    gzip.open(full_path, "rb") as f_in, open(temp_decompressed, "wb") as f_out:
+                shutil.copyfileobj(f_in, f_out)
+            full_path = temp_decompressed
+        except ParseCancelled:
+            raise
         except Exception as e:
-            log_debug(f"⚠️ Failed to parse {fname}: {e}")
+            log_debug(f"⚠️ Failed to decompress {fname}: {e}")
+            if temp_decompressed:
+                job.cancel_token.release_scratch(temp_decompressed)
             return None
-        finally:
-            if temp_decompressed and os.path.exists(temp_decompressed):
-                try:
-                    os.remove(temp_decompressed)
-                except Exception as e:
-                    log_debug(f"⚠️ Could not delete temp file {temp_decompressed}: {e}")
-
-    with ThreadPoolExecutor() as executor:
-        futures = [executor.submit(process_file, fname, root)
-                   for root, _, files in os.walk(bundle_dir)
-                   for fname in files if fname.endswith(".supportlog") or fname.endswith(".supportlog.gz")]
-        for future in as_completed(futures):
-            result = future.result()
-            if result:
-                fastlog_files.append(result)
 
-    return fastlog_files
-	
-def collect_fastlog_entries(bundle_dir):
-    fastlog_cmd = get_fastlog_parser()
-    entries = []
-
-    def process_file(fname, root):
-        full_path = os.path.join(root, fname)
-        process_name = os.path.basename(fname).replace(".supportlog", "").replace(".gz", "")
-        temp_decompressed = None
+    cmd = [fastlog_cmd, "-v", full_path] if isinstance(fastlog_cmd, str) else fastlog_cmd + ["-v", translate_path_for_wsl(full_path)]
 
-        if fname.endswith(".gz"):
+    try:
+        creationflags = subprocess.CREATE_NO_WINDOW if platform.system() == "Windows" else 0
+        output = job.run_process(cmd, label="fastlogParser", creationflags=creationflags)
+        return os.path.basename(full_path), output
+    except ParseCancelled:
+        raise
+    except Exception as e:
+        log_debug(f"⚠️ Failed to parse {fname}: {e}")
+        return None
+    finally:
+        if temp_decompressed:
+            job.cancel_token.release_scratch(temp_decompressed)
+        if temp_decompressed and os.path.exists(temp_decompressed):
             try:
-                temp_decompressed = os.path.join(tempfile.gettempdir(), f"{uuid.uuid4()}_{fname.replace('.gz', '')}")
-                with gzip.open(full_path, "rb") as f_in, open(temp_decompressed, "wb") as f_out:
-                    shutil.copyfileobj(f_in, f_out)
-                full_path = temp_decompressed
+                os.remove(temp_decompressed)
             except Exception as e:
-                log_debug(f"⚠️ Failed to decompress {fname}: {e}")
-                return []
-
-        cmd = [fastlog_cmd, "-v", full_path] if isinstance(fastlog_cmd, str) else fastlog_cmd + ["-v", translate_path_for_wsl(full_path)]
+                log_debug(f"⚠️ Could not delete temp file {temp_decompressed}: {e}")
+
+def write_fastlog_text(name, output, fastlog_output_dir, job, source_key=None):
+    """Write decoded fastlog text under fastlogs/; returns ``(file name, file id)``.
+
+    With ``source_key`` (the supportlog's path in the bundle) and a source
+    table, the text is also kept under raw/ and registered there: supportlogs
+    of different boots decode to the same fastlogs/ name, so it is linked
+    before the rename can expose it to another thread's write.
+    """
+    out_file = os.path.join(fastlog_output_dir, name + ".txt")
+    tmp_file = f"{out_file}.{uuid.uuid4().hex}.tmp"
+    # Written as is, so the byte offsets parse_fastlog_output() records hold in the file.
+    with open(tmp_file, "w", encoding="utf-8", newline="") as f:
+        f.write(output)
+    file_id = None
+    if source_key is not None and job.sources is not None:
+        file_id = job.sources.register(source_key, SOURCE_TEXT, os.path.join(RAW_DIR, source_key + ".txt"), tmp_file)
+    size = os.path.getsize(tmp_file)  # before the rename, which another boot's decode may race
+    os.replace(tmp_file, out_file)
+    job.metrics.add_bytes_written("fastlogs", size)
+    return os.path.basename(out_file), file_id
+
+def fastlog_timestamp_us(raw_ts, cache):
+    # "20 May 24 11:59:59.123456789": the seconds part goes through strptime
+    # once per distinct second, the fraction is truncated to microseconds.
+    seconds, _, fraction = raw_ts.partition(".")
+    base = cache.get(seconds)
+    if base is None:
+        dt = datetime.strptime(seconds, "%d %b %y %H:%M:%S")
+        base = cache[seconds] = to_epoch_us(dt.astimezone(timezone.utc))
+    return base + int(fraction[:6].ljust(6, "0"))
+
+def fastlog_entry(timestamp, process_name, buffer, file_id, offset):
+    entry = {
+        "timestamp": timestamp,
+        "process": process_name,
+        "message": "\n".join(buffer),
+        "source": "fastlog"
+    }
+    if file_id is not None:
+        entry["file_id"] = file_id
+        entry["offset"] = offset
+    return entry
+
+def parse_fastlog_output(output, fname, job, file_id=None):
+    """Timeline entries of fastlogParser's decoded text; with a ``file_id``, each
+    records the byte offset of its header line in that text (as written by
+    write_fastlog_text)."""
+    process_name = os.path.basename(fname).replace(".supportlog", "").replace(".gz", "")
+    window = job.window
+    local_entries = job.timeline()
+    lines = output.split("\n")
+    if lines[-1] == "":
+        lines.pop()
+    ascii_text = output.isascii()
+    position = record_offset = 0
+    buffer = None  # lines of the current record; None while it is being dropped
+    timestamp = None
+    seconds_cache = {}
+    stats = PatternStats(["fastlog_header"])
+    for count, line in enumerate(lines):
+        if count % CANCEL_CHECK_LINES == 0:
+            job.check()
+        line_offset = position
+        position += (len(line) if ascii_text else len(line.encode("utf-8"))) + 1
+        match = FASTLOG_HEADER_RE.match(line)
+        stats.hit(0, match is not None)
+        if match:
+            if buffer and timestamp is not None:
+                local_entries.append(fastlog_entry(timestamp, process_name, buffer, file_id, record_offset))
+            record_offset = line_offset
+            try:
+                timestamp = fastlog_timestamp_us(match.group("ts"), seconds_cache)
+            except Exception as e:
+                job.warnings.add("bad_fastlog_timestamp", fname, line.strip())
+                timestamp = None
+            # Records outside the time window are dropped before their lines are kept.
+            if timestamp is not None and (window is None or window.contains(timestamp)):
+                buffer = [line.strip()]
+            else:
+                buffer = None
+        elif buffer is not None:
+            buffer.append(line.strip())
+    if buffer and timestamp is not None:
+        local_entries.append(fastlog_entry(timestamp, process_name, buffer, file_id, record_offset))
+    job.metrics.merge_patterns(stats)
+    return local_entries
+
+def collect_fastlog_outputs(bundle_dir, output_dir=None, job=None, entries=True):
+    """Decode every supportlog once; write the decoded text under ``output_dir``/fastlogs
+    (when given) and parse it into timeline entries (when ``entries``).
+
+    Returns ``(timeline, fastlog_files)``.
+    """
+    job = job or ParseJob(bundle_dir)
+    fastlog_cmd = get_fastlog_parser()
+    timeline = job.timeline()
+    fastlog_files = []
+    fastlog_output_dir = journal = None
+    if output_dir is not None:
+        fastlog_output_dir = os.path.join(output_dir, "fastlogs")
+        os.makedirs(fastlog_output_dir, exist_ok=True)
+        journal = job.journal
+    resumed = 0
 
-        local_entries = []
-        try:
-            creationflags = subprocess.CREATE_NO_WINDOW if platform.system() == "Windows" else 0
-            result = subprocess.run(cmd, stdout=subprocess.PIPE, text=True, creationflags=creationflags)
-            lines = result.stdout.splitlines()
-            buffer = []
-            timestamp = None
-            for line in lines:
-                if re.match(r"\(\d{2} \w{3} \d{2} \d{2}:\d{2}:\d{2}\.\d+", line):
-                    if buffer and timestamp:
-                        local_entries.append({
-                            "timestamp": timestamp,
-                            "process": process_name,
-                            "message": "\n".join(buffer),
-                            "source": "fastlog"
-                        })
-                    buffer = [line.strip()]
-                    match = re.match(r"\((?P<ts>\d{2} \w{3} \d{2} \d{2}:\d{2}:\d{2}\.\d+)", line)
-                    try:
-                        raw_ts = match.group("ts")
-                        truncated_ts = re.sub(r'\.(\d{6})\d+', r'.\1', raw_ts)
-                        dt = datetime.strptime(truncated_ts, "%d %b %y %H:%M:%S.%f")
-                        timestamp = dt.astimezone(timezone.utc).isoformat()
-                    except Exception as e:
-                        log_debug(f"⚠️ Failed to parse fastlog timestamp in {fname}: {line.strip()} - {e}")
-                        timestamp = None
-                        buffer = []
-                else:
-                    if buffer is not None:
-                        buffer.append(line.strip())
-            if buffer and timestamp:
-                local_entries.append({
-                    "timestamp": timestamp,
-                    "process": process_name,
-                    "message": "\n".join(buffer),
-                    "source": "fastlog"
-                })
-        except Exception as e:
-            log_debug(f"⚠️ Failed to extract fastlog entries from {fname}: {e}")
-        finally:
-            if temp_decompressed and os.path.exists(temp_decompressed):
+    def process_file(fname, root):
+        nonlocal resumed
+        with job.span("fastlog_file", cat="collector", file=fname):
+            key = os.path.relpath(os.path.join(root, fname), bundle_dir)
+            entry = journal.get("fastlog", key) if journal else None
+            if entry:
+                # Decoded by an earlier run; its entries were checkpointed alongside.
+                local_entries = job.timeline() if entries else None
+                if local_entries is None or journal.load_timeline(entry, local_entries):
+                    resumed += 1
+                    return entry["text"], local_entries
+            decoded = decode_fastlog(fname, root, job, fastlog_cmd)
+            if decoded is None:
+                return None, None
+            name, output = decoded
+            text_file = local_entries = file_id = None
+            if fastlog_output_dir is not None:
+                text_file, file_id = write_fastlog_text(name, output, fastlog_output_dir, job, key)
+            if entries:
                 try:
-                    os.remove(temp_decompressed)
+                    local_entries = parse_fastlog_output(output, fname, job, file_id)
+                except ParseCancelled:
+                    raise
                 except Exception as e:
-                    log_debug(f"⚠️ Could not delete temp file {temp_decompressed}: {e}")
-
-        return local_entries
+                    log_debug(f"⚠️ Failed to extract fastlog entries from {fname}: {e}")
+            if journal and local_entries is not None:
+                journal.save_timeline("fastlog", key, local_entries, text=text_file)
+            elif journal and not entries:
+                journal.record("fastlog", key, text=text_file)
+            return text_file, local_entries
+
+    sources = [(fname, root) for root, _, files in os.walk(bundle_dir) for fname in files if is_supportlog(fname)]
+    sizes = {os.path.join(root, fname): os.path.getsize(os.path.join(root, fname)) for fname, root in sources}
+    bytes_total = sum(sizes.values())
+    bytes_done = 0
 
     with ThreadPoolExecutor() as executor:
-        futures = [executor.submit(process_file, fname, root)
-                   for root, _, files in os.walk(bundle_dir)
-                   for fname in files if fname.endswith(".supportlog") or fname.endswith(".supportlog.gz")]
+        futures = {executor.submit(process_file, fname, root): os.path.join(root, fname) for fname, root in sources}
         for future in as_completed(futures):
-            entries.extend(future.result())
+            text_file, local_entries = future.result()
+            if text_file:
+                fastlog_files.append(text_file)
+            if local_entries is not None:
+                timeline.extend(local_entries)
+            bytes_done += sizes[futures[future]]
+            job.progress("fastlogs", bytes_done=bytes_done, bytes_total=bytes_total, entries=len(timeline))
+
+    job.progress("fastlogs", bytes_done=bytes_total, bytes_total=bytes_total, entries=len(timeline), force=True)
+    if resumed:
+        log_context(job, f"♻️ Reused {resumed} fastlog(s) decoded by an earlier run")
+    job.metrics.add_bytes_read("fastlogs", bytes_total)
+    if entries:
+        job.metrics.add_entries("fastlogs", len(timeline))
+    return timeline, fastlog_files
+
+def collect_fastlogs(bundle_dir, output_dir, job=None):
+    return collect_fastlog_outputs(bundle_dir, output_dir, job, entries=False)[1]
+
+def collect_fastlog_entries(bundle_dir, job=None):
+    return collect_fastlog_outputs(bundle_dir, None, job)[0]
 
-    return entries
 
 def collect_showtech_and_diag(bundle_dir):
     showtech = None
@@ -613,7 +1057,7 @@ def split_showtech(showtech_path, output_dir):
 
     with open(showtech_path, "r", errors='ignore') as f:
         for line in f:
-            match = re.search(r'Command\s*:\s*show (.+)', line)
+            match = SHOWTECH_COMMAND_RE.search(line)
             if match:
                 flush()
                 current = f"show {match.group(1).strip()}"
@@ -633,76 +1077,20 @@ def save_text_file_summary(input_path, out_path):
     except Exception as e:
         log_debug(f" Failed to process {input_path}: {e}")
 
-def parse_bundle(bundle_path, output_dir, options=None):
-    log_debug(f"📦 Starting parse_bundle for: {bundle_path}")
-    
-    os.makedirs(output_dir, exist_ok=True)
-    bundle_dir = extract_bundle(bundle_path)
-
-    if not bundle_dir:
-        log_debug(f"❌ Failed to extract {bundle_path}")
-        return None
-
-    logs = []
-    fastlog_entries = []
-    fastlog_files = []
-
-    options = options or {}
-    include_fastlogs = options.get("include_fastlogs", True)
-    include_vsf = options.get("include_vsf", True)
-    include_prevboot = options.get("include_prevboot", True)
-    include_linecards = options.get("include_linecards", True)
-
-    log_debug(f"🔧 Options → Fastlogs: {include_fastlogs}, VSF: {include_vsf}, PrevBoot: {include_prevboot}, Linecards: {include_linecards}")
-
-    def collect_logs():
-        nonlocal logs
-        log_debug("📑 Collecting event logs...")
-        logs = collect_event_logs(bundle_dir)
-        log_debug(f"📑 Collected {len(logs)} event log entries")
-
-    def collect_fastlog():
-        nonlocal fastlog_entries
-        if include_fastlogs:
-            log_debug("⚡ Collecting fastlog entries...")
-            fastlog_entries = collect_fastlog_entries(bundle_dir)
-            log_debug(f"⚡ Collected {len(fastlog_entries)} fastlog entries")
-
-    def collect_fastlog_files():
-        nonlocal fastlog_files
-        if include_fastlogs:
-            log_debug("🗂️ Collecting fastlog files...")
-            fastlog_files = collect_fastlogs(bundle_dir, output_dir)
-            log_debug(f"🗂️ Collected {len(fastlog_files)} fastlog files")
-
-    threads = []
-    for fn in [collect_logs, collect_fastlog, collect_fastlog_files]:
-        t = threading.Thread(target=fn)
-        t.start()
-        threads.append(t)
-    for t in threads:
-        t.join()
-
-    logs.extend(fastlog_entries)
-    logs.sort(key=lambda x: datetime.fromisoformat(x["timestamp"]))
-    log_debug(f"📊 Total parsed log entries: {len(logs)}")
-
-    with open(os.path.join(output_dir, "parsed_logs.json"), "w") as f:
-        json.dump(logs, f, indent=2)
-
-    with open(os.path.join(output_dir, "fastlog_index.json"), "w") as f:
-        json.dump(fastlog_files, f, indent=2)
-
-    showtech_path, diag_dumps, isp_file = collect_showtech_and_diag(bundle_dir)
+def write_showtech_and_diag(bundle_dir, output_dir, job):
+    with job.span("collect_showtech_and_diag", cat="collector"):
+        showtech_path, diag_dumps, isp_file = collect_showtech_and_diag(bundle_dir)
     if isp_file:
         shutil.copy(isp_file, os.path.join(output_dir, "isp.txt"))
         log_debug("📎 Copied isp.txt")
-    
+
     if showtech_path:
-        index = split_showtech(showtech_path, output_dir)
-        with open(os.path.join(output_dir, "showtech_index.json"), "w") as f:
-            json.dump(index, f, indent=2)
+        job.metrics.add_bytes_read("showtech", os.path.getsize(showtech_path))
+        with job.span("split_showtech", cat="io"):
+            index = split_showtech(showtech_path, output_dir)
+        write_json_atomic(os.path.join(output_dir, "showtech_index.json"), index)
         log_debug("📘 Parsed and indexed showtech.txt")
+    publish_stage(output_dir, "showtech", job)
 
     diag_dir = os.path.join(output_dir, "feature")
     os.makedirs(diag_dir, exist_ok=True)
@@ -710,64 +1098,379 @@ def parse_bundle(bundle_path, output_dir, options=None):
         out_name = name.replace(os.sep, "_") + "_diagdump.txt"
         full_path = os.path.join(diag_dir, out_name)
         save_text_file_summary(path, full_path)
-    with open(os.path.join(output_dir, "diag_index.json"), "w") as f:
-        json.dump(list(diag_dumps.keys()), f, indent=2)
+    write_json_atomic(os.path.join(output_dir, "diag_index.json"), list(diag_dumps.keys()))
     log_debug(f"🧠 Saved {len(diag_dumps)} diag dumps")
-
-    if include_linecards:
+    publish_stage(output_dir, "diag", job)
+
+COLLECTOR_OPTIONS = ["include_fastlogs", "include_linecards", "include_vsf", "include_prevboot"]
+RUNTIME_OPTIONS = {"memory_budget_mb", "spill_dir"}  # affect how a parse runs, not what it writes
+
+# Top-level stage each collector option runs, in the order parse_bundle runs them.
+COLLECTOR_STAGES = [("include_fastlogs", "fastlogs"), ("include_linecards", "linecards"),
+                    ("include_vsf", "members"), ("include_prevboot", "prev_boots")]
+
+# Tar members an incremental update needs for each collector it adds.
+UPDATE_MEMBERS = {
+    "include_fastlogs": lambda name: is_supportlog(os.path.basename(name)),
+    "include_linecards": lambda name: LINECARD_BUNDLE_RE.match(os.path.basename(name)) is not None,
+    "include_vsf": lambda name: MEMBER_BUNDLE_RE.match(os.path.basename(name)) is not None,
+    "include_prevboot": lambda name: "prev_boot_logs/boot" in "/" + name,
+}
+
+def planned_stages(options, timeline_done=False):
+    """The top-level stages (job.STAGES) a full parse with ``options`` runs, in order."""
+    stages = ["extract"]
+    if not timeline_done:
+        stages.append("event_logs")
+        if options.get("include_fastlogs", True):
+            stages.append("fastlogs")
+    stages.append("showtech")
+    stages.extend(stage for option, stage in COLLECTOR_STAGES[1:] if options.get(option, True))
+    return stages
+
+def remove_stale_scratch(output_dir):
+    """Drop member/linecard extraction dirs a crashed parse left in its output dir."""
+    for parent in ("members", "linecards"):
+        parent_dir = os.path.join(output_dir, parent)
+        if not os.path.isdir(parent_dir):
+            continue
+        for entry in os.listdir(parent_dir):
+            if STALE_SCRATCH_RE.fullmatch(entry):
+                log_debug(f"🧹 Removing leftover scratch dir: {entry}")
+                shutil.rmtree(os.path.join(parent_dir, entry), ignore_errors=True)
+
+def parse_linecards_stage(bundle_dir, output_dir, job, lazy=False):
+    """Parse (or defer) the lcN.tar.gz linecard bundles found in a bundle."""
+    with job.stage("linecards"):
         linecard_dir = os.path.join(output_dir, "linecards")
         os.makedirs(linecard_dir, exist_ok=True)
-        lc_threads = []
-        found_linecards = 0
+        lc_tasks = []
         for root, _, files in os.walk(bundle_dir):
             for file in files:
-                if re.match(r"lc\d+\.tar\.gz", file):
-                    found_linecards += 1
+                if LINECARD_BUNDLE_RE.match(file):
                     lc_tar = os.path.join(root, file)
                     lc_name = file.replace(".tar.gz", "")
                     lc_output = os.path.join(linecard_dir, lc_name)
                     log_debug(f"📦 Detected Linecard bundle: {file}")
-                    t = threading.Thread(target=parse_linecard_bundle, args=(lc_tar, lc_output))
-                    lc_threads.append(t)
-                    t.start()
-        for t in lc_threads:
-            t.join()
-        if found_linecards:
-            log_debug(f"✅ Finished parsing {found_linecards} linecard bundle(s)")
-        else:
+                    if lazy:
+                        defer_context(output_dir, f"linecards/{lc_name}", "linecard", lc_tar)
+                        continue
+                    lc_job = job.child(f"linecards/{lc_name}")
+                    lc_tasks.append(lambda a=lc_tar, b=lc_output, j=lc_job: parse_nested_context(
+                        output_dir, j.context, "linecard", lambda: parse_linecard_bundle(a, b, job=j), job.resume))
+        run_parallel(lc_tasks, on_error=log_thread_error)
+        if lc_tasks:
+            log_debug(f"✅ Finished parsing {len(lc_tasks)} linecard bundle(s)")
+        elif not lazy:
             log_debug("ℹ️ No linecard bundles detected.")
+    publish_stage(output_dir, "linecards", job)
 
-    if include_vsf:
+def parse_members_stage(bundle_dir, output_dir, job, lazy=False):
+    """Parse (or defer) the mem_N VSF member bundles found in a bundle."""
+    with job.stage("members"):
         members_dir = os.path.join(output_dir, "members")
         os.makedirs(members_dir, exist_ok=True)
-        vsf_threads = []
-        found_members = 0
+        vsf_tasks = []
         for root, _, files in os.walk(bundle_dir):
             for file in files:
-                if re.match(r"mem_\d+_support_files\.tar\.gz", file):
-                    found_members += 1
+                if MEMBER_BUNDLE_RE.match(file):
                     member_tar = os.path.join(root, file)
                     member_name = file.replace("_support_files.tar.gz", "")
                     member_output = os.path.join(members_dir, member_name)
                     log_debug(f"📦 Detected VSF member bundle: {file}")
-                    t = threading.Thread(target=parse_vsf_member, args=(member_tar, member_output))
-                    vsf_threads.append(t)
-                    t.start()
-        for t in vsf_threads:
-            t.join()
-        if found_members:
-            log_debug(f"✅ Finished parsing {found_members} VSF member bundle(s)")
-        else:
+                    if lazy:
+                        defer_context(output_dir, f"members/{member_name}", "member", member_tar)
+                        continue
+                    member_job = job.child(f"members/{member_name}")
+                    vsf_tasks.append(lambda a=member_tar, b=member_output, j=member_job: parse_nested_context(
+                        output_dir, j.context, "member", lambda: parse_vsf_member(a, b, job=j), job.resume))
+        run_parallel(vsf_tasks, on_error=log_thread_error)
+        if vsf_tasks:
+            log_debug(f"✅ Finished parsing {len(vsf_tasks)} VSF member bundle(s)")
+        elif not lazy:
             log_debug("ℹ️ No VSF member bundles detected.")
+    publish_stage(output_dir, "members", job)
 
-    if include_prevboot:
+def parse_prev_boots_stage(bundle_dir, output_dir, job, lazy=False):
+    """Parse (or defer) the prev_boot_logs/boot* folders of a bundle."""
+    with job.stage("prev_boots"):
         prev_dir = os.path.join(bundle_dir, "prev_boot_logs")
-        if os.path.exists(prev_dir) and any(entry.startswith("boot") and os.path.isdir(os.path.join(prev_dir, entry)) for entry in os.listdir(prev_dir)):
+        if lazy and os.path.exists(prev_dir):
+            for entry in sorted(os.listdir(prev_dir)):
+                if entry.startswith("boot") and os.path.isdir(os.path.join(prev_dir, entry)):
+                    defer_context(output_dir, f"previous/{entry}", "boot", os.path.join(prev_dir, entry))
+        elif os.path.exists(prev_dir) and any(entry.startswith("boot") and os.path.isdir(os.path.join(prev_dir, entry)) for entry in os.listdir(prev_dir)):
             log_debug("🔁 Parsing previous boot logs...")
-            parse_previous_boot_logs(bundle_dir, output_dir)
+            parse_previous_boot_logs(bundle_dir, output_dir, job=job)
             log_debug("✅ Completed previous boot log parsing")
         else:
             log_debug("ℹ️ No previous boot log folders detected.")
+    publish_stage(output_dir, "prev_boots", job)
+
+def prepare_job(job, options):
+    """Apply the parse options that shape every collector: time window and memory budget."""
+    job.options = options
+    if job.window is None:
+        job.window = TimeWindow.from_options(options)
+    if job.window is not None:
+        log_debug(f"🕒 Time window: {job.window}")
+    budget_mb = options.get("memory_budget_mb")
+    if budget_mb and job.budget is None:
+        job.budget = MemoryBudget(int(budget_mb * 1024 * 1024), options.get("spill_dir"), job.cancel_token)
+        log_debug(f"💾 Timeline memory budget: {budget_mb} MB (spilling sorted runs to disk beyond it)")
+
+def release_budget(job):
+    if job.budget is not None:
+        job.metrics.record_spill(job.budget)
+        if job.budget.spilled_runs:
+            log_debug(f"💾 Spilled {job.budget.spilled_runs} sorted run(s), {job.budget.spilled_rows} rows "
+                      f"(peak in-memory timeline ≈ {job.budget.peak_bytes // (1024 * 1024)} MB)")
+        job.budget.cleanup()
+
+def defer_context(output_dir, context, kind, source_path):
+    """Keep a nested bundle or boot folder under sources/ and record it as pending in the manifest."""
+    rel_source = os.path.join(LAZY_SOURCES_DIR, os.path.dirname(context), os.path.basename(source_path))
+    os.makedirs(os.path.dirname(os.path.join(output_dir, rel_source)), exist_ok=True)
+    shutil.move(source_path, os.path.join(output_dir, rel_source))
+    set_context(output_dir, context, kind=kind, source=rel_source, status="pending")
+    log_debug(f"⏸️ Deferred {kind} {context} until it is opened")
+
+def parse_lazy_context(output_dir, context, progress_callback=None, cancel_token=None):
+    """Parse a member, linecard or boot that a lazy parse_bundle only recorded; returns its output dir."""
+    manifest = load_manifest(output_dir)
+    entry = manifest["contexts"].get(context)
+    if entry is None:
+        raise KeyError(f"{context} is not a deferred context of {output_dir}")
+    context_dir = os.path.join(output_dir, context)
+    if entry.get("status") == "parsed":
+        return context_dir
+
+    source = os.path.join(output_dir, entry["source"])
+    job = ParseJob(manifest.get("bundle", output_dir), progress_callback, cancel_token, context=context)
+    # The options never change for a deferred context, so whatever an earlier attempt finished still holds.
+    job.resume = True
+    prepare_job(job, manifest["options"])
+    set_context(output_dir, context, status="parsing")
+    log_debug(f"📦 Parsing deferred {entry['kind']} {context}")
+    try:
+        if entry["kind"] == "member":
+            parse_vsf_member(source, context_dir, job=job)
+        elif entry["kind"] == "linecard":
+            parse_linecard_bundle(source, context_dir, job=job)
+        else:
+            parse_boot_folder(source, context_dir, job)
+    except ParseCancelled:
+        job.cancel_token.cleanup_scratch()
+        set_context(output_dir, context, status="pending")
+        raise
+    except Exception as e:
+        set_context(output_dir, context, status="error", error=str(e))
+        raise
+    finally:
+        release_budget(job)
+
+    if not has_timeline(context_dir):
+        set_context(output_dir, context, status="error", error="no logs could be parsed")
+        raise RuntimeError(f"Could not parse {context}")
+    report_warnings(job)
+    set_context(output_dir, context, status="parsed")
+    if os.path.isdir(source):
+        shutil.rmtree(source, ignore_errors=True)
+    elif os.path.exists(source):
+        os.remove(source)
+    log_debug(f"✅ Finished deferred {context}")
+    return context_dir
+
+def options_delta(stored, requested):
+    """What to add to an output parsed with ``stored`` options so it covers ``requested``.
+
+    Returns the collector options (and ``lazy_contexts`` when it was switched
+    off) to run, or None when another option that shapes the output changed
+    and a full re-parse is needed.
+    """
+    stored, requested = json.loads(json.dumps(stored)), json.loads(json.dumps(requested))
+    added = [option for option in COLLECTOR_OPTIONS
+             if requested.get(option, True) and not stored.get(option, True)]
+    if stored.get("lazy_contexts") and not requested.get("lazy_contexts"):
+        added.append("lazy_contexts")
+    others = (set(stored) | set(requested)) - set(COLLECTOR_OPTIONS) - RUNTIME_OPTIONS - {"lazy_contexts"}
+    if any(stored.get(option) != requested.get(option) for option in others):
+        return None
+    return added
+
+def update_parsed_bundle(bundle_path, output_dir, stored, options, added, job):
+    """Run only the collectors in ``added`` against a complete output.
+
+    Just the tar members they need are extracted, and fastlog entries are
+    merged into the existing timeline, so event logs are not parsed again.
+    Disabling a collector keeps what was already parsed.
+    """
+    merged = dict(options)
+    for option in COLLECTOR_OPTIONS:
+        merged[option] = bool(stored.get(option, True) or options.get(option, True))
+    if not added:
+        log_debug(f"✅ {output_dir} is already parsed with these options")
+        update_manifest(output_dir, lambda m: m.update(options=merged))
+        return output_dir
+
+    log_debug(f"➕ Updating {output_dir} with {', '.join(added)} (no re-parse of what is already there)")
+    prepare_job(job, merged)
+    lazy = merged.get("lazy_contexts", False)
+    patterns = [UPDATE_MEMBERS[option] for option in added if option in UPDATE_MEMBERS]
+    select = lambda name: any(pattern(name) for pattern in patterns)
+    job.plan((["extract"] if patterns else []) + [stage for option, stage in COLLECTOR_STAGES if option in added])
+    scratch_dir = os.path.join("tmp_extracted", os.path.basename(bundle_path).replace(".tar.gz", "") + "_update")
+    try:
+        with job.scratch(scratch_dir):
+            bundle_dir = None
+            if patterns:
+                with job.stage("extract"):
+                    bundle_dir = extract_bundle(bundle_path, target_dir=scratch_dir, job=job, select=select)
+                if not bundle_dir:
+                    raise RuntimeError(f"Could not extract {bundle_path}")
+            collectors = {
+                "include_fastlogs": lambda: add_fastlogs(bundle_dir, output_dir, job),
+                "include_linecards": lambda: parse_linecards_stage(bundle_dir, output_dir, job, lazy),
+                "include_vsf": lambda: parse_members_stage(bundle_dir, output_dir, job, lazy),
+                "include_prevboot": lambda: parse_prev_boots_stage(bundle_dir, output_dir, job, lazy),
+                "lazy_contexts": lambda: [parse_lazy_context(output_dir, context, job.progress_callback,
+                                                             job.cancel_token)
+                                          for context in sorted(pending_contexts(output_dir))],
+            }
+            for option in added:
+                collectors[option]()
+                # Recorded as soon as the collector is done (fastlogs are merged into the timeline by now),
+                # so an update cancelled or failing later is not rerun on top of it.
+                update_manifest(output_dir, lambda m, option=option:
+                                m.setdefault("options", {}).update({option: merged.get(option)}))
+    except ParseCancelled:
+        log_debug(f"🛑 Update cancelled; {output_dir} keeps the collectors it finished")
+        raise
+    finally:
+        release_budget(job)
+
+    report_warnings(job)
+    job.metrics.run = "update"
+    job.metrics.write(output_dir)
+    update_manifest(output_dir, lambda m: m.update(options=merged))
+    log_debug(f"✅ Finished updating bundle: {bundle_path}")
+    return output_dir
+
+def add_fastlogs(bundle_dir, output_dir, job):
+    """Decode the supportlogs of a bundle parsed without fastlogs and merge them into its timeline."""
+    if job.sources is None:
+        job.sources = SourceTable(output_dir, keep=True)
+    with job.stage("fastlogs"):
+        log_debug("⚡ Collecting fastlog files and entries...")
+        entries, fastlog_files = collect_fastlog_outputs(bundle_dir, output_dir, job=job)
+        log_debug(f"⚡ Collected {len(entries)} fastlog entries from {len(fastlog_files)} files")
+    with job.timed("merge"):
+        entries.sort()
+        writer = merge_partitions(output_dir, entries, compression=job.options.get("compression"),
+                                  granularity=job.options.get("partition"))
+        entries.discard()
+        write_json_atomic(os.path.join(output_dir, "fastlog_index.json"), fastlog_files)
+    job.metrics.add_bytes_written("merge", writer.bytes)
+    publish_stage(output_dir, "timeline", job)
+
+def parse_bundle(bundle_path, output_dir, options=None, job=None, incremental=True):
+    """Parse a support bundle into ``output_dir``.
+
+    An interrupted parse with the same options is resumed. With ``incremental``,
+    a complete output only gets the collectors the new options add.
+    """
+    job = job or ParseJob(bundle_path)
+    options = options or job.options
+    previous = load_manifest(output_dir)
+    if incremental and previous.get("status") == "complete" \
+            and previous.get("bundle") == os.path.abspath(bundle_path):
+        added = options_delta(previous["options"], options)
+        if added is not None:
+            return update_parsed_bundle(bundle_path, output_dir, previous["options"], options, added, job)
+
+    log_debug(f"📦 Starting parse_bundle for: {bundle_path}")
+    prepare_job(job, options)
+
+    os.makedirs(output_dir, exist_ok=True)
+    scratch_dir = os.path.join("tmp_extracted", os.path.basename(bundle_path).replace(".tar.gz", ""))
+    job.cancel_token.register_scratch(scratch_dir)
+    job.resume = can_resume(previous, bundle_path, options)
+    done = set()
+    if job.resume:
+        # Same bundle and options as an interrupted run: keep what it finished.
+        done = {stage for stage, status in previous["stages"].items() if status == "done"}
+        log_debug(f"♻️ Resuming interrupted parse of {bundle_path} (done: {', '.join(sorted(done)) or 'nothing yet'})")
+        set_status(output_dir, "parsing")
+        for stage in ARTIFACT_STAGES:
+            if stage in done:
+                job.emit(stage, "published", output_dir=output_dir)
+    else:
+        update_manifest(output_dir, lambda m: m.update(bundle=os.path.abspath(bundle_path), options=options,
+                                                       status="parsing", stages={}, contexts={}))
+    job.plan(planned_stages(options, timeline_done="timeline" in done))
+    job.journal = ParseJournal(output_dir, resume=job.resume)
+    if job.resume:
+        remove_stale_scratch(output_dir)
+    lazy = options.get("lazy_contexts", False)
+
+    try:
+        with job.stage("extract"):
+            extracted = job.journal.get("stage", "extract")
+            if extracted and os.path.isdir(extracted["dir"]):
+                bundle_dir = extracted["dir"]
+                log_debug(f"♻️ Reusing extracted bundle: {bundle_dir}")
+            else:
+                bundle_dir = extract_bundle(bundle_path, job=job)
+                if bundle_dir:
+                    job.journal.record("stage", "extract", dir=os.path.abspath(bundle_dir))
+
+        if not bundle_dir:
+            log_debug(f"❌ Failed to extract {bundle_path}")
+            set_status(output_dir, "failed")
+            return None
+
+        include_fastlogs = options.get("include_fastlogs", True)
+        include_vsf = options.get("include_vsf", True)
+        include_prevboot = options.get("include_prevboot", True)
+        include_linecards = options.get("include_linecards", True)
+
+        log_debug(f"🔧 Options → Fastlogs: {include_fastlogs}, VSF: {include_vsf}, PrevBoot: {include_prevboot}, Linecards: {include_linecards}")
+
+        if "timeline" in done:
+            log_debug("⏭️ Timeline already written by the interrupted run")
+        else:
+            logs, fastlog_files = collect_context_logs(bundle_dir, output_dir, job, include_fastlogs=include_fastlogs,
+                                                       publish_event_logs="event_logs" not in done)
+            log_debug(f"📊 Total parsed log entries: {len(logs)}")
+
+            write_context_logs(output_dir, logs, fastlog_files, job)
+            if load_manifest(output_dir)["stages"].get("event_logs") != "done":
+                set_stage(output_dir, "event_logs", "done")
+            publish_stage(output_dir, "timeline", job)
+
+        with job.stage("showtech"):
+            if {"showtech", "diag"} <= done:
+                log_debug("⏭️ Showtech and diag dumps already written by the interrupted run")
+            else:
+                write_showtech_and_diag(bundle_dir, output_dir, job)
+
+        if include_linecards:
+            parse_linecards_stage(bundle_dir, output_dir, job, lazy)
+        if include_vsf:
+            parse_members_stage(bundle_dir, output_dir, job, lazy)
+        if include_prevboot:
+            parse_prev_boots_stage(bundle_dir, output_dir, job, lazy)
+    except ParseCancelled:
+        log_debug(f"🛑 Parsing cancelled: {bundle_path}")
+        job.cancel_token.cleanup_scratch()
+        # Keep the output dir: its manifest and journal let the next parse resume.
+        set_status(output_dir, "cancelled")
+        raise
+    except Exception:
+        set_status(output_dir, "failed")
+        raise
+    finally:
+        release_budget(job)
 
     readme_path = find_readme()
     if readme_path:
@@ -781,16 +1484,15 @@ def parse_bundle(bundle_path, output_dir, options=None):
 
     try:
         shutil.rmtree(bundle_dir)
+        job.cancel_token.release_scratch(scratch_dir)
         log_debug(f"🧹 Cleaned up temporary directory: {bundle_dir}")
     except Exception as e:
         log_debug(f"⚠️ Failed to clean temporary directory {bundle_dir}: {e}")
 
+    report_warnings(job)
+    job.metrics.write(output_dir)
+    clear_update_metrics(output_dir)
+    job.journal.clear()
+    set_status(output_dir, "complete")
     log_debug(f"✅ Finished parsing bundle: {bundle_path}")
     return output_dir
-
-
-
-
-
-
-
@@ -0,0 +1,275 @@
+# partitions.py
+#
+# A context's timeline, split by time into daily (or hourly) partitions under
+# timeline/. Each partition is a directory TimelineWriter writes as it would a
+# whole timeline, with its own chunk index, entity index, rollup and template
+# summary, so it can be read, searched or replaced on its own. Writers of one
+# timeline share a TemplateMiner, so template ids and versions hold across
+# partitions. partitions.json lists the partitions in time order with their
+# rows and first/last timestamps; it is written last, so readers see either
+# the old partitions or the new ones.
+#
+# The dashboard loads only the partitions overlapping its Time Range, fleet
+# searches skip the rest, and merging new records into a parsed context
+# (fastlogs added later) rewrites only the partitions they fall in.
+
+import heapq
+import itertools
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime
+
+from logviewer.chunks import CHUNK_INDEX_FILE
+from logviewer.entities import ENTITY_INDEX_FILE
+from logviewer.rollup import ROLLUP_FILE
+from logviewer.templates import TEMPLATES_FILE, TemplateMiner, load_summary, write_summary
+from logviewer.timeline import (TimelineWriter, check_compression, find_timeline, iter_timeline,
+                                record_epoch_us, timeline_candidates, to_epoch_us)
+
+PARTITIONS_FILE = "partitions.json"
+PARTITIONS_VERSION = 1
+PARTITION_DIR = "timeline"
+GRANULARITIES = {"day": 10, "hour": 13}  # length of the timestamp prefix naming a partition
+DEFAULT_GRANULARITY = "day"
+UNDATED = "undated"  # partition of records without a timestamp; sorts after every date
+
+# Files of a single-file timeline at the root of a context, replaced by partitions.
+MONOLITHIC_FILES = (ENTITY_INDEX_FILE, ROLLUP_FILE, CHUNK_INDEX_FILE)
+
+
+def partition_key(timestamp, granularity=DEFAULT_GRANULARITY):
+    return timestamp[:GRANULARITIES[granularity]] if timestamp else UNDATED
+
+
+def _epoch_us(timestamp):
+    return to_epoch_us(datetime.fromisoformat(timestamp)) if timestamp else None
+
+
+class PartitionIndex:
+    """A loaded ``partitions.json``."""
+
+    def __init__(self, output_dir, data):
+        self.output_dir = output_dir
+        self.granularity = data["granularity"]
+        self.templates = data["templates"]  # [template id, text] of every version, by version
+        self.partitions = data["partitions"]  # {key, dir, rows, bytes, first, last}, in time order
+
+    @classmethod
+    def load(cls, output_dir):
+        try:
+            with open(os.path.join(output_dir, PARTITIONS_FILE)) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != PARTITIONS_VERSION:
+            return None
+        return cls(output_dir, data)
+
+    @property
+    def rows(self):
+        return sum(partition["rows"] for partition in self.partitions)
+
+    def path(self, partition):
+        return os.path.join(self.output_dir, PARTITION_DIR, partition["dir"])
+
+    def span(self):
+        """First and last timestamp of the dated partitions, or (None, None)."""
+        dated = [partition for partition in self.partitions if partition["first"]]
+        if not dated:
+            return None, None
+        return dated[0]["first"], dated[-1]["last"]
+
+    def select(self, window=None):
+        """The partitions that can hold rows inside ``window`` (a TimeWindow); all of them when None.
+
+        Undated rows are never inside a window.
+        """
+        if window is None:
+            return list(self.partitions)
+        return [partition for partition in self.partitions if partition["first"]
+                and window.overlaps(_epoch_us(partition["first"]), _epoch_us(partition["last"]))]
+
+
+def load_partitions(output_dir):
+    """The partition index of a parsed context, or None when its timeline is a single file (older parses)."""
+    return PartitionIndex.load(output_dir)
+
+
+def has_timeline(output_dir):
+    """Whether a parsed context has a timeline, partitioned or not."""
+    return os.path.exists(os.path.join(output_dir, PARTITIONS_FILE)) or find_timeline(output_dir) is not None
+
+
+def timeline_parts(output_dir, window=None):
+    """Directories holding the timeline of a context, in time order: the partitions
+    overlapping ``window``, or the context itself for a single-file timeline."""
+    index = load_partitions(output_dir)
+    if index is not None:
+        return [index.path(partition) for partition in index.select(window)]
+    return [output_dir] if find_timeline(output_dir) else []
+
+
+def iter_context(output_dir, window=None):
+    """Yield the records of a context's timeline, partition after partition."""
+    for part in timeline_parts(output_dir, window):
+        timeline = find_timeline(part)
+        if timeline is not None:
+            yield from iter_timeline(timeline)
+
+
+class PartitionedTimelineWriter:
+    """Streams records, in timestamp order, to the partitions of a context's timeline.
+
+    Each partition gets a new directory ``<key>.<run>`` and a TimelineWriter
+    (``timeline.py``) with the same options; it is committed as soon as a
+    record of a later partition arrives. ``commit`` then writes the context's
+    ``templates.json`` summary and ``partitions.json``, and removes the
+    partitions no longer listed and any single-file timeline of the context.
+    Partitions in ``keep`` (key -> ``partitions.json`` entry) stay listed
+    unless rewritten; ``miner`` continues the templates they were written with.
+    """
+
+    def __init__(self, output_dir, compression=None, granularity=None, index_entities=True,
+                 mine_templates=True, rollup=True, miner=None, keep=None):
+        granularity = granularity or DEFAULT_GRANULARITY
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown timeline partitioning: {granularity}")
+        check_compression(compression)
+        self.output_dir = output_dir
+        self.root = os.path.join(output_dir, PARTITION_DIR)
+        os.makedirs(self.root, exist_ok=True)
+        self.compression = compression
+        self.granularity = granularity
+        self.miner = miner if miner is not None else TemplateMiner() if mine_templates else None
+        self.partitions = dict(keep or {})
+        self.count = 0
+        self.bytes = 0  # bytes of the partition timelines written
+        self._prefix = GRANULARITIES[granularity]
+        self._options = {"index_entities": index_entities, "rollup": rollup}
+        self._run = uuid.uuid4().hex[:8]
+        self._written = []  # partition directories this writer created
+        self._done = set()  # keys of the partitions it committed
+        self._key = self._writer = None
+        self._first = self._last = None
+
+    def write(self, record):
+        timestamp = record.get("timestamp")
+        key = timestamp[:self._prefix] if timestamp else UNDATED
+        if key != self._key:
+            self._open(key, timestamp)
+        elif timestamp:
+            self._last = timestamp
+        self._writer.write(record)
+        self.count += 1
+
+    def write_all(self, records):
+        for record in records:
+            self.write(record)
+        return self.count
+
+    def _open(self, key, timestamp):
+        self._close()
+        if key in self._done:
+            raise ValueError(f"timeline records out of order: partition {key} was already written")
+        path = os.path.join(self.root, f"{key}.{self._run}")
+        self._written.append(path)
+        self._writer = TimelineWriter(path, compression=self.compression, mine_templates=False,
+                                      miner=self.miner, **self._options)
+        self._key, self._first, self._last = key, timestamp, timestamp
+
+    def _close(self):
+        if self._writer is None:
+            return
+        path = self._writer.commit()
+        size = os.path.getsize(path)
+        self.partitions[self._key] = {"key": self._key, "dir": os.path.basename(self._writer.output_dir),
+                                      "rows": self._writer.count, "bytes": size,
+                                      "first": self._first, "last": self._last}
+        self._done.add(self._key)
+        self.bytes += size
+        self._writer = None
+
+    def _write_templates(self, entries):
+        """Sum the partitions' template summaries into the context's ``templates.json``."""
+        totals = {}
+        for entry in entries:
+            for template in load_summary(os.path.join(self.root, entry["dir"])):
+                total = totals.get(template["id"])
+                if total is None:
+                    totals[template["id"]] = dict(template)
+                    continue
+                total["count"] += template["count"]
+                total["first_seen"] = min(filter(None, (total["first_seen"], template["first_seen"])), default=None)
+                total["last_seen"] = max(filter(None, (total["last_seen"], template["last_seen"])), default=None)
+        for template_id, total in totals.items():
+            total["template"] = self.miner.templates[template_id].text
+        write_summary(self.output_dir, sorted(totals.values(), key=lambda total: -total["count"]))
+
+    def commit(self):
+        self._close()
+        entries = [self.partitions[key] for key in sorted(self.partitions)]
+        if self.miner is not None:
+            self._write_templates(entries)
+        elif os.path.exists(os.path.join(self.output_dir, TEMPLATES_FILE)):
+            os.remove(os.path.join(self.output_dir, TEMPLATES_FILE))
+        data = {"version": PARTITIONS_VERSION, "granularity": self.granularity,
+                "templates": [list(version) for version in self.miner.versions] if self.miner is not None else [],
+                "partitions": entries}
+        path = os.path.join(self.output_dir, PARTITIONS_FILE)
+        with open(path + ".tmp", "w") as f:
+            f.write(json.dumps(data, separators=(",", ":")))
+        os.replace(path + ".tmp", path)
+        listed = {entry["dir"] for entry in entries}
+        for name in os.listdir(self.root):
+            if name not in listed:
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+        for stale in timeline_candidates(self.output_dir) + \
+                [os.path.join(self.output_dir, name) for name in MONOLITHIC_FILES]:
+            if os.path.exists(stale):
+                os.remove(stale)
+        return path
+
+    def abort(self):
+        if self._writer is not None:
+            self._writer.abort()
+            self._writer = None
+        for path in self._written:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+
+def merge_partitions(output_dir, timeline, compression=None, granularity=None):
+    """Merge a sorted Timeline into the timeline already written to ``output_dir``.
+
+    Only the partitions the new records fall in are rewritten, each merged
+    with its existing records; on equal timestamps existing records come
+    first, as they would had the new entries been appended before sorting.
+    A single-file timeline, or one partitioned otherwise, is rewritten whole.
+    """
+    granularity = granularity or DEFAULT_GRANULARITY
+    index = load_partitions(output_dir)
+    if index is None or index.granularity != granularity:
+        with PartitionedTimelineWriter(output_dir, compression=compression, granularity=granularity) as writer:
+            writer.write_all(heapq.merge(iter_context(output_dir), timeline, key=record_epoch_us))
+        return writer
+    miner = TemplateMiner()
+    miner.seed(index.templates)
+    existing = {partition["key"]: partition for partition in index.partitions}
+    with PartitionedTimelineWriter(output_dir, compression=compression, granularity=granularity,
+                                   miner=miner, keep=existing) as writer:
+        for key, records in itertools.groupby(timeline, key=lambda record: partition_key(record.get("timestamp"),
+                                                                                          granularity)):
+            partition = existing.get(key)
+            old = iter_timeline(find_timeline(index.path(partition))) if partition else iter(())
+            writer.write_all(heapq.merge(old, records, key=record_epoch_us))
+    return writer
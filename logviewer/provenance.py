@@ -0,0 +1,173 @@
+# provenance.py
+#
+# Where each timeline row came from. Every source file of a context gets a
+# small integer id in raw_sources.json, and rows carry "file_id" plus
+# "offset": the byte offset of their line in the (decompressed) file, or the
+# entry object offset in a systemd journal. Event logs, journals and the
+# decoded text of each supportlog are kept under raw/ (hard-linked when
+# possible), so raw_context() can seek straight to a row and show the lines
+# around it, including lines no pattern matched.
+
+import gzip
+import json
+import os
+import shutil
+import threading
+from datetime import datetime, timezone
+
+from logviewer.manifest import write_json_atomic
+from logviewer.systemd_journal import JournalFile, JournalFormatError
+
+RAW_DIR = "raw"
+RAW_SOURCES_FILE = "raw_sources.json"
+RAW_SOURCES_VERSION = 1
+CONTEXT_READ_BYTES = 16 * 1024  # bytes read before an offset at a time when looking for earlier lines
+
+SOURCE_TEXT = "text"  # plain text; offsets are byte offsets
+SOURCE_GZIP = "gzip"  # gzip; offsets are into the decompressed stream
+SOURCE_JOURNAL = "journal"  # systemd journal; offsets are entry object offsets
+
+
+def source_kind(path, compressed=False):
+    if path.endswith((".journal", ".journal~")):
+        return SOURCE_JOURNAL
+    return SOURCE_GZIP if compressed else SOURCE_TEXT
+
+
+def load_sources(output_dir):
+    """``{file_id: source}`` of a parsed context; empty for parses made before provenance was recorded."""
+    try:
+        with open(os.path.join(output_dir, RAW_SOURCES_FILE)) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != RAW_SOURCES_VERSION:
+        return {}
+    return {source["id"]: source for source in data["sources"]}
+
+
+class SourceTable:
+    """The source files of one context's output dir, each with a stable id.
+
+    Ids are written to ``raw_sources.json`` as they are handed out, so a resumed
+    parse or an incremental update gives a file the id its checkpointed or
+    already written rows use. Without ``keep``, the table and raw/ files of an
+    earlier parse are discarded.
+    """
+
+    def __init__(self, output_dir, keep=False):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, RAW_SOURCES_FILE)
+        self._lock = threading.Lock()
+        if keep:
+            self._sources = load_sources(output_dir)
+        else:
+            self._sources = {}
+            shutil.rmtree(os.path.join(output_dir, RAW_DIR), ignore_errors=True)
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        self._ids = {source["name"]: file_id for file_id, source in self._sources.items()}
+
+    def register(self, name, kind, path, full_path=None):
+        """Id of the source ``name`` (its path inside the bundle).
+
+        ``path`` is where it is read back from, relative to the output dir.
+        With ``full_path`` the file is kept there, hard-linked when possible.
+        """
+        with self._lock:
+            file_id = self._ids.get(name)
+            if file_id is not None:
+                return file_id
+            if full_path is not None:
+                target = os.path.join(self.output_dir, path)
+                if not os.path.exists(target):
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    try:
+                        os.link(full_path, target)
+                    except OSError:
+                        shutil.copyfile(full_path, target)
+            file_id = len(self._sources)
+            self._sources[file_id] = {"id": file_id, "name": name, "kind": kind, "path": path}
+            self._ids[name] = file_id
+            os.makedirs(self.output_dir, exist_ok=True)
+            write_json_atomic(self.path, {"version": RAW_SOURCES_VERSION, "sources": list(self._sources.values())})
+            return file_id
+
+    def keep_file(self, name, full_path, compressed=False):
+        """Register an event log or journal file of the bundle, keeping a copy under raw/."""
+        return self.register(name, source_kind(full_path, compressed), os.path.join(RAW_DIR, name), full_path)
+
+
+def _text_lines(f, offset, before, after):
+    # Earlier lines: read backwards in growing steps until enough line starts are found.
+    start = offset
+    head = b""
+    while start > 0 and head.count(b"\n") <= before:
+        step = max(CONTEXT_READ_BYTES, len(head))
+        start = max(0, start - step)
+        f.seek(start)
+        head = f.read(offset - start)
+    earlier = head.split(b"\n")
+    # The last piece is empty (the row's line starts at offset); the first may be cut off.
+    earlier = earlier[:-1] if earlier and earlier[-1] == b"" else earlier
+    if start > 0:
+        earlier = earlier[1:]
+    earlier = earlier[-before:] if before else []
+    f.seek(offset)
+    later = []
+    for line in f:
+        later.append(line[:-1] if line.endswith(b"\n") else line)
+        if len(later) > after:
+            break
+    position = offset - sum(len(line) + 1 for line in earlier)
+    lines = []
+    for line in earlier + later:
+        lines.append((position, line.rstrip(b"\r").decode("utf-8", "replace")))
+        position += len(line) + 1
+    return lines
+
+
+def _journal_lines(path, offset, before, after):
+    with JournalFile(path) as journal:
+        offsets = list(journal.entry_offsets())
+        try:
+            index = offsets.index(offset)
+        except ValueError:
+            return []
+        wanted = offsets[max(0, index - before):index + after + 1]
+        lines = []
+        for entry_offset in wanted:
+            realtime, fields = journal.entry(entry_offset)
+            stamp = datetime.fromtimestamp(realtime / 1e6, timezone.utc).isoformat()
+            ident = fields.get("SYSLOG_IDENTIFIER") or fields.get("_COMM") or ""
+            pid = fields.get("_PID") or fields.get("SYSLOG_PID")
+            lines.append((entry_offset, f"{stamp} {fields.get('_HOSTNAME', '')} {ident}"
+                                        f"{f'[{pid}]' if pid else ''}: {fields.get('MESSAGE', '')}"))
+        return lines
+
+
+def raw_context(output_dir, file_id, offset, lines=5):
+    """The raw lines around a timeline row: ``lines`` before and after the row's own.
+
+    Returns ``{"name", "kind", "lines": [(offset, text)], "row": index of the row's line}``,
+    or None when the context has no such source (parses without provenance,
+    rows from journalctl's export) or the source file is gone.
+    """
+    source = load_sources(output_dir).get(file_id)
+    if source is None or offset is None:
+        return None
+    path = os.path.join(output_dir, source["path"])
+    if not os.path.exists(path):
+        return None
+    try:
+        if source["kind"] == SOURCE_JOURNAL:
+            found = _journal_lines(path, offset, lines, lines)
+        else:
+            # gzip seeks forward by decompressing; it is only read up to the window.
+            opener = gzip.open if source["kind"] == SOURCE_GZIP else open
+            with opener(path, "rb") as f:
+                found = _text_lines(f, offset, lines, lines)
+    except (OSError, EOFError, JournalFormatError):
+        return None
+    row = next((index for index, (position, _) in enumerate(found) if position == offset), None)
+    return {"name": source["name"], "kind": source["kind"], "lines": found, "row": row}
@@ -0,0 +1,145 @@
+# rollup.py
+#
+# A small per-context summary of a timeline, rollup.json, written with it:
+# row count, first/last timestamp, how many rows each severity, process and
+# event id has, and a Bloom filter of the words its messages contain. Fleet
+# searches (search.py) read only this to rule out contexts that cannot match,
+# before opening their timelines.
+
+import base64
+import hashlib
+import json
+import math
+import os
+import re
+
+ROLLUP_FILE = "rollup.json"
+ROLLUP_VERSION = 1
+BLOOM_FALSE_POSITIVE_RATE = 0.01
+ROLLUP_FIELDS = ("severity", "process", "event_id")
+
+# Words are lower-cased runs of \w. All-digit words (counters, octets, pids) are
+# left out: they are most of the distinct words and rarely searched for alone.
+WORD_RE = re.compile(r"\w+")
+
+
+def words(text):
+    """The indexable words of ``text``."""
+    return {word for word in set(WORD_RE.findall(text.lower())) if not word.isdigit()}
+
+
+class BloomFilter:
+    """A fixed-size Bloom filter over strings, with double hashing from one blake2b digest."""
+
+    def __init__(self, bits, hashes, data=None):
+        self.bits = bits
+        self.hashes = hashes
+        self.data = bytearray(data) if data is not None else bytearray((bits + 7) // 8)
+
+    @classmethod
+    def for_items(cls, items, rate=BLOOM_FALSE_POSITIVE_RATE):
+        items = list(items)
+        count = max(1, len(items))
+        bits = max(64, math.ceil(-count * math.log(rate) / math.log(2) ** 2))
+        bloom = cls(bits, max(1, round(bits / count * math.log(2))))
+        for item in items:
+            bloom.add(item)
+        return bloom
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return [(first + index * second) % self.bits for index in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.data[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.data[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def to_json(self):
+        return {"bits": self.bits, "hashes": self.hashes, "data": base64.b64encode(bytes(self.data)).decode("ascii")}
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(data["bits"], data["hashes"], base64.b64decode(data["data"]))
+
+
+class RollupBuilder:
+    """Accumulates the rollup of a timeline as TimelineWriter writes it.
+
+    The words arrive through ``add_words``, a chunk at a time from the chunk
+    index (``chunks.py``), which extracts them anyway.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.first = self.last = None
+        self._combinations = {}  # (severity, process, event_id) -> rows
+        self._words = set()
+
+    def add(self, record):
+        self.rows += 1
+        get = record.get
+        key = (get("severity"), get("process"), get("event_id"))
+        self._combinations[key] = self._combinations.get(key, 0) + 1
+        timestamp = get("timestamp")
+        if timestamp is not None:
+            if self.first is None:
+                self.first = self.last = timestamp
+            elif timestamp > self.last:
+                self.last = timestamp
+            elif timestamp < self.first:
+                self.first = timestamp
+
+    def add_words(self, found):
+        self._words |= found
+
+    def write(self, output_dir):
+        """Atomically write ``rollup.json``."""
+        fields = {field: {} for field in ROLLUP_FIELDS}
+        for values, count in self._combinations.items():
+            for field, value in zip(ROLLUP_FIELDS, values):
+                if value is not None:
+                    fields[field][str(value)] = fields[field].get(str(value), 0) + count
+        data = {"version": ROLLUP_VERSION, "rows": self.rows, "first": self.first, "last": self.last,
+                "fields": fields,
+                "words": BloomFilter.for_items(self._words).to_json()}
+        path = os.path.join(output_dir, ROLLUP_FILE)
+        with open(path + ".tmp", "w") as f:
+            f.write(json.dumps(data, separators=(",", ":")))
+        os.replace(path + ".tmp", path)
+        return path
+
+
+class Rollup:
+    """A loaded ``rollup.json``."""
+
+    def __init__(self, data):
+        self.rows = data["rows"]
+        self.first = data["first"]
+        self.last = data["last"]
+        self.fields = data["fields"]
+        self.words = BloomFilter.from_json(data["words"])
+
+    @classmethod
+    def load(cls, output_dir):
+        """The rollup of a parsed context, or None when it has none (older parses)."""
+        try:
+            with open(os.path.join(output_dir, ROLLUP_FILE)) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != ROLLUP_VERSION:
+            return None
+        return cls(data)
+
+    def has_any(self, field, values):
+        """Whether some row's ``field`` is one of ``values``."""
+        counts = self.fields.get(field, {})
+        return any(str(value) in counts for value in values)
+
+    def may_contain(self, text):
+        """False only when some indexable word of ``text`` is in no message."""
+        return all(word in self.words for word in words(text))
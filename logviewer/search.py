@@ -0,0 +1,277 @@
+# search.py
+#
+# Fleet-wide search: one query (time range, severity, process, event id,
+# keyword or regex) over every context of many parsed bundles. A context, or
+# a partition of its timeline (partitions.py), whose rollup.json (rollup.py)
+# shows it cannot match is skipped without opening its timeline; the rest are
+# scanned in parallel worker processes and their rows streamed back merged by
+# timestamp.
+
+import heapq
+import itertools
+import multiprocessing
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from operator import itemgetter
+
+from logviewer.chunks import ChunkIndex, keyword_pattern, keyword_words
+from logviewer.entities import EntityIndex, extract_entities, query_entities
+from logviewer.partitions import has_timeline, timeline_parts
+from logviewer.rollup import Rollup
+from logviewer.timeline import (LEGACY_TIMELINE_FILE, TimeWindow, find_timeline, iter_timeline,
+                                iter_timeline_chunks, parse_time_bound, record_epoch_us, to_epoch_us)
+
+DEFAULT_LIMIT = 1000  # rows returned by a search, earliest first
+CONTEXT_PARENTS = ("members", "linecards", "previous")
+NO_TIMESTAMP = float("inf")  # rows without a usable timestamp sort last
+
+
+def normalize_severity(value):
+    """``err``, ``ERR`` and ``LOG_ERR`` all mean the event log severity ``LOG_ERR``."""
+    value = value.strip().upper()
+    return value if value.startswith("LOG_") else "LOG_" + value
+
+
+class SearchQuery:
+    """What to look for. Empty criteria match everything.
+
+    ``keyword`` matches whole words, case-insensitively: "link down" finds
+    "Link down on 1/1/3" but not "uplink downgraded". That is what lets the
+    word filters of rollups and timeline chunks rule them out. ``regex`` is
+    searched for as is and never rules anything out. ``entity`` is read like
+    the dashboard's Entity filter (``entities.py``).
+    """
+
+    def __init__(self, since=None, until=None, severities=(), processes=(), event_ids=(),
+                 keyword=None, regex=None, entity=None):
+        self.window = TimeWindow(parse_time_bound(since), parse_time_bound(until))
+        self.fields = {"severity": {normalize_severity(value) for value in severities},
+                       "process": {str(value) for value in processes},
+                       "event_id": {str(value) for value in event_ids}}
+        self.keyword = (keyword or "").strip() or None
+        self._keyword_re = keyword_pattern(self.keyword) if self.keyword else None
+        self.words = keyword_words(self.keyword) if self.keyword else set()
+        self.entities = query_entities(entity) if entity and entity.strip() else None
+        try:
+            self.regex = re.compile(regex) if regex else None
+        except re.error as e:
+            raise ValueError(f"bad regex {regex!r}: {e}") from e
+
+    @property
+    def timed(self):
+        return self.window.since_us is not None or self.window.until_us is not None
+
+    def may_match(self, rollup):
+        """False when a context with this rollup has no row the query can match."""
+        if rollup.rows == 0:
+            return False
+        if self.timed and rollup.first and rollup.last and not self.window.overlaps(
+                _epoch_us(rollup.first), _epoch_us(rollup.last)):
+            return False
+        for field, values in self.fields.items():
+            if values and not rollup.has_any(field, values):
+                return False
+        return self.keyword is None or rollup.may_contain(self.keyword)
+
+    def matches(self, record, timestamp_us=None, check_entities=True):
+        """Whether ``record`` matches; ``check_entities`` is False when the entity index already picked its row."""
+        for field, values in self.fields.items():
+            if values and str(record.get(field)) not in values:
+                return False
+        if self.timed and (timestamp_us is None or not self.window.contains(timestamp_us)):
+            return False
+        check_entities = check_entities and self.entities is not None
+        if self._keyword_re is not None or self.regex is not None or check_entities:
+            message = record.get("message")
+            if not isinstance(message, str):
+                return False
+            if self._keyword_re is not None and not self._keyword_re.search(message):
+                return False
+            if self.regex is not None and not self.regex.search(message):
+                return False
+            if check_entities and not self._has_entities(message):
+                return False
+        return True
+
+    def _has_entities(self, message):
+        found = extract_entities(message)
+        values = {value for _, value in found}
+        return all((kind, value) in found if kind is not None else value in values for kind, value in self.entities)
+
+
+def _epoch_us(timestamp):
+    return to_epoch_us(datetime.fromisoformat(timestamp))
+
+
+def _timestamp_us(record):
+    try:
+        return record_epoch_us(record)
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def context_dirs(output_dir, context=""):
+    """``[(context, path)]`` of every parsed context under a bundle's output dir: the main
+    bundle (context ""), VSF members, linecards and previous boots, nested as parsed."""
+    found = [(context, output_dir)] if has_timeline(output_dir) else []
+    for parent in CONTEXT_PARENTS:
+        parent_dir = os.path.join(output_dir, parent)
+        if not os.path.isdir(parent_dir):
+            continue
+        for name in sorted(os.listdir(parent_dir)):
+            path = os.path.join(parent_dir, name)
+            if os.path.isdir(path):
+                found.extend(context_dirs(path, f"{context}/{parent}/{name}".lstrip("/")))
+    return found
+
+
+def _chunk_span_us(chunk):
+    return (_epoch_us(chunk["first"]) if chunk["first"] else None,
+            _epoch_us(chunk["last"]) if chunk["last"] else None)
+
+
+def search_context(parts, query, limit=DEFAULT_LIMIT):
+    """The first ``limit`` rows of one context matching ``query``, as ``[(epoch_us, record)]``,
+    plus how many timeline chunks were read and how many there are.
+
+    Runs in a worker process. ``parts`` are the directories of the context's
+    timeline to search, in time order (``timeline_parts``).
+    """
+    rows, read, total = [], 0, 0
+    for part in parts:
+        found, part_read, part_total = search_timeline(part, query, limit - len(rows))
+        rows.extend(found)
+        read += part_read
+        total += part_total
+        if len(rows) >= limit:
+            break
+    return rows, read, total
+
+
+def search_timeline(path, query, limit=DEFAULT_LIMIT):
+    """``search_context`` for the one timeline in ``path``.
+
+    With a chunk index (``chunks.py``) only the chunks whose time span, words
+    and entity index rows allow a match are read. NDJSON timelines are written
+    in timestamp order, so the scan stops at ``limit`` matches or past ``until``.
+    """
+    timeline = find_timeline(path)
+    if timeline is None:
+        return [], 0, 0
+    ordered = not timeline.endswith(LEGACY_TIMELINE_FILE)
+    index = ChunkIndex.load(path, timeline) if ordered else None
+    wanted_rows = None
+    if index is None:
+        records = enumerate(iter_timeline(timeline))
+        read, total = 0, 0
+    else:
+        if query.entities is not None:
+            entities = EntityIndex.load(path)
+            if entities is not None and entities.rows == index.rows:
+                wanted_rows = entities.lookup(query.entities)
+        positions = index.candidates(query.words, wanted_rows)
+        if query.timed:
+            positions = [position for position in positions
+                         if query.window.overlaps(*_chunk_span_us(index.chunks[position]))]
+        records = iter_timeline_chunks(timeline, index, positions)
+        read, total = len(positions), len(index.chunks)
+        wanted_rows = set(wanted_rows) if wanted_rows is not None else None
+    until = query.window.until_us
+    rows = []
+    for row, record in records:
+        if wanted_rows is not None and row not in wanted_rows:
+            continue
+        timestamp = _timestamp_us(record) if query.timed or ordered else None
+        if ordered and until is not None and timestamp is not None and timestamp > until:
+            break
+        if query.matches(record, timestamp, check_entities=wanted_rows is None):
+            rows.append((NO_TIMESTAMP if timestamp is None else timestamp, record))
+            if ordered and len(rows) >= limit:
+                break
+    rows.sort(key=itemgetter(0))
+    return rows[:limit], read, total
+
+
+def search_bundles(bundles, query, workers=None, limit=DEFAULT_LIMIT, progress=None):
+    """Yield the rows of ``bundles`` (``[(name, output_dir)]``) matching ``query``, earliest first.
+
+    Each row is its timeline record plus "bundle" and "context". Rows are
+    yielded as soon as no context still being searched can produce an earlier
+    one, judged by the first timestamp in its rollup. ``progress`` is called
+    with a dict of counts (contexts, skipped, searched, failed, matched, and
+    the timeline chunks read of those indexed) whenever they change.
+    """
+    contexts = [(name, context, path) for name, output_dir in bundles for context, path in context_dirs(output_dir)]
+    stats = {"contexts": len(contexts), "skipped": 0, "searched": 0, "failed": 0, "matched": 0,
+             "chunks": 0, "chunks_read": 0}
+
+    def report():
+        if progress:
+            progress(dict(stats))
+
+    since = query.window.since_us
+    runnable = []
+    for name, context, path in contexts:
+        parts, earliest = [], None
+        for part in timeline_parts(path, query.window if query.timed else None):
+            rollup = Rollup.load(part)
+            if rollup is not None and not query.may_match(rollup):
+                continue
+            if not parts:
+                # The earliest row this context can still yield: None when there is no rollup to say.
+                earliest = _epoch_us(rollup.first) if rollup is not None and rollup.first else None
+            parts.append(part)
+        if not parts:
+            stats["skipped"] += 1
+            continue
+        if since is not None:
+            earliest = max(earliest, since) if earliest is not None else since
+        runnable.append((name, context, parts, earliest))
+    report()
+    if not runnable:
+        return
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(runnable)))
+    # spawn, not fork: the dashboard and GUI call this from threaded processes.
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    pending = {}
+    try:
+        pending = {executor.submit(search_context, parts, query, limit): (name, context, parts, earliest)
+                   for name, context, parts, earliest in runnable}
+        heap = []
+        order = itertools.count()  # ties keep arrival order; records themselves don't compare
+        emitted = 0
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, context, _, _ = pending.pop(future)
+                try:
+                    rows, read, total = future.result()
+                except BrokenProcessPool:
+                    raise
+                except Exception:  # an unreadable timeline fails its context, not the search
+                    stats["failed"] += 1
+                    continue
+                stats["searched"] += 1
+                stats["matched"] += len(rows)
+                stats["chunks_read"] += read
+                stats["chunks"] += total
+                for timestamp, record in rows:
+                    heapq.heappush(heap, (timestamp, next(order), {**record, "bundle": name, "context": context}))
+            watermark = min((entry[3] if entry[3] is not None else -NO_TIMESTAMP for entry in pending.values()),
+                            default=NO_TIMESTAMP)
+            while heap and heap[0][0] <= watermark:
+                yield heapq.heappop(heap)[2]
+                emitted += 1
+                if emitted >= limit:
+                    report()
+                    return
+            report()
+    finally:
+        # Drop the contexts not started yet when the limit is hit (shutdown's cancel_futures needs 3.9).
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
@@ -0,0 +1,187 @@
+# service.py
+#
+# The viewer service: one long-lived Streamlit process (app.py) on one port
+# serving every bundle in the state DB, picked by URL
+# (/?bundle=<name>&page=bundle|merged|search). app.py reads the bundle list
+# from the state DB on every page load, so bundles parsed after the service
+# started show up without a restart, and its caches (loaded timelines,
+# entity/chunk indexes, merged timelines) stay warm across bundles and
+# browser sessions. The CLI and GUI open a URL against the running service
+# and start it only when none answers; its port and pid are kept in the
+# state DB.
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import webbrowser
+from pathlib import Path
+
+from logviewer.partitions import has_timeline
+from logviewer.state import clear_viewer_service, get_parsed_bundles, get_viewer_service, set_viewer_service
+
+APP_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+DEFAULT_VIEWER_PORT = 8501
+HEALTH_PATH = "/_stcore/health"
+START_TIMEOUT = 30
+VIEWER_LOG = os.path.expanduser("~/.logviewer_viewer.log")
+PAGES = ("bundle", "merged", "search")
+
+
+def _unique_names(bundles):
+    """Name bundles sharing a file name by as much of their path as tells them apart (``site1/support.tar.gz``)."""
+    groups = {}
+    for bundle in bundles:
+        groups.setdefault(bundle["name"], []).append(bundle)
+    for group in groups.values():
+        if len(group) < 2:
+            continue
+        parts = [Path(bundle["source"]).parts for bundle in group]
+        for depth in range(2, max(map(len, parts)) + 1):
+            names = ["/".join(path[-depth:]) for path in parts]
+            if len(set(names)) == len(names):
+                break
+        for bundle, name in zip(group, names):
+            bundle["name"] = name
+
+
+def viewer_bundles():
+    """``[{"name", "path", "source", "timestamp"}]`` of every parsed bundle with a timeline, newest first.
+
+    A bundle is named by its file name, or by enough of its path to be unique.
+    """
+    bundles = [{"name": os.path.basename(source), "path": os.path.abspath(meta["output_path"]),
+                "source": source, "timestamp": meta.get("timestamp", "")}
+               for source, meta in get_parsed_bundles().items() if has_timeline(meta["output_path"])]
+    _unique_names(bundles)
+    return sorted(bundles, key=lambda bundle: bundle["timestamp"], reverse=True)
+
+
+def match_bundles(bundles, name):
+    """The entries of ``bundles`` that ``name`` can mean: the one named exactly so, the newest for 'latest',
+    else those whose name, file name or output dir starts with it."""
+    if not bundles or not name:
+        return []
+    if name == "latest":
+        return bundles[:1]
+    exact = [bundle for bundle in bundles if bundle["name"] == name]
+    if exact:
+        return exact
+    return [bundle for bundle in bundles if bundle["name"].startswith(name)
+            or os.path.basename(bundle["source"]).startswith(name) or os.path.basename(bundle["path"]).startswith(name)]
+
+
+def find_bundle(bundles, name):
+    """The one entry of ``bundles`` ``name`` means (see match_bundles), or None when it means none or several."""
+    matches = match_bundles(bundles, name)
+    return matches[0] if len(matches) == 1 else None
+
+
+def viewer_url(port, bundle=None, page=None):
+    query = {key: value for key, value in (("bundle", bundle), ("page", page)) if value}
+    return f"http://localhost:{port}/" + (f"?{urllib.parse.urlencode(query)}" if query else "")
+
+
+def service_alive(port, timeout=1):
+    """Whether a viewer answers its health check on ``port``."""
+    try:
+        with urllib.request.urlopen(f"http://localhost:{port}{HEALTH_PATH}", timeout=timeout) as response:
+            return response.status == 200
+    except (OSError, urllib.error.URLError):
+        return False
+
+
+def _port_free(port):
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        try:
+            s.bind(("", port))
+        except OSError:
+            return False
+    return True
+
+
+def _free_port(preferred):
+    if _port_free(preferred):
+        return preferred
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("", 0))
+        return s.getsockname()[1]
+
+
+def _log_tail(lines=20):
+    try:
+        with open(VIEWER_LOG, errors="replace") as f:
+            return "".join(f.readlines()[-lines:])
+    except OSError:
+        return ""
+
+
+def running_service():
+    """``{"port", "pid", "started"}`` of the viewer service if it is up, else None."""
+    service = get_viewer_service()
+    if service and service_alive(service["port"]):
+        return service
+    return None
+
+
+def start_viewer_service(port=None, timeout=START_TIMEOUT):
+    """Port of the running viewer service, starting it first when none answers.
+
+    The service runs detached, so it outlives the CLI command or GUI that
+    started it; its output goes to ~/.logviewer_viewer.log.
+    """
+    service = running_service()
+    if service and (port is None or service["port"] == port):
+        return service["port"]
+    if service:
+        stop_viewer_service()
+    if not os.path.exists(APP_SCRIPT):
+        raise RuntimeError(f"Viewer app not found at {APP_SCRIPT}")
+    port = _free_port(port or DEFAULT_VIEWER_PORT)
+    detach = ({"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.DETACHED_PROCESS}
+              if os.name == "nt" else {"start_new_session": True})
+    with open(VIEWER_LOG, "ab") as log:
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", APP_SCRIPT, "--server.port", str(port),
+             "--server.headless", "true"],
+            stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+            cwd=os.path.dirname(APP_SCRIPT), **detach)
+    set_viewer_service(port, proc.pid)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if service_alive(port):
+            return port
+        if proc.poll() is not None:
+            break
+        time.sleep(0.3)
+    if proc.poll() is None:
+        proc.terminate()
+    clear_viewer_service()
+    raise RuntimeError(f"Viewer failed to start on port {port}:\n{_log_tail()}")
+
+
+def stop_viewer_service():
+    """Stop the viewer service; returns its port, or None when none was running."""
+    service = get_viewer_service()
+    clear_viewer_service()
+    # Only signal the recorded pid while its port still answers, in case the pid was reused.
+    if not service or not service["pid"] or not service_alive(service["port"]):
+        return None
+    try:
+        os.kill(service["pid"], signal.SIGTERM)
+    except OSError:
+        return None
+    return service["port"]
+
+
+def open_viewer(bundle=None, page=None, port=None, browser=True):
+    """Open the viewer (a bundle's page, if given) in the browser, starting the service if needed; returns the URL."""
+    url = viewer_url(start_viewer_service(port), bundle, page)
+    if browser:
+        webbrowser.open(url)
+    return url
@@ -13,22 +13,30 @@ def init_db():
         CREATE TABLE IF NOT EXISTS parsed_bundles (
             bundle_path TEXT PRIMARY KEY,
             output_path TEXT NOT NULL,
-            port INTEGER,
             timestamp TEXT NOT NULL
         )
     """)
+    # Databases from before the viewer service keep a per-bundle port column; it is no longer written.
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS viewer_service (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            port INTEGER NOT NULL,
+            pid INTEGER,
+            started TEXT NOT NULL
+        )
+    """)
     conn.commit()
     conn.close()
 
-def add_parsed_bundle(bundle_path, output_path, port=None):
+def add_parsed_bundle(bundle_path, output_path):
     init_db()
     timestamp = datetime.now().isoformat()
     conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     c.execute("""
-        INSERT OR REPLACE INTO parsed_bundles (bundle_path, output_path, port, timestamp)
-        VALUES (?, ?, ?, ?)
-    """, (os.path.abspath(bundle_path), output_path, port, timestamp))
+        INSERT OR REPLACE INTO parsed_bundles (bundle_path, output_path, timestamp)
+        VALUES (?, ?, ?)
+    """, (os.path.abspath(bundle_path), output_path, timestamp))
     conn.commit()
     conn.close()
 
@@ -44,19 +52,44 @@ def get_parsed_bundles():
     init_db()
     conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
-    c.execute("SELECT bundle_path, output_path, port, timestamp FROM parsed_bundles")
+    c.execute("SELECT bundle_path, output_path, timestamp FROM parsed_bundles")
     rows = c.fetchall()
     conn.close()
-    return {row[0]: {"output_path": row[1], "port": row[2], "timestamp": row[3]} for row in rows}
+    return {row[0]: {"output_path": row[1], "timestamp": row[2]} for row in rows}
 
-def get_next_available_port(start_port=8001):
+def get_parsed_paths():
     init_db()
     conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
-    c.execute("SELECT port FROM parsed_bundles WHERE port IS NOT NULL")
-    used_ports = {row[0] for row in c.fetchall()}
+    c.execute("SELECT bundle_path FROM parsed_bundles")
+    paths = {row[0] for row in c.fetchall()}
+    conn.close()
+    return paths
+
+def set_viewer_service(port, pid):
+    init_db()
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute("""
+        INSERT OR REPLACE INTO viewer_service (id, port, pid, started)
+        VALUES (1, ?, ?, ?)
+    """, (port, pid, datetime.now().isoformat()))
+    conn.commit()
+    conn.close()
+
+def get_viewer_service():
+    init_db()
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute("SELECT port, pid, started FROM viewer_service WHERE id = 1")
+    row = c.fetchone()
+    conn.close()
+    return {"port": row[0], "pid": row[1], "started": row[2]} if row else None
+
+def clear_viewer_service():
+    init_db()
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute("DELETE FROM viewer_service")
+    conn.commit()
     conn.close()
-    port = start_port
-    while port in used_ports:
-        port += 1
-    return port
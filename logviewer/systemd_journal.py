@@ -0,0 +1,265 @@
+# systemd_journal.py
+#
+# Reader for systemd journal files (*.journal / *.journal~) that walks their
+# entry arrays through mmap and yields each entry's realtime timestamp and the
+# requested fields, with no journalctl process and no text rendering. Entries
+# whose payloads use a codec that is not installed (lz4, zstandard) can be
+# read through journalctl's JSON export instead.
+#
+# Format reference: https://systemd.io/JOURNAL_FILE_FORMAT/
+
+import json
+import lzma
+import mmap
+import os
+import struct
+
+try:
+    import lz4.block
+except ImportError:
+    lz4 = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+JOURNAL_SIGNATURE = b"LPKSHHRH"
+JOURNAL_SUFFIXES = (".journal", ".journal~")
+
+HEADER_INCOMPATIBLE_COMPRESSED_XZ = 1 << 0
+HEADER_INCOMPATIBLE_COMPRESSED_LZ4 = 1 << 1
+HEADER_INCOMPATIBLE_KEYED_HASH = 1 << 2
+HEADER_INCOMPATIBLE_COMPRESSED_ZSTD = 1 << 3
+HEADER_INCOMPATIBLE_COMPACT = 1 << 4
+HEADER_INCOMPATIBLE_SUPPORTED = (HEADER_INCOMPATIBLE_COMPRESSED_XZ | HEADER_INCOMPATIBLE_COMPRESSED_LZ4
+                                 | HEADER_INCOMPATIBLE_KEYED_HASH | HEADER_INCOMPATIBLE_COMPRESSED_ZSTD
+                                 | HEADER_INCOMPATIBLE_COMPACT)
+
+OBJECT_DATA = 1
+OBJECT_ENTRY = 3
+OBJECT_ENTRY_ARRAY = 6
+OBJECT_COMPRESSED_XZ = 1 << 0
+OBJECT_COMPRESSED_LZ4 = 1 << 1
+OBJECT_COMPRESSED_ZSTD = 1 << 2
+
+HEADER_MIN_SIZE = 208  # through tail_entry_monotonic
+OBJECT_HEADER = struct.Struct("<BB6xQ")  # type, flags, size (including this header)
+HEADER_FIELDS = struct.Struct("<QQQQQQQQQQQQQQQ")  # header_size ... tail_entry_realtime, from offset 88
+U32 = struct.Struct("<I")
+U64 = struct.Struct("<Q")
+
+# Fields worth keeping for a log timeline; everything else is skipped undecoded.
+TIMELINE_FIELDS = frozenset([b"MESSAGE", b"PRIORITY", b"SYSLOG_IDENTIFIER", b"_COMM", b"_PID", b"SYSLOG_PID",
+                             b"_HOSTNAME"])
+
+# Data objects for these repeat across entries and are shared by offset, so their decoded value is cached.
+CACHED_FIELDS = frozenset([b"PRIORITY", b"SYSLOG_IDENTIFIER", b"_COMM", b"_PID", b"SYSLOG_PID", b"_HOSTNAME"])
+VALUE_CACHE_LIMIT = 65536
+
+
+class JournalFormatError(Exception):
+    """The file is not a journal this reader understands, or is damaged."""
+
+
+def is_journal_file(name):
+    return name.endswith(JOURNAL_SUFFIXES)
+
+
+def journal_files(directory):
+    """Journal files of a journal directory and of its machine-id subdirectories, like ``journalctl -D``."""
+    found = []
+    for root, dirs, files in os.walk(directory):
+        found.extend(os.path.join(root, name) for name in sorted(files) if is_journal_file(name))
+        if root != directory:
+            dirs[:] = []
+    return found
+
+
+def _decompress(flags, payload):
+    if flags & OBJECT_COMPRESSED_XZ:
+        return lzma.decompress(payload)
+    if flags & OBJECT_COMPRESSED_LZ4:
+        if lz4 is None:
+            raise JournalFormatError("lz4-compressed entry (pip install lz4)")
+        # journald prefixes the LZ4 block with its decompressed size.
+        return lz4.block.decompress(payload[8:], uncompressed_size=U64.unpack_from(payload)[0])
+    if flags & OBJECT_COMPRESSED_ZSTD:
+        if zstandard is None:
+            raise JournalFormatError("zstd-compressed entry (pip install zstandard)")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(payload)
+    return payload
+
+
+class JournalFile:
+    """One memory-mapped journal file; use as a context manager."""
+
+    def __init__(self, path):
+        self.path = path
+        self.skipped_fields = 0  # payloads that could not be decompressed
+        with open(path, "rb") as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:  # empty file
+                raise JournalFormatError(f"{os.path.basename(path)}: {e}") from e
+        try:
+            self._read_header()
+        except Exception:
+            self.close()
+            raise
+
+    def _read_header(self):
+        data = self._map
+        if len(data) < HEADER_MIN_SIZE or data[:8] != JOURNAL_SIGNATURE:
+            raise JournalFormatError(f"{os.path.basename(self.path)} is not a journal file")
+        incompatible = U32.unpack_from(data, 12)[0]
+        if incompatible & ~HEADER_INCOMPATIBLE_SUPPORTED:
+            raise JournalFormatError(f"{os.path.basename(self.path)} uses unsupported journal features "
+                                     f"(incompatible flags {incompatible:#x})")
+        self.incompatible_flags = incompatible
+        self.compact = bool(incompatible & HEADER_INCOMPATIBLE_COMPACT)
+        (self.header_size, self.arena_size, _, _, _, _, self.tail_object_offset, self.n_objects, self.n_entries,
+         _, _, self.entry_array_offset, self.head_entry_realtime, self.tail_entry_realtime,
+         _) = HEADER_FIELDS.unpack_from(data, 88)
+        self._entry_item = U32 if self.compact else struct.Struct("<QQ")
+        self._array_item = U32 if self.compact else U64
+        self._data_payload = 72 if self.compact else 64
+        self._cache = {}
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def missing_codecs(self):
+        """Compression codecs the file may use that are not installed."""
+        missing = []
+        if self.incompatible_flags & HEADER_INCOMPATIBLE_COMPRESSED_LZ4 and lz4 is None:
+            missing.append("lz4")
+        if self.incompatible_flags & HEADER_INCOMPATIBLE_COMPRESSED_ZSTD and zstandard is None:
+            missing.append("zstd")
+        return missing
+
+    def time_bounds(self):
+        """Realtime (epoch µs) of the first and last entry from the header; None when unknown."""
+        return self.head_entry_realtime or None, self.tail_entry_realtime or None
+
+    def _object(self, offset, expected_type):
+        if offset < self.header_size or offset + OBJECT_HEADER.size > len(self._map) or offset % 8:
+            raise JournalFormatError(f"object offset {offset} out of bounds in {os.path.basename(self.path)}")
+        obj_type, flags, size = OBJECT_HEADER.unpack_from(self._map, offset)
+        if obj_type != expected_type or offset + size > len(self._map):
+            raise JournalFormatError(f"bad object at {offset} in {os.path.basename(self.path)}")
+        return flags, size
+
+    def entry_offsets(self):
+        """Offsets of every entry, in the order they were written, following the entry array chain."""
+        offset, remaining = self.entry_array_offset, self.n_entries
+        item = self._array_item
+        while offset and remaining > 0:
+            _, size = self._object(offset, OBJECT_ENTRY_ARRAY)
+            next_offset = U64.unpack_from(self._map, offset + 16)[0]
+            for position in range(offset + 24, offset + size - item.size + 1, item.size):
+                entry_offset = item.unpack_from(self._map, position)[0]
+                if not entry_offset:
+                    break
+                yield entry_offset
+                remaining -= 1
+                if not remaining:
+                    return
+            if next_offset <= offset:
+                break
+            offset = next_offset
+
+    def _field(self, offset, fields):
+        cached = self._cache.get(offset)
+        if cached is not None:
+            return cached
+        flags, size = self._object(offset, OBJECT_DATA)
+        payload = self._map[offset + self._data_payload:offset + size]
+        if flags & (OBJECT_COMPRESSED_XZ | OBJECT_COMPRESSED_LZ4 | OBJECT_COMPRESSED_ZSTD):
+            try:
+                payload = _decompress(flags, payload)
+            except JournalFormatError:
+                self.skipped_fields += 1
+                return None, None
+        name, sep, value = payload.partition(b"=")
+        if not sep or name not in fields:
+            result = (None, None)
+        else:
+            result = (name.decode("ascii", "replace"), value.decode("utf-8", "replace"))
+        if name in CACHED_FIELDS or not sep or name not in fields:
+            if len(self._cache) >= VALUE_CACHE_LIMIT:
+                self._cache.clear()
+            self._cache[offset] = result
+        return result
+
+    def entry(self, offset, fields=TIMELINE_FIELDS):
+        """``(realtime_us, {field: value})`` of the entry at ``offset``."""
+        data = self._map
+        item = self._entry_item
+        _, size = self._object(offset, OBJECT_ENTRY)
+        values = {}
+        for position in range(offset + 64, offset + size - item.size + 1, item.size):
+            name, value = self._field(item.unpack_from(data, position)[0], fields)
+            if name is not None and name not in values:
+                values[name] = value
+        return U64.unpack_from(data, offset + 24)[0], values
+
+    def entries(self, since_us=None, until_us=None, fields=TIMELINE_FIELDS, offsets=False):
+        """Yield ``(realtime_us, {field: value})`` for entries inside the optional time bounds.
+
+        With ``offsets``, ``(offset, realtime_us, {field: value})``, the offset
+        being that of the entry object, as :meth:`entry` takes it.
+        """
+        data = self._map
+        for offset in self.entry_offsets():
+            self._object(offset, OBJECT_ENTRY)
+            realtime = U64.unpack_from(data, offset + 24)[0]
+            if (since_us is not None and realtime < since_us) or (until_us is not None and realtime > until_us):
+                continue
+            _, values = self.entry(offset, fields)
+            yield (offset, realtime, values) if offsets else (realtime, values)
+
+
+def journalctl_json_command(path, since_us=None, until_us=None, directory=False, fields=TIMELINE_FIELDS):
+    """journalctl invocation exporting a journal file (or directory) as JSON lines."""
+    source = ["-D", path] if directory else [f"--file={path}"]
+    cmd = ["journalctl", *source, "--no-pager", "-o", "json",
+           "--output-fields=" + ",".join(sorted(name.decode() for name in fields))]
+    if since_us is not None:
+        cmd.append(f"--since=@{since_us // 1000000}")
+    if until_us is not None:
+        cmd.append(f"--until=@{-(-until_us // 1000000)}")
+    return cmd
+
+
+def _json_value(value):
+    if isinstance(value, list):
+        # A field set more than once is a list; binary values are lists of byte values.
+        if value and isinstance(value[0], int):
+            return bytes(value).decode("utf-8", "replace")
+        value = value[0] if value else None
+        return _json_value(value) if isinstance(value, list) else value
+    return value
+
+
+def iter_journal_json(output, since_us=None, until_us=None, fields=TIMELINE_FIELDS):
+    """Parse ``journalctl -o json`` output into the same ``(realtime_us, {field: value})`` pairs."""
+    names = {name.decode() for name in fields}
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        realtime = int(record["__REALTIME_TIMESTAMP"])
+        # --since/--until only have second resolution.
+        if (since_us is not None and realtime < since_us) or (until_us is not None and realtime > until_us):
+            continue
+        yield realtime, {name: _json_value(value) for name, value in record.items()
+                         if name in names and value is not None}
@@ -0,0 +1,178 @@
+# templates.py
+#
+# Streaming log template mining in the style of Drain (He et al., "Drain: An
+# Online Log Parsing Approach with Fixed Depth Tree", ICWS 2017). Messages are
+# split into tokens, tokens holding a digit are masked as variables, and each
+# message joins the most similar template of the same length and first token,
+# or starts a new one. Positions where a template's messages differ become
+# "<*>" wildcards; the tokens found there are the message's parameters.
+#
+# TimelineWriter runs every record through a TemplateMiner. A record whose
+# message can be rebuilt from its template is stored as {"tpl": version,
+# "params": [...]} instead of its text, and each template version is written
+# once, as a {"tpl_def": version, ...} line ahead of the first record using it.
+# Templates only ever generalize, so a record names the version it was mined
+# with, and versions point at their template's id.
+
+import json
+import os
+
+WILDCARD = "<*>"
+SIMILARITY_THRESHOLD = 0.4
+KEY_CACHE_LIMIT = 100000
+TEMPLATES_FILE = "templates.json"
+
+DIGITS = frozenset("0123456789")
+
+
+class Template:
+    __slots__ = ("id", "tokens", "slots", "version", "count", "first_seen", "last_seen")
+
+    def __init__(self, template_id, tokens):
+        self.id = template_id
+        self.tokens = tokens
+        self.slots = [position for position, token in enumerate(tokens) if token == WILDCARD]
+        self.version = None
+        self.count = 0
+        self.first_seen = None
+        self.last_seen = None
+
+    @property
+    def text(self):
+        return " ".join(self.tokens)
+
+
+class TemplateMiner:
+    """Assigns each message a template; feed messages in timestamp order for first/last seen."""
+
+    def __init__(self):
+        self.templates = []
+        self.versions = []  # (template id, text) of every template version handed out
+        self._tree = {}  # (token count, first token) -> templates
+        self._keys = {}  # masked message -> template
+
+    def seed(self, versions):
+        """Continue from the ``(template id, text)`` versions of an earlier miner, so a
+        timeline rewritten in part keeps the template ids and versions of the rest."""
+        for template_id, text in versions:
+            tokens = text.split(" ") if text else []
+            if template_id == len(self.templates):
+                template = Template(template_id, tokens)
+                self.templates.append(template)
+                self._tree.setdefault((len(tokens), tokens[0] if tokens else ""), []).append(template)
+            else:
+                template = self.templates[template_id]
+                template.tokens = tokens
+                template.slots = [position for position, token in enumerate(tokens) if token == WILDCARD]
+            self._new_version(template)
+
+    def _new_version(self, template):
+        template.version = len(self.versions)
+        self.versions.append((template.id, template.text))
+
+    def _match(self, masked):
+        best, best_similarity, best_wildcards = None, -1.0, -1
+        for template in self._tree.get((len(masked), masked[0] if masked else ""), ()):
+            same = wildcards = 0
+            for token, other in zip(template.tokens, masked):
+                if token == WILDCARD:
+                    wildcards += 1
+                elif token == other:
+                    same += 1
+            similarity = same / len(masked) if masked else 1.0
+            if similarity > best_similarity or (similarity == best_similarity and wildcards > best_wildcards):
+                best, best_similarity, best_wildcards = template, similarity, wildcards
+        if best is not None and best_similarity >= SIMILARITY_THRESHOLD:
+            return best
+        return None
+
+    def _template_for(self, masked):
+        template = self._match(masked)
+        if template is None:
+            template = Template(len(self.templates), masked)
+            self.templates.append(template)
+            self._tree.setdefault((len(masked), masked[0] if masked else ""), []).append(template)
+            self._new_version(template)
+        elif any(token != WILDCARD and token != other for token, other in zip(template.tokens, masked)):
+            template.tokens = [token if token == other else WILDCARD for token, other in zip(template.tokens, masked)]
+            template.slots = [position for position, token in enumerate(template.tokens) if token == WILDCARD]
+            self._new_version(template)
+        return template
+
+    def add(self, message, timestamp=None):
+        """Mine one message; returns its template and its tokens.
+
+        The message's parameters are the tokens at ``template.slots``. It can
+        be rebuilt from them only if joining its tokens with single spaces
+        gives it back (multi-line fastlog records, for one, can't).
+        """
+        tokens = message.split()
+        key = " ".join([WILDCARD if not DIGITS.isdisjoint(token) else token for token in tokens])
+        template = self._keys.get(key)
+        if template is None:
+            template = self._template_for(key.split(" ") if tokens else [])
+            if len(self._keys) >= KEY_CACHE_LIMIT:
+                self._keys.clear()
+            self._keys[key] = template
+        template.count += 1
+        if template.first_seen is None:
+            template.first_seen = timestamp
+        template.last_seen = timestamp
+        return template, tokens
+
+    def summary(self):
+        """Templates with their counts and first/last seen, most frequent first."""
+        return [{"id": template.id, "template": template.text, "count": template.count,
+                 "first_seen": template.first_seen, "last_seen": template.last_seen}
+                for template in sorted(self.templates, key=lambda template: -template.count)]
+
+    def write(self, output_dir):
+        """Atomically write the ``templates.json`` summary."""
+        return write_summary(output_dir, self.summary())
+
+
+def write_summary(output_dir, summary):
+    path = os.path.join(output_dir, TEMPLATES_FILE)
+    with open(path + ".tmp", "w") as f:
+        f.write(json.dumps({"templates": summary}, separators=(",", ":")))
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def load_summary(output_dir):
+    """The templates of a ``templates.json`` summary, or [] when there is none."""
+    try:
+        with open(os.path.join(output_dir, TEMPLATES_FILE)) as f:
+            return json.load(f)["templates"]
+    except (OSError, ValueError, KeyError):
+        return []
+
+
+def render(tokens, params):
+    """Rebuild a message from the tokens of its template version and its parameters."""
+    if not params:
+        return " ".join(tokens)
+    tokens = list(tokens)
+    values = iter(params)
+    for position, token in enumerate(tokens):
+        if token == WILDCARD:
+            tokens[position] = next(values)
+    return " ".join(tokens)
+
+
+class TemplateDecoder:
+    """Turns stored records back into the dicts that were written, reading ``tpl_def`` lines as they come."""
+
+    def __init__(self):
+        self.versions = {}  # version -> (template id, tokens)
+
+    def define(self, record):
+        self.versions[record["tpl_def"]] = (record["template_id"], record["template"].split(" "))
+
+    def decode(self, record):
+        template_id, tokens = self.versions[record.pop("tpl")]
+        params = record.pop("params", None)
+        if params is not None:
+            record["message"] = render(tokens, params)
+        record["template_id"] = template_id
+        return record
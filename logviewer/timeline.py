@@ -0,0 +1,573 @@
+# timeline.py
+
+import gzip
+import heapq
+import io
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from operator import itemgetter
+
+from logviewer.chunks import CHUNK_INDEX_FILE, CHUNK_ROWS, ChunkIndexBuilder
+from logviewer.entities import ENTITY_INDEX_FILE, EntityIndexBuilder
+from logviewer.rollup import ROLLUP_FILE, RollupBuilder
+from logviewer.templates import TEMPLATES_FILE, TemplateDecoder, TemplateMiner, write_summary
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+TIMELINE_FILE = "parsed_logs.ndjson"
+LEGACY_TIMELINE_FILE = "parsed_logs.json"  # indented JSON array written by older versions
+COMPRESSION_SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+ROW_OVERHEAD_BYTES = 240  # rough in-memory size of one Timeline row, excluding its message
+SPILL_CHUNK_ROWS = 10000  # rows per pickle chunk in a spilled run
+MIN_SPILL_BYTES = 4 << 20  # don't write runs smaller than this, even when over budget
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+# Key layouts ("shapes") seen so far, shared by every Timeline. There are only
+# a handful (one per event log pattern plus fastlog), so rows store a small id.
+_shapes = []
+_shape_ids = {}
+_shapes_lock = threading.Lock()
+
+
+def to_epoch_us(dt):
+    """Aware datetime -> integer microseconds since the Unix epoch."""
+    return (dt - EPOCH) // MICROSECOND
+
+
+def format_epoch_us(us):
+    """Integer epoch microseconds -> the ISO-8601 UTC string written to parsed_logs."""
+    return (EPOCH + timedelta(microseconds=us)).isoformat()
+
+
+def parse_time_bound(value):
+    """``--since``/``--until`` value (ISO-8601 string or datetime) -> epoch microseconds.
+
+    Naive values are taken as local time, like fastlog and BSD syslog stamps.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.strip().replace(" ", "T", 1))
+    return to_epoch_us(value.astimezone(timezone.utc))
+
+
+class TimeWindow:
+    """Inclusive [since, until] range of epoch microseconds; either end may be open."""
+
+    def __init__(self, since_us=None, until_us=None):
+        if since_us is not None and until_us is not None and since_us > until_us:
+            raise ValueError("--since must not be later than --until")
+        self.since_us = since_us
+        self.until_us = until_us
+
+    @classmethod
+    def from_options(cls, options):
+        """Window from the ``since``/``until`` parse options, or None when neither is set."""
+        since, until = parse_time_bound(options.get("since")), parse_time_bound(options.get("until"))
+        if since is None and until is None:
+            return None
+        return cls(since, until)
+
+    def contains(self, ts):
+        return (self.since_us is None or ts >= self.since_us) and (self.until_us is None or ts <= self.until_us)
+
+    def overlaps(self, first, last):
+        """False only when a span known to run from ``first`` to ``last`` lies wholly outside the window."""
+        if first is not None and self.until_us is not None and first > self.until_us:
+            return False
+        if last is not None and self.since_us is not None and last < self.since_us:
+            return False
+        return True
+
+    def __str__(self):
+        since = format_epoch_us(self.since_us) if self.since_us is not None else "…"
+        until = format_epoch_us(self.until_us) if self.until_us is not None else "…"
+        return f"{since} → {until}"
+
+
+def _shape_id(keys):
+    shape = _shape_ids.get(keys)
+    if shape is not None:
+        return shape
+    with _shapes_lock:
+        shape = _shape_ids.get(keys)
+        if shape is None:
+            fields = tuple(key for key in keys if key not in ("timestamp", "message"))
+            # Rebuilds the original key order from (timestamp, message, *fields).
+            order = [0 if key == "timestamp" else 1 if key == "message" else 2 + fields.index(key) for key in keys]
+            getter = itemgetter(*order)
+            if len(order) == 1:
+                getter = lambda values, g=getter: (g(values),)
+            _shapes.append((keys, fields, getter))
+            shape = _shape_ids[keys] = len(_shapes) - 1
+        return shape
+
+
+class MemoryBudget:
+    """Shared cap on the in-memory size of every Timeline of one bundle parse.
+
+    Timelines report the estimated size of the rows they hold; once the total
+    passes ``limit_bytes`` the Timeline being appended to spills its rows to a
+    sorted run file under ``spill_dir``.
+    """
+
+    def __init__(self, limit_bytes, spill_dir=None, cancel_token=None):
+        self.limit_bytes = limit_bytes
+        self._spill_root = spill_dir
+        self._spill_dir = None
+        self._cancel_token = cancel_token
+        self._lock = threading.Lock()
+        self.used_bytes = 0
+        self.peak_bytes = 0
+        self.spilled_runs = 0
+        self.spilled_rows = 0
+
+    def add(self, count):
+        """Account ``count`` bytes; returns True when the budget is exceeded."""
+        with self._lock:
+            self.used_bytes += count
+            if self.used_bytes > self.peak_bytes:
+                self.peak_bytes = self.used_bytes
+            return self.used_bytes > self.limit_bytes
+
+    def release(self, count):
+        with self._lock:
+            self.used_bytes -= count
+
+    def spill_dir(self):
+        with self._lock:
+            if self._spill_dir is None:
+                if self._spill_root:
+                    os.makedirs(self._spill_root, exist_ok=True)
+                self._spill_dir = tempfile.mkdtemp(prefix="logviewer_spill_", dir=self._spill_root)
+                if self._cancel_token is not None:
+                    self._cancel_token.register_scratch(self._spill_dir)
+            return self._spill_dir
+
+    def run_spilled(self, rows):
+        with self._lock:
+            self.spilled_runs += 1
+            self.spilled_rows += rows
+
+    def cleanup(self):
+        with self._lock:
+            path, self._spill_dir = self._spill_dir, None
+        if path:
+            if self._cancel_token is not None:
+                self._cancel_token.release_scratch(path)
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def _write_run(path, rows):
+    with open(path, "wb") as f:
+        for start in range(0, len(rows), SPILL_CHUNK_ROWS):
+            pickle.dump(rows[start:start + SPILL_CHUNK_ROWS], f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _read_run(path):
+    with open(path, "rb") as f:
+        while True:
+            try:
+                chunk = pickle.load(f)
+            except EOFError:
+                return
+            yield from chunk
+
+
+class Timeline:
+    """Compact timeline of parsed log entries, optionally capped by a MemoryBudget.
+
+    Each entry is one tuple ``(timestamp_us, shape_id, message, *fields)``
+    instead of a dict: timestamps are integer epoch microseconds, key names are
+    stored once per shape, and low-cardinality field values (hostname, process,
+    severity, module, ...) are interned through a string table that can be
+    shared by every collector of a parse. Entries become dicts again only when
+    iterated, i.e. when they are written out.
+
+    With a budget, rows beyond it are sorted and spilled to run files;
+    iteration then k-way merges the runs and the in-memory rows. Segments keep
+    insertion order and the merge is stable, so the result matches a stable
+    in-memory sort.
+    """
+
+    def __init__(self, strings=None, budget=None):
+        self.strings = strings if strings is not None else {}
+        self.budget = budget
+        self.rows = []
+        self.segments = []  # earlier rows in insertion order: ("rows", list) or ("run", path)
+        self._count = 0
+        self._bytes = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, record):
+        """Add a parsed entry dict whose ``timestamp`` is integer epoch microseconds."""
+        keys = tuple(record)
+        shape = _shape_id(keys)
+        fields = _shapes[shape][1]
+        values = [record[key] for key in fields]
+        intern = self.strings.setdefault
+        self.append_row((record["timestamp"], shape, record.get("message"), *map(intern, values, values)))
+
+    def extend(self, other):
+        if not self.segments and not other.segments:
+            self.rows.extend(other.rows)
+        else:
+            self._seal()
+            other._seal()
+            self.segments.extend(other.segments)
+        self._count += other._count
+        self._bytes += other._bytes
+        other.rows, other.segments, other._count, other._bytes = [], [], 0, 0
+        budget = self.budget
+        if budget is not None and budget.used_bytes > budget.limit_bytes \
+                and self._bytes >= min(MIN_SPILL_BYTES, budget.limit_bytes):
+            self.spill()
+
+    def _seal(self):
+        if self.rows:
+            self.segments.append(("rows", self.rows))
+            self.rows = []
+
+    def spill(self):
+        """Write every in-memory segment of this timeline to sorted run files."""
+        self._seal()
+        spill_dir = self.budget.spill_dir()
+        for index, (kind, data) in enumerate(self.segments):
+            if kind != "rows":
+                continue
+            data.sort(key=itemgetter(0))
+            path = os.path.join(spill_dir, f"run_{uuid.uuid4().hex}.pkl")
+            _write_run(path, data)
+            self.segments[index] = ("run", path)
+            self.budget.run_spilled(len(data))
+        self.budget.release(self._bytes)
+        self._bytes = 0
+
+    def sort(self):
+        if not self.segments:
+            self.rows.sort(key=itemgetter(0))
+        else:
+            self._seal()
+            for kind, data in self.segments:
+                if kind == "rows":
+                    data.sort(key=itemgetter(0))
+
+    def iter_rows(self):
+        """Yield rows in timestamp order (call ``sort`` first)."""
+        if not self.segments:
+            yield from self.rows
+            return
+        iterators = [iter(data) if kind == "rows" else _read_run(data) for kind, data in self.segments]
+        yield from heapq.merge(*iterators, key=itemgetter(0))
+
+    def __iter__(self):
+        shapes = _shapes
+        for row in self.iter_rows():
+            keys, _, getter = shapes[row[1]]
+            yield dict(zip(keys, getter((format_epoch_us(row[0]), row[2]) + row[3:])))
+
+    def dump(self, path):
+        """Write every row (unsorted) to a checkpoint file that ``load`` can read in another process."""
+        with open(path, "wb") as f:
+            pickle.dump([(shape, keys) for shape, (keys, _, _) in enumerate(list(_shapes))], f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+            for kind, data in self.segments + [("rows", self.rows)]:
+                rows = data if kind == "rows" else list(_read_run(data))
+                for start in range(0, len(rows), SPILL_CHUNK_ROWS):
+                    pickle.dump(rows[start:start + SPILL_CHUNK_ROWS], f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def load(self, path):
+        """Append the rows of a checkpoint written by ``dump``."""
+        with open(path, "rb") as f:
+            # Shape ids are per process: map the saved ones onto this process's registry.
+            remap = {saved: _shape_id(keys) for saved, keys in pickle.load(f)}
+            intern = self.strings.setdefault
+            while True:
+                try:
+                    chunk = pickle.load(f)
+                except EOFError:
+                    break
+                for row in chunk:
+                    self.append_row((row[0], remap[row[1]], row[2], *map(intern, row[3:], row[3:])))
+
+    def append_row(self, row):
+        self.rows.append(row)
+        self._count += 1
+        if self.budget is not None:
+            size = ROW_OVERHEAD_BYTES + (len(row[2]) if row[2] else 0)
+            self._bytes += size
+            if self.budget.add(size) and self._bytes >= min(MIN_SPILL_BYTES, self.budget.limit_bytes):
+                self.spill()
+
+    def discard(self):
+        """Drop rows and remove spilled run files once the timeline has been written."""
+        for kind, data in self.segments:
+            if kind == "run" and os.path.exists(data):
+                os.remove(data)
+        if self.budget is not None:
+            self.budget.release(self._bytes)
+        self.rows, self.segments, self._count, self._bytes = [], [], 0, 0
+
+
+def compression_available(compression):
+    return compression != "zstd" or zstandard is not None
+
+
+def check_compression(compression):
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unknown timeline compression: {compression}")
+    if compression == "zstd" and zstandard is None:
+        raise RuntimeError("zstd timeline compression requires the zstandard package")
+
+
+def timeline_candidates(output_dir):
+    return [os.path.join(output_dir, TIMELINE_FILE + suffix) for suffix in COMPRESSION_SUFFIXES.values()] + \
+        [os.path.join(output_dir, LEGACY_TIMELINE_FILE)]
+
+
+def find_timeline(output_dir):
+    """Return the timeline file of a parsed context (NDJSON, compressed or legacy JSON), or None."""
+    for path in timeline_candidates(output_dir):
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def open_timeline(path, mode="rt"):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode, encoding="utf-8")
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("zstandard is not installed; cannot open " + path)
+        if "r" in mode:
+            # Timelines are a zstd frame per chunk; zstandard.open() would stop after the first.
+            reader = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), read_across_frames=True)
+            return io.TextIOWrapper(reader, encoding="utf-8")
+        return zstandard.open(path, mode, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def iter_timeline(path):
+    """Yield the records of a timeline file as dicts, one line at a time for NDJSON.
+
+    Template-compacted records get their ``message`` back, plus ``template_id``.
+    """
+    if path.endswith(LEGACY_TIMELINE_FILE):
+        with open(path) as f:
+            yield from json.load(f)
+        return
+    decoder = TemplateDecoder()
+    with open_timeline(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                if "tpl" in record:
+                    yield decoder.decode(record)
+                elif "tpl_def" in record:
+                    decoder.define(record)
+                else:
+                    yield record
+
+
+def iter_timeline_chunks(path, index, positions):
+    """Yield ``(record number, record)`` from just the chunks at ``positions`` of a timeline's ChunkIndex.
+
+    Each chunk is read and decompressed on its own; templates defined in
+    earlier chunks come from the index.
+    """
+    decoder = TemplateDecoder()
+    for version, (template_id, text) in enumerate(index.templates):
+        decoder.define({"tpl_def": version, "template_id": template_id, "template": text})
+    with open(path, "rb") as f:
+        for position in positions:
+            chunk = index.chunks[position]
+            f.seek(chunk["offset"])
+            data = f.read(chunk["bytes"])
+            if index.compression == "gzip":
+                data = gzip.decompress(data)
+            elif index.compression == "zstd":
+                data = zstandard.ZstdDecompressor().decompressobj().decompress(data)
+            row = chunk["first_row"]
+            for line in data.decode("utf-8").split("\n"):
+                if line:
+                    record = json.loads(line)
+                    if "tpl" in record:
+                        yield row, decoder.decode(record)
+                    elif "tpl_def" in record:
+                        continue
+                    else:
+                        yield row, record
+                    row += 1
+
+
+def record_epoch_us(record):
+    return to_epoch_us(datetime.fromisoformat(record["timestamp"]))
+
+
+class TimelineWriter:
+    """Streams records to ``parsed_logs.ndjson[.gz|.zst]`` as compact JSON lines.
+
+    Records go to a ``.tmp`` file a chunk of CHUNK_ROWS records at a time,
+    each chunk compressed on its own (``chunks.py``); ``commit`` renames it
+    into place atomically and removes timeline files of other formats, so
+    readers never see a half-written timeline and a directory never holds two
+    of them. Unless ``index_entities`` is False, the entity index of the
+    records (``entities.py``) is built along the way and committed with it.
+    Unless ``mine_templates`` is False, messages are mined for templates
+    (``templates.py``) and stored as template parameters where possible, with
+    a ``templates.json`` summary. Unless ``rollup`` is False, the chunk index
+    and a ``rollup.json`` summary (``rollup.py``) are too.
+
+    A ``miner`` shared by several writers (the partitions of a timeline,
+    ``partitions.py``) keeps template ids and versions consistent across them;
+    each writer's summary then counts only its own records.
+    """
+
+    def __init__(self, output_dir, compression=None, index_entities=True, mine_templates=True, rollup=True,
+                 miner=None):
+        check_compression(compression)
+        os.makedirs(output_dir, exist_ok=True)
+        self.output_dir = output_dir
+        self.compression = compression
+        self.path = os.path.join(output_dir, TIMELINE_FILE + COMPRESSION_SUFFIXES[compression])
+        self.tmp_path = self.path + ".tmp"
+        self.count = 0
+        self.entities = EntityIndexBuilder() if index_entities else None
+        self.templates = miner if miner is not None else TemplateMiner() if mine_templates else None
+        self.rollup = RollupBuilder() if rollup else None
+        self.chunks = ChunkIndexBuilder() if rollup else None
+        self._defined = set()  # template versions written so far
+        self._seen = {} if miner is not None else None  # template id -> [rows, first seen] of a shared miner
+        self._encode = json.JSONEncoder(separators=(",", ":")).encode
+        self._lines = []  # lines of the chunk being filled
+        self._chunk_start = 0  # record number of its first record
+        if compression == "gzip":
+            self._compress = lambda data: gzip.compress(data, compresslevel=6)
+        elif compression == "zstd":
+            self._compress = zstandard.ZstdCompressor().compress
+        else:
+            self._compress = None
+        self._file = open(self.tmp_path, "wb")
+
+    def write(self, record):
+        if "template_id" in record:  # read back from an earlier timeline; mined again
+            record = {key: value for key, value in record.items() if key != "template_id"}
+        message = record.get("message")
+        if self.templates is not None and isinstance(message, str):
+            template, tokens = self.templates.add(message, record.get("timestamp"))
+            if self.entities is not None:
+                self.entities.add_tokens(tokens, template.slots)
+            if template.version not in self._defined:
+                self._define(template)
+            if self._seen is not None:
+                seen = self._seen.get(template.id)
+                if seen is None:
+                    self._seen[template.id] = [1, record.get("timestamp")]
+                else:
+                    seen[0] += 1
+            params = [tokens[position] for position in template.slots]
+            if self.rollup is not None:
+                self.rollup.add(record)
+                # The template literals' words are added once per chunk.
+                self.chunks.add(record.get("timestamp"), params, template.version)
+            if " ".join(tokens) != message:
+                record = {**record, "tpl": template.version}
+            else:
+                record = record.copy()
+                del record["message"]
+                record["tpl"] = template.version
+                record["params"] = params
+        else:
+            if self.entities is not None:
+                self.entities.add(message)
+            if self.rollup is not None:
+                self.rollup.add(record)
+                self.chunks.add(record.get("timestamp"), [message] if isinstance(message, str) else [])
+        self._lines.append(self._encode(record))
+        self.count += 1
+        if self.count - self._chunk_start >= CHUNK_ROWS:
+            self._write_chunk()
+
+    def _define(self, template):
+        """Write a ``tpl_def`` line for the template's current version ahead of its first record."""
+        self._lines.append(self._encode({"tpl_def": template.version, "template_id": template.id,
+                                         "template": template.text}))
+        self._defined.add(template.version)
+
+    def _write_chunk(self):
+        if not self._lines:
+            return
+        data = ("\n".join(self._lines) + "\n").encode("utf-8")
+        if self._compress is not None:
+            data = self._compress(data)
+        offset = self._file.tell()
+        self._file.write(data)
+        if self.chunks is not None:
+            self.chunks.close_chunk(offset, len(data), self._chunk_start, self.count - self._chunk_start,
+                                    self.templates.versions if self.templates is not None else [])
+        self._lines = []
+        self._chunk_start = self.count
+
+    def write_all(self, records):
+        for record in records:
+            self.write(record)
+        return self.count
+
+    def commit(self):
+        self._write_chunk()
+        self._file.close()
+        if self.entities is not None:
+            self.entities.write(self.output_dir)
+        elif os.path.exists(os.path.join(self.output_dir, ENTITY_INDEX_FILE)):
+            os.remove(os.path.join(self.output_dir, ENTITY_INDEX_FILE))
+        if self._seen is not None:
+            # The shared miner's last sighting of a template is in this writer's records, written last.
+            write_summary(self.output_dir, [
+                {"id": template_id, "template": self.templates.templates[template_id].text, "count": count,
+                 "first_seen": first_seen, "last_seen": self.templates.templates[template_id].last_seen}
+                for template_id, (count, first_seen) in sorted(self._seen.items(), key=lambda item: -item[1][0])])
+        elif self.templates is not None:
+            self.templates.write(self.output_dir)
+        elif os.path.exists(os.path.join(self.output_dir, TEMPLATES_FILE)):
+            os.remove(os.path.join(self.output_dir, TEMPLATES_FILE))
+        for builder, name in [(self.rollup, ROLLUP_FILE), (self.chunks, CHUNK_INDEX_FILE)]:
+            if builder is None and os.path.exists(os.path.join(self.output_dir, name)):
+                os.remove(os.path.join(self.output_dir, name))
+        if self.rollup is not None:
+            self.rollup.add_words(self.chunks.words)
+            self.rollup.write(self.output_dir)
+            self.chunks.write(self.output_dir, self.templates.versions if self.templates is not None else [],
+                              self.compression)
+        os.replace(self.tmp_path, self.path)
+        for path in timeline_candidates(self.output_dir):
+            if path != self.path and os.path.exists(path):
+                os.remove(path)
+        return self.path
+
+    def abort(self):
+        self._file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
@@ -0,0 +1,75 @@
+# trace.py
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+TRACE_FILE = "parse_trace.json"
+
+
+def now_us():
+    return time.perf_counter_ns() // 1000
+
+
+class TraceRecorder:
+    """Collects complete ("X") spans in Chrome trace-event format.
+
+    The written file loads in chrome://tracing and https://ui.perfetto.dev.
+    Spans are laid out per (pid, tid); child processes get their own pid lane
+    so fastlogParser/journalctl runs show up next to the threads waiting on them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events = []
+        self._named_threads = set()
+        self._pid = os.getpid()
+        self._events.append({"ph": "M", "name": "process_name", "pid": self._pid, "tid": 0,
+                             "args": {"name": "LogViewer parser"}})
+
+    def _name_thread(self, tid):
+        if tid in self._named_threads:
+            return
+        self._named_threads.add(tid)
+        self._events.append({"ph": "M", "name": "thread_name", "pid": self._pid, "tid": tid,
+                             "args": {"name": threading.current_thread().name}})
+
+    def add_span(self, name, start_us, end_us, cat="parse", args=None):
+        tid = threading.get_ident()
+        event = {"name": name, "cat": cat, "ph": "X", "ts": start_us, "dur": max(0, end_us - start_us),
+                 "pid": self._pid, "tid": tid}
+        if args:
+            event["args"] = args
+        with self._lock:
+            self._name_thread(tid)
+            self._events.append(event)
+
+    def add_process_span(self, name, child_pid, start_us, end_us, args=None):
+        event = {"name": name, "cat": "subprocess", "ph": "X", "ts": start_us, "dur": max(0, end_us - start_us),
+                 "pid": child_pid, "tid": child_pid}
+        if args:
+            event["args"] = args
+        with self._lock:
+            self._events.append({"ph": "M", "name": "process_name", "pid": child_pid, "tid": child_pid,
+                                 "args": {"name": f"{name} [{child_pid}]"}})
+            self._events.append(event)
+
+    @contextmanager
+    def span(self, name, cat="parse", args=None):
+        start = now_us()
+        try:
+            yield
+        finally:
+            self.add_span(name, start, now_us(), cat, args)
+
+    def write(self, path):
+        with self._lock:
+            events = list(self._events)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return path
@@ -39,7 +39,7 @@ class CustomInstallCommand(install):
 setup(
     name='LogViewer',
     version='1.1.0-beta3',
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
     include_package_data=True,
     install_requires=[
         'jinja2',